@@ -17,16 +17,15 @@
 """Publish your app for Linux users for desktop, cloud, and IoT."""
 
 import os
-
-import pkg_resources
+from importlib import metadata
 
 
 def _get_version():
     if os.environ.get("SNAP_NAME") == "snapcraft":
         return os.environ["SNAP_VERSION"]
     try:
-        return pkg_resources.require("snapcraft")[0].version
-    except pkg_resources.DistributionNotFound:
+        return metadata.version("snapcraft")
+    except metadata.PackageNotFoundError:
         return "devel"
 
 
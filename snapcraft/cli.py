@@ -20,92 +20,158 @@ import contextlib
 import logging
 import os
 import sys
-from typing import Dict
+from typing import TYPE_CHECKING, Any, Dict, Optional, Type
 
 import craft_cli
-import craft_store
 from craft_cli import ArgumentParsingError, EmitterMode, ProvideHelpException, emit
+from overrides import overrides
 
 from snapcraft import __version__, errors, utils
-from snapcraft_legacy.cli import legacy
 
 from . import commands
 
+if TYPE_CHECKING:
+    import argparse
+
+
+class _LazyCommand(craft_cli.BaseCommand):
+    """A command whose implementation is imported only when it is used.
+
+    The dispatcher only needs the name and help of each command to parse
+    the command line and to list the commands, so these are declared up
+    front. The class implementing the command is looked up in
+    snapcraft.commands, importing its module, when the command is
+    instantiated to be run or to provide its help.
+    """
+
+    command_class_name: str
+
+    def __init__(self, config: Optional[Dict[str, Any]]):
+        command_class = getattr(commands, self.command_class_name)
+        self._command: craft_cli.BaseCommand = command_class(config)
+        self.overview = self._command.overview
+        super().__init__(config)
+
+    @overrides
+    def fill_parser(self, parser: "argparse.ArgumentParser") -> None:
+        self._command.fill_parser(parser)
+
+    @overrides
+    def run(self, parsed_args: "argparse.Namespace") -> Optional[int]:
+        return self._command.run(parsed_args)
+
+
+_LAZY_COMMANDS: Dict[str, Type[_LazyCommand]] = {}
+
+
+def _lazy_command(command_class_name: str) -> Type[_LazyCommand]:
+    """Declare the command implemented by command_class_name.
+
+    The command attributes are taken from the metadata generated from
+    the command classes by tools/generate_command_metadata.py.
+
+    :param command_class_name: The name of the command class in
+        snapcraft.commands.
+    """
+    metadata = commands.COMMAND_METADATA[command_class_name]
+    lazy_command = type(
+        command_class_name,
+        (_LazyCommand,),
+        {
+            "command_class_name": command_class_name,
+            "name": metadata["name"],
+            "help_msg": metadata["help_msg"],
+            "hidden": metadata["hidden"],
+            "common": metadata["common"],
+        },
+    )
+    _LAZY_COMMANDS[command_class_name] = lazy_command
+    return lazy_command
+
+
 COMMAND_GROUPS = [
     craft_cli.CommandGroup(
         "Lifecycle",
         [
-            commands.CleanCommand,
-            commands.PullCommand,
-            commands.BuildCommand,
-            commands.StageCommand,
-            commands.PrimeCommand,
-            commands.PackCommand,
-            commands.SnapCommand,  # hidden (legacy compatibility)
-            commands.StoreLegacyRemoteBuildCommand,
+            _lazy_command("CleanCommand"),
+            _lazy_command("PullCommand"),
+            _lazy_command("BuildCommand"),
+            _lazy_command("StageCommand"),
+            _lazy_command("PrimeCommand"),
+            _lazy_command("PackCommand"),
+            # hidden (legacy compatibility)
+            _lazy_command("SnapCommand"),
+            _lazy_command("StoreLegacyRemoteBuildCommand"),
         ],
     ),
     craft_cli.CommandGroup(
         "Extensions",
         [
-            commands.ListExtensionsCommand,
-            commands.ExtensionsCommand,  # hidden (alias to list-extensions)
-            commands.ExpandExtensionsCommand,
+            _lazy_command("ListExtensionsCommand"),
+            # hidden (alias to list-extensions)
+            _lazy_command("ExtensionsCommand"),
+            _lazy_command("ExpandExtensionsCommand"),
         ],
     ),
     craft_cli.CommandGroup(
         "Store Account",
         [
-            commands.StoreLoginCommand,
-            commands.StoreExportLoginCommand,
-            commands.StoreLogoutCommand,
-            commands.StoreWhoAmICommand,
+            _lazy_command("StoreLoginCommand"),
+            _lazy_command("StoreExportLoginCommand"),
+            _lazy_command("StoreLogoutCommand"),
+            _lazy_command("StoreWhoAmICommand"),
         ],
     ),
     craft_cli.CommandGroup(
         "Store Snap Names",
         [
-            commands.StoreRegisterCommand,
-            commands.StoreNamesCommand,
-            commands.StoreLegacyListRegisteredCommand,
-            commands.StoreLegacyListCommand,
-            commands.StoreLegacyMetricsCommand,
-            commands.StoreLegacyUploadMetadataCommand,
+            _lazy_command("StoreRegisterCommand"),
+            _lazy_command("StoreNamesCommand"),
+            _lazy_command("StoreLegacyListRegisteredCommand"),
+            _lazy_command("StoreLegacyListCommand"),
+            _lazy_command("StoreLegacyMetricsCommand"),
+            _lazy_command("StoreLegacyUploadMetadataCommand"),
         ],
     ),
     craft_cli.CommandGroup(
         "Store Snap Release Management",
         [
-            commands.StoreReleaseCommand,
-            commands.StoreCloseCommand,
-            commands.StoreStatusCommand,
-            commands.StoreUploadCommand,
-            commands.StoreLegacyPromoteCommand,
-            commands.StoreLegacyListRevisionsCommand,
+            _lazy_command("StoreReleaseCommand"),
+            _lazy_command("StoreCloseCommand"),
+            _lazy_command("StoreStatusCommand"),
+            _lazy_command("StoreUploadCommand"),
+            _lazy_command("StoreLegacyPromoteCommand"),
+            _lazy_command("StoreLegacyListRevisionsCommand"),
         ],
     ),
     craft_cli.CommandGroup(
         "Store Snap Tracks",
         [
-            commands.StoreListTracksCommand,
-            commands.StoreTracksCommand,  # hidden (alias to list-tracks)
-            commands.StoreLegacySetDefaultTrackCommand,
+            _lazy_command("StoreListTracksCommand"),
+            # hidden (alias to list-tracks)
+            _lazy_command("StoreTracksCommand"),
+            _lazy_command("StoreLegacySetDefaultTrackCommand"),
         ],
     ),
     craft_cli.CommandGroup(
         "Store Assertions",
         [
-            commands.StoreLegacyCreateKeyCommand,
-            commands.StoreLegacyEditValidationSetsCommand,
-            commands.StoreLegacyGatedCommand,
-            commands.StoreLegacyListValidationSetsCommand,
-            commands.StoreLegacyRegisterKeyCommand,
-            commands.StoreLegacySignBuildCommand,
-            commands.StoreLegacyValidateCommand,
-            commands.StoreLegacyListKeysCommand,
+            _lazy_command("StoreLegacyCreateKeyCommand"),
+            _lazy_command("StoreLegacyEditValidationSetsCommand"),
+            _lazy_command("StoreLegacyGatedCommand"),
+            _lazy_command("StoreLegacyListValidationSetsCommand"),
+            _lazy_command("StoreLegacyRegisterKeyCommand"),
+            _lazy_command("StoreLegacySignBuildCommand"),
+            _lazy_command("StoreLegacyValidateCommand"),
+            _lazy_command("StoreLegacyListKeysCommand"),
+        ],
+    ),
+    craft_cli.CommandGroup(
+        "Other",
+        [
+            _lazy_command("VersionCommand"),
         ],
     ),
-    craft_cli.CommandGroup("Other", [commands.VersionCommand]),
 ]
 
 GLOBAL_ARGS = [
@@ -125,7 +191,7 @@ def get_dispatcher() -> craft_cli.Dispatcher:
     """
     # Run the legacy implementation if inside a legacy managed environment.
     if os.getenv("SNAPCRAFT_BUILD_ENVIRONMENT") == "managed-host":
-        legacy.legacy_run()
+        _legacy_run()
 
     # set lib loggers to debug level so that all messages are sent to Emitter
     for lib_name in _LIB_NAMES:
@@ -150,7 +216,7 @@ def get_dispatcher() -> craft_cli.Dispatcher:
         COMMAND_GROUPS,
         summary="Package, distribute, and update snaps for Linux and IoT",
         extra_global_args=GLOBAL_ARGS,
-        default_command=commands.PackCommand,
+        default_command=_LAZY_COMMANDS["PackCommand"],
     )
 
 
@@ -164,6 +230,13 @@ def _run_legacy(err):
     emit.trace(f"run legacy implementation: {err!s}")
     emit.ended_ok()
 
+    _legacy_run()
+
+
+def _legacy_run():
+    # The legacy implementation is only imported when falling back to it.
+    from snapcraft_legacy.cli import legacy  # pylint: disable=import-outside-toplevel
+
     legacy.legacy_run()
 
 
@@ -197,11 +270,16 @@ def run():
         retcode = 0
     except errors.LegacyFallback as err:
         _run_legacy(err)
-    except craft_store.errors.CraftStoreError as err:
-        emit.error(craft_cli.errors.CraftError(f"craft-store error: {err}"))
-        retcode = 1
     except errors.SnapcraftError as err:
         emit.error(err)
         retcode = 1
+    except Exception as err:  # pylint: disable=broad-except
+        # craft_store is only imported by the commands using the store.
+        import craft_store  # pylint: disable=import-outside-toplevel
+
+        if not isinstance(err, craft_store.errors.CraftStoreError):
+            raise
+        emit.error(craft_cli.errors.CraftError(f"craft-store error: {err}"))
+        retcode = 1
 
     return retcode
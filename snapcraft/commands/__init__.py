@@ -14,54 +14,77 @@
 # You should have received a copy of the GNU General Public License
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
-"""Snapcraft commands."""
 
-from .account import (
-    StoreExportLoginCommand,
-    StoreLoginCommand,
-    StoreLogoutCommand,
-    StoreWhoAmICommand,
-)
-from .extensions import (
-    ExpandExtensionsCommand,
-    ExtensionsCommand,
-    ListExtensionsCommand,
-)
-from .legacy import (
-    StoreLegacyCreateKeyCommand,
-    StoreLegacyEditValidationSetsCommand,
-    StoreLegacyGatedCommand,
-    StoreLegacyListKeysCommand,
-    StoreLegacyListRevisionsCommand,
-    StoreLegacyListValidationSetsCommand,
-    StoreLegacyMetricsCommand,
-    StoreLegacyPromoteCommand,
-    StoreLegacyRegisterKeyCommand,
-    StoreLegacyRemoteBuildCommand,
-    StoreLegacySetDefaultTrackCommand,
-    StoreLegacySignBuildCommand,
-    StoreLegacyUploadMetadataCommand,
-    StoreLegacyValidateCommand,
-)
-from .lifecycle import (
-    BuildCommand,
-    CleanCommand,
-    PackCommand,
-    PrimeCommand,
-    PullCommand,
-    SnapCommand,
-    StageCommand,
-)
-from .manage import StoreCloseCommand, StoreReleaseCommand
-from .names import (
-    StoreLegacyListCommand,
-    StoreLegacyListRegisteredCommand,
-    StoreNamesCommand,
-    StoreRegisterCommand,
-)
-from .status import StoreListTracksCommand, StoreStatusCommand, StoreTracksCommand
-from .upload import StoreUploadCommand
-from .version import VersionCommand
+"""Snapcraft commands.
+
+The command classes are imported from their modules when first accessed,
+so that importing this package does not import every command's
+dependencies.
+"""
+
+import importlib
+from typing import TYPE_CHECKING, Any
+
+from ._metadata import COMMAND_METADATA
+
+if TYPE_CHECKING:
+    from .account import (
+        StoreExportLoginCommand,
+        StoreLoginCommand,
+        StoreLogoutCommand,
+        StoreWhoAmICommand,
+    )
+    from .extensions import (
+        ExpandExtensionsCommand,
+        ExtensionsCommand,
+        ListExtensionsCommand,
+    )
+    from .legacy import (
+        StoreLegacyCreateKeyCommand,
+        StoreLegacyEditValidationSetsCommand,
+        StoreLegacyGatedCommand,
+        StoreLegacyListKeysCommand,
+        StoreLegacyListRevisionsCommand,
+        StoreLegacyListValidationSetsCommand,
+        StoreLegacyMetricsCommand,
+        StoreLegacyPromoteCommand,
+        StoreLegacyRegisterKeyCommand,
+        StoreLegacyRemoteBuildCommand,
+        StoreLegacySetDefaultTrackCommand,
+        StoreLegacySignBuildCommand,
+        StoreLegacyUploadMetadataCommand,
+        StoreLegacyValidateCommand,
+    )
+    from .lifecycle import (
+        BuildCommand,
+        CleanCommand,
+        PackCommand,
+        PrimeCommand,
+        PullCommand,
+        SnapCommand,
+        StageCommand,
+    )
+    from .manage import StoreCloseCommand, StoreReleaseCommand
+    from .names import (
+        StoreLegacyListCommand,
+        StoreLegacyListRegisteredCommand,
+        StoreNamesCommand,
+        StoreRegisterCommand,
+    )
+    from .status import StoreListTracksCommand, StoreStatusCommand, StoreTracksCommand
+    from .upload import StoreUploadCommand
+    from .version import VersionCommand
+
+
+def __getattr__(name: str) -> Any:
+    try:
+        module_name = COMMAND_METADATA[name]["module"]
+    except KeyError:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}") from None
+
+    module = importlib.import_module(f".{module_name}", __name__)
+    return getattr(module, name)
+
 
 __all__ = [
     "BuildCommand",
@@ -0,0 +1,298 @@
+# -*- Mode:Python; indent-tabs-mode:nil; tab-width:4 -*-
+#
+# Copyright 2022 Canonical Ltd.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License version 3 as
+# published by the Free Software Foundation.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+# Generated by tools/generate_command_metadata.py, do not edit.
+
+"""Metadata of the snapcraft commands, known without importing them."""
+
+from typing import Any, Dict
+
+# The module and the command attributes of each command class.
+COMMAND_METADATA: Dict[str, Dict[str, Any]] = {
+    "BuildCommand": {
+        "module": "lifecycle",
+        "name": "build",
+        "help_msg": "Build artifacts defined for a part",
+        "hidden": False,
+        "common": False,
+    },
+    "CleanCommand": {
+        "module": "lifecycle",
+        "name": "clean",
+        "help_msg": "Remove a part's assets",
+        "hidden": False,
+        "common": False,
+    },
+    "ExpandExtensionsCommand": {
+        "module": "extensions",
+        "name": "expand-extensions",
+        "help_msg": "Expand extensions in snapcraft.yaml",
+        "hidden": False,
+        "common": False,
+    },
+    "ExtensionsCommand": {
+        "module": "extensions",
+        "name": "extensions",
+        "help_msg": "List available extensions",
+        "hidden": True,
+        "common": False,
+    },
+    "ListExtensionsCommand": {
+        "module": "extensions",
+        "name": "list-extensions",
+        "help_msg": "List available extensions",
+        "hidden": False,
+        "common": False,
+    },
+    "PackCommand": {
+        "module": "lifecycle",
+        "name": "pack",
+        "help_msg": "Create the snap package",
+        "hidden": False,
+        "common": False,
+    },
+    "PrimeCommand": {
+        "module": "lifecycle",
+        "name": "prime",
+        "help_msg": "Prime artifacts defined for a part",
+        "hidden": False,
+        "common": False,
+    },
+    "PullCommand": {
+        "module": "lifecycle",
+        "name": "pull",
+        "help_msg": "Download or retrieve artifacts defined for a part",
+        "hidden": False,
+        "common": False,
+    },
+    "SnapCommand": {
+        "module": "lifecycle",
+        "name": "snap",
+        "help_msg": "Create a snap",
+        "hidden": True,
+        "common": False,
+    },
+    "StageCommand": {
+        "module": "lifecycle",
+        "name": "stage",
+        "help_msg": "Stage built artifacts into a common staging area",
+        "hidden": False,
+        "common": False,
+    },
+    "StoreCloseCommand": {
+        "module": "manage",
+        "name": "close",
+        "help_msg": "Close <channel> for <name> on the store",
+        "hidden": False,
+        "common": False,
+    },
+    "StoreExportLoginCommand": {
+        "module": "account",
+        "name": "export-login",
+        "help_msg": "Login to the Snap Store exporting the credentials",
+        "hidden": False,
+        "common": False,
+    },
+    "StoreLegacyCreateKeyCommand": {
+        "module": "legacy",
+        "name": "create-key",
+        "help_msg": "Create a key to sign assertions.",
+        "hidden": False,
+        "common": False,
+    },
+    "StoreLegacyEditValidationSetsCommand": {
+        "module": "legacy",
+        "name": "edit-validation-sets",
+        "help_msg": "Edit the list of validations for <name>",
+        "hidden": False,
+        "common": False,
+    },
+    "StoreLegacyGatedCommand": {
+        "module": "legacy",
+        "name": "gated",
+        "help_msg": "List all gated snaps for <snap-name>",
+        "hidden": False,
+        "common": False,
+    },
+    "StoreLegacyListCommand": {
+        "module": "names",
+        "name": "list",
+        "help_msg": "List the names registered to the logged in account",
+        "hidden": True,
+        "common": False,
+    },
+    "StoreLegacyListKeysCommand": {
+        "module": "legacy",
+        "name": "list-keys",
+        "help_msg": "List the keys available to sign assertions",
+        "hidden": False,
+        "common": False,
+    },
+    "StoreLegacyListRegisteredCommand": {
+        "module": "names",
+        "name": "list-registered",
+        "help_msg": "List the names registered to the logged in account",
+        "hidden": True,
+        "common": False,
+    },
+    "StoreLegacyListRevisionsCommand": {
+        "module": "legacy",
+        "name": "list-revisions",
+        "help_msg": "List published revisions for <snap-name>",
+        "hidden": False,
+        "common": False,
+    },
+    "StoreLegacyListValidationSetsCommand": {
+        "module": "legacy",
+        "name": "list-validation-sets",
+        "help_msg": "Get the list of validation sets",
+        "hidden": False,
+        "common": False,
+    },
+    "StoreLegacyMetricsCommand": {
+        "module": "legacy",
+        "name": "metrics",
+        "help_msg": "Get metrics for a snap",
+        "hidden": False,
+        "common": False,
+    },
+    "StoreLegacyPromoteCommand": {
+        "module": "legacy",
+        "name": "promote",
+        "help_msg": "Promote a build set from a channel",
+        "hidden": False,
+        "common": False,
+    },
+    "StoreLegacyRegisterKeyCommand": {
+        "module": "legacy",
+        "name": "register-key",
+        "help_msg": "Register a key to sign assertions with the Snap Store.",
+        "hidden": False,
+        "common": False,
+    },
+    "StoreLegacyRemoteBuildCommand": {
+        "module": "legacy",
+        "name": "remote-build",
+        "help_msg": "Dispatch a snap for remote build",
+        "hidden": False,
+        "common": False,
+    },
+    "StoreLegacySetDefaultTrackCommand": {
+        "module": "legacy",
+        "name": "set-default-track",
+        "help_msg": "Set the default track for a snap",
+        "hidden": False,
+        "common": False,
+    },
+    "StoreLegacySignBuildCommand": {
+        "module": "legacy",
+        "name": "sign-build",
+        "help_msg": "Sign a built snap file and assert it using the developer's key",
+        "hidden": False,
+        "common": False,
+    },
+    "StoreLegacyUploadMetadataCommand": {
+        "module": "legacy",
+        "name": "upload-metadata",
+        "help_msg": "Upload metadata from <snap-file> to the store",
+        "hidden": False,
+        "common": False,
+    },
+    "StoreLegacyValidateCommand": {
+        "module": "legacy",
+        "name": "validate",
+        "help_msg": "Validate a gated snap",
+        "hidden": False,
+        "common": False,
+    },
+    "StoreListTracksCommand": {
+        "module": "status",
+        "name": "list-tracks",
+        "help_msg": "Show the available tracks for a snap on the Snap Store",
+        "hidden": False,
+        "common": False,
+    },
+    "StoreLoginCommand": {
+        "module": "account",
+        "name": "login",
+        "help_msg": "Login to the Snap Store",
+        "hidden": False,
+        "common": False,
+    },
+    "StoreLogoutCommand": {
+        "module": "account",
+        "name": "logout",
+        "help_msg": "Clear Snap Store credentials.",
+        "hidden": False,
+        "common": False,
+    },
+    "StoreNamesCommand": {
+        "module": "names",
+        "name": "names",
+        "help_msg": "List the names registered to the logged in account",
+        "hidden": False,
+        "common": False,
+    },
+    "StoreRegisterCommand": {
+        "module": "names",
+        "name": "register",
+        "help_msg": "Register <snap-name> with the store",
+        "hidden": False,
+        "common": False,
+    },
+    "StoreReleaseCommand": {
+        "module": "manage",
+        "name": "release",
+        "help_msg": "Release <snap-name> to the store",
+        "hidden": False,
+        "common": False,
+    },
+    "StoreStatusCommand": {
+        "module": "status",
+        "name": "status",
+        "help_msg": "Show the status of a snap on the Snap Store",
+        "hidden": False,
+        "common": False,
+    },
+    "StoreTracksCommand": {
+        "module": "status",
+        "name": "tracks",
+        "help_msg": "Show the available tracks for a snap on the Snap Store",
+        "hidden": True,
+        "common": False,
+    },
+    "StoreUploadCommand": {
+        "module": "upload",
+        "name": "upload",
+        "help_msg": "Upload <snap-file> to the store",
+        "hidden": False,
+        "common": False,
+    },
+    "StoreWhoAmICommand": {
+        "module": "account",
+        "name": "whoami",
+        "help_msg": "Get information about the current login",
+        "hidden": False,
+        "common": False,
+    },
+    "VersionCommand": {
+        "module": "version",
+        "name": "version",
+        "help_msg": "Show the application version and exit",
+        "hidden": False,
+        "common": True,
+    },
+}
@@ -38,7 +38,7 @@ class StoreUploadCommand(BaseCommand):
     """Command to upload a snap to the Snap Store."""
 
     name = "upload"
-    help_msg = "Login to the Snap Store"
+    help_msg = "Upload <snap-file> to the store"
     overview = textwrap.dedent(
         """
         By passing --release with a comma separated list of channels the snap would
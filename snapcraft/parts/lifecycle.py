@@ -20,7 +20,7 @@ import os
 import subprocess
 from dataclasses import dataclass
 from pathlib import Path
-from typing import TYPE_CHECKING, Any, Dict, List, Optional
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Tuple
 
 import craft_parts
 from craft_cli import EmitterMode, emit
@@ -31,7 +31,7 @@ from snapcraft.meta import snap_yaml
 from snapcraft.projects import GrammarAwareProject, Project
 from snapcraft.providers import capture_logs_from_instance
 
-from . import grammar, plugins, yaml_utils
+from . import grammar, plugins, project_cache, yaml_utils
 from .parts import PartsLifecycle
 from .project_check import run_project_checks
 from .setup_assets import setup_assets
@@ -132,11 +132,6 @@ def run(command_name: str, parsed_args: "argparse.Namespace") -> None:
     emit.trace(f"command: {command_name}, arguments: {parsed_args}")
 
     snap_project = get_snap_project()
-    yaml_data = process_yaml(snap_project.project_file)
-    parse_info = _extract_parse_info(yaml_data)
-
-    if parsed_args.provider:
-        raise errors.SnapcraftError("Option --provider is not supported.")
 
     # Register our own plugins and callbacks
     plugins.register()
@@ -144,9 +139,14 @@ def run(command_name: str, parsed_args: "argparse.Namespace") -> None:
     callbacks.register_pre_step(_set_step_environment)
 
     build_count = utils.get_parallel_build_count()
-    _expand_environment(yaml_data, parallel_build_count=build_count)
+    project, parse_info = _load_project(
+        snap_project.project_file,
+        parallel_build_count=build_count,
+        use_cache=_runs_lifecycle_locally(parsed_args),
+    )
 
-    project = Project.unmarshal(yaml_data)
+    if parsed_args.provider:
+        raise errors.SnapcraftError("Option --provider is not supported.")
 
     try:
         _run_command(
@@ -161,6 +161,67 @@ def run(command_name: str, parsed_args: "argparse.Namespace") -> None:
         raise errors.FilePermissionError(err.filename, reason=err.strerror)
 
 
+def _load_project(
+    project_file: Path, *, parallel_build_count: int, use_cache: bool
+) -> Tuple[Project, Dict[str, List[str]]]:
+    """Process and validate the project.
+
+    If use_cache is set, the project is reused from the work dir when it
+    was processed before from the same project file in the same
+    conditions, and saved there otherwise.
+
+    :return: The project and its parse info.
+    """
+    cache_file = None
+    cache_key = ""
+    if use_cache:
+        try:
+            project_yaml = project_file.read_bytes()
+        except OSError:
+            # Let process_yaml report the error.
+            pass
+        else:
+            work_dir = _get_work_dir()
+            cache_file = project_cache.get_cache_file(work_dir)
+            cache_key = project_cache.get_cache_key(
+                project_yaml,
+                arch=_get_arch(),
+                parallel_build_count=parallel_build_count,
+                work_dir=work_dir,
+            )
+            cached = project_cache.load(cache_file, key=cache_key)
+            if cached is not None:
+                return cached
+
+    yaml_data = process_yaml(project_file)
+    parse_info = _extract_parse_info(yaml_data)
+    _expand_environment(yaml_data, parallel_build_count=parallel_build_count)
+    project = Project.unmarshal(yaml_data)
+
+    if cache_file is not None:
+        project_cache.save(
+            cache_file, key=cache_key, project=project, parse_info=parse_info
+        )
+
+    return project, parse_info
+
+
+def _runs_lifecycle_locally(parsed_args: "argparse.Namespace") -> bool:
+    """Check if the lifecycle runs in this environment, not in a provider."""
+    return (
+        utils.is_managed_mode()
+        or parsed_args.destructive_mode
+        or os.getenv("SNAPCRAFT_BUILD_ENVIRONMENT") == "host"
+    )
+
+
+def _get_work_dir() -> Path:
+    if utils.is_managed_mode():
+        return utils.get_managed_environment_home_path()
+
+    return Path.cwd()
+
+
 def _run_command(
     command_name: str,
     *,
@@ -212,6 +273,7 @@ def _run_command(
         base=project.get_effective_base(),
         package_repositories=project.package_repositories,
         parallel_build_count=parallel_build_count,
+        parallel_parts_count=utils.get_parallel_parts_count(),
         part_names=part_names,
         adopt_info=project.adopt_info,
         project_name=project.name,
@@ -396,10 +458,7 @@ def _expand_environment(
     :param snapcraft_yaml: A dictionary containing the contents of the
         snapcraft.yaml project file.
     """
-    if utils.is_managed_mode():
-        work_dir = utils.get_managed_environment_home_path()
-    else:
-        work_dir = Path.cwd()
+    work_dir = _get_work_dir()
 
     project_vars = {
         "version": snapcraft_yaml.get("version", ""),
@@ -16,17 +16,23 @@
 
 """Craft-parts lifecycle wrapper."""
 
+import contextlib
+import functools
+import os
 import pathlib
 import subprocess
-from typing import Any, Dict, List, Optional
+import threading
+from typing import Any, Dict, Iterator, List, Optional, Set
 
 import craft_parts
 from craft_cli import emit
 from craft_parts import ActionType, Part, ProjectDirs, Step
+from craft_parts.executor import ExecutionContext
 from xdg import BaseDirectory  # type: ignore
 
 from snapcraft import errors, repo
 from snapcraft.meta import ExtractedMetadata, extract_metadata
+from snapcraft_legacy.internal.common import run_concurrently
 
 _LIFECYCLE_STEPS = {
     "pull": Step.PULL,
@@ -36,6 +42,9 @@ _LIFECYCLE_STEPS = {
     "prime": Step.PRIME,
 }
 
+# Steps that can run for unrelated parts at the same time.
+_CONCURRENT_STEPS = (Step.PULL, Step.BUILD)
+
 
 class PartsLifecycle:
     """Create and manage the parts lifecycle.
@@ -45,6 +54,8 @@ class PartsLifecycle:
     :param assets_dir: The directory containing project assets.
     :param adopt_info: The name of the part containing metadata do adopt.
     :param extra_build_snaps: A list of additional build snaps to install.
+    :param parallel_parts_count: The maximum number of parts to pull or
+        build concurrently.
 
     :raises PartsLifecycleError: On error initializing the parts lifecycle.
     """
@@ -64,8 +75,17 @@ class PartsLifecycle:
         project_name: str,
         project_vars: Dict[str, str],
         extra_build_snaps: Optional[List[str]] = None,
+        parallel_parts_count: int = 1,
     ):
         self._work_dir = work_dir
+        self._parallel_parts_count = parallel_parts_count
+        self._dependencies = _get_part_dependencies(all_parts)
+        self._packages_parts = {
+            name
+            for name, data in all_parts.items()
+            if data.get("stage-packages") or data.get("stage-snaps")
+        }
+        self._packages_lock = threading.Lock()
         self._assets_dir = assets_dir
         self._package_repositories = package_repositories
         self._part_names = part_names
@@ -160,12 +180,11 @@ class PartsLifecycle:
             emit.progress("Executing parts lifecycle...")
 
             with self._lcm.action_executor() as aex:
-                for action in actions:
-                    message = _action_message(action)
-                    emit.progress(f"Executing parts lifecycle: {message}")
-                    with emit.open_stream("Executing action") as stream:
-                        aex.execute(action, stdout=stream, stderr=stream)
-                    emit.message(f"Executed: {message}", intermediate=True)
+                for wave in self._get_action_waves(actions):
+                    if len(wave) == 1:
+                        self._execute_action(aex, wave[0])
+                    else:
+                        self._execute_wave(aex, wave)
 
             if shell_after:
                 _launch_shell()
@@ -185,6 +204,93 @@ class PartsLifecycle:
                 _launch_shell()
             raise errors.PartsLifecycleError(str(err)) from err
 
+    def _get_action_waves(
+        self, actions: List[craft_parts.Action]
+    ) -> List[List[craft_parts.Action]]:
+        """Group consecutive actions that can be executed concurrently.
+
+        Pulls and builds of different parts join the same wave, unless a
+        build involves a part that depends on another part in the wave. Any
+        other action is executed on its own, in planned order.
+        """
+        if self._parallel_parts_count == 1:
+            return [[action] for action in actions]
+
+        waves: List[List[craft_parts.Action]] = []
+        for action in actions:
+            if waves and self._can_join_wave(action, waves[-1]):
+                waves[-1].append(action)
+            else:
+                waves.append([action])
+
+        return waves
+
+    def _can_join_wave(
+        self, action: craft_parts.Action, wave: List[craft_parts.Action]
+    ) -> bool:
+        if action.step not in _CONCURRENT_STEPS:
+            return False
+
+        for other in wave:
+            if other.step not in _CONCURRENT_STEPS:
+                return False
+
+            if other.part_name == action.part_name:
+                return False
+
+            # Only builds need the parts they depend on to be staged.
+            if action.step == other.step == Step.PULL:
+                continue
+
+            if (
+                other.part_name in self._dependencies[action.part_name]
+                or action.part_name in self._dependencies[other.part_name]
+            ):
+                return False
+
+        return True
+
+    def _execute_action(
+        self, aex: ExecutionContext, action: craft_parts.Action
+    ) -> None:
+        message = _action_message(action)
+        emit.progress(f"Executing parts lifecycle: {message}")
+        with emit.open_stream("Executing action") as stream:
+            aex.execute(action, stdout=stream, stderr=stream)
+        emit.message(f"Executed: {message}", intermediate=True)
+
+    def _execute_wave(
+        self, aex: ExecutionContext, wave: List[craft_parts.Action]
+    ) -> None:
+        messages = [_action_message(action) for action in wave]
+        emit.progress(f"Executing parts lifecycle: {', '.join(messages)}")
+
+        with emit.open_stream("Executing actions") as stream:
+            for _ in run_concurrently(
+                functools.partial(self._execute_part_action, aex, stream=stream),
+                wave,
+                max_workers=self._parallel_parts_count,
+            ):
+                pass
+
+        for message in messages:
+            emit.message(f"Executed: {message}", intermediate=True)
+
+    def _execute_part_action(
+        self,
+        aex: ExecutionContext,
+        action: craft_parts.Action,
+        stream: int,
+    ) -> None:
+        # Fetching stage packages and snaps goes through shared caches.
+        if action.step == Step.PULL and action.part_name in self._packages_parts:
+            lock: Any = self._packages_lock
+        else:
+            lock = contextlib.nullcontext()
+
+        with lock, _prefixed_stream(stream, f"{action.part_name}: ") as part_stream:
+            aex.execute(action, stdout=part_stream, stderr=part_stream)
+
     def _install_package_repositories(self):
         emit.progress("Installing package repositories...")
         if self._package_repositories:
@@ -250,6 +356,48 @@ def _launch_shell(*, cwd: Optional[pathlib.Path] = None) -> None:
         subprocess.run(["bash"], check=False, cwd=cwd)
 
 
+def _get_part_dependencies(all_parts: Dict[str, Any]) -> Dict[str, Set[str]]:
+    """Return the names of the parts each part depends on, recursively."""
+    dependencies: Dict[str, Set[str]] = {}
+
+    def _visit(name: str) -> Set[str]:
+        if name not in dependencies:
+            dependencies[name] = set()
+            for after in all_parts.get(name, {}).get("after", []):
+                dependencies[name] |= {after} | _visit(after)
+        return dependencies[name]
+
+    for name in all_parts:
+        _visit(name)
+
+    return dependencies
+
+
+@contextlib.contextmanager
+def _prefixed_stream(stream: int, prefix: str) -> Iterator[int]:
+    """Yield a file descriptor whose lines are written to stream with a prefix.
+
+    Each line is written with a single call so lines from concurrent
+    actions sharing the stream do not mix.
+    """
+    read_fd, write_fd = os.pipe()
+
+    def _copy_lines():
+        with os.fdopen(read_fd, "rb") as reader:
+            for line in reader:
+                if not line.endswith(b"\n"):
+                    line += b"\n"
+                os.write(stream, prefix.encode() + line)
+
+    thread = threading.Thread(target=_copy_lines)
+    thread.start()
+    try:
+        yield write_fd
+    finally:
+        os.close(write_fd)
+        thread.join()
+
+
 def _action_message(action: craft_parts.Action) -> str:
     msg = {
         Step.PULL: {
@@ -0,0 +1,158 @@
+# -*- Mode:Python; indent-tabs-mode:nil; tab-width:4 -*-
+#
+# Copyright 2022 Canonical Ltd.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License version 3 as
+# published by the Free Software Foundation.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""Cache of processed and validated projects."""
+
+import hashlib
+import inspect
+import json
+import os
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from craft_cli import emit
+
+import snapcraft
+from snapcraft import extensions
+from snapcraft.projects import Project
+
+_CACHE_FILE_NAME = ".snapcraft-project-cache"
+
+# Environment variables the processing of the project depends on.
+_ENVIRONMENT_INPUTS = ["SNAPCRAFT_ENABLE_EXPERIMENTAL_EXTENSIONS"]
+
+
+def get_cache_file(work_dir: Path) -> Path:
+    """Return the path to the project cache for the given work dir.
+
+    The cache is kept with the parts so that it goes away when all the
+    parts are cleaned.
+    """
+    return work_dir / "parts" / _CACHE_FILE_NAME
+
+
+def get_cache_key(
+    project_yaml: bytes, *, arch: str, parallel_build_count: int, work_dir: Path
+) -> str:
+    """Compute the key of a processed project.
+
+    Besides the project file itself, the key covers everything the
+    processing depends on: the architecture used to process grammar and
+    extensions, the values expanded into the environment, the environment
+    variables read while processing, the version of snapcraft and the
+    source of the available extensions.
+
+    :param project_yaml: The contents of the project file.
+    :param arch: The architecture the project is processed for.
+    :param parallel_build_count: The build count expanded in the project.
+    :param work_dir: The work dir expanded in the project.
+
+    :return: The key as a hex digest.
+    """
+    key = hashlib.sha256()
+    key.update(project_yaml)
+    for value in (
+        arch,
+        str(parallel_build_count),
+        str(work_dir),
+        snapcraft.__version__,
+    ):
+        key.update(b"\0" + value.encode())
+
+    for name in _ENVIRONMENT_INPUTS:
+        value = os.environ.get(name)
+        key.update(b"\0" + name.encode())
+        # Unset is told apart from set to an empty value.
+        key.update(b"\0" if value is None else b"=" + value.encode())
+
+    for extension_name in sorted(extensions.get_extension_names()):
+        extension_class = extensions.get_extension_class(extension_name)
+        key.update(b"\0" + extension_name.encode())
+        key.update(_get_source(extension_class))
+
+    return key.hexdigest()
+
+
+def _get_source(extension_class: type) -> bytes:
+    """Return the source of the module defining extension_class."""
+    try:
+        return inspect.getsource(inspect.getmodule(extension_class)).encode()
+    except (OSError, TypeError):
+        # Without its source, the extension is only known by name.
+        return extension_class.__qualname__.encode()
+
+
+def load(
+    cache_file: Path, *, key: str
+) -> Optional[Tuple[Project, Dict[str, List[str]]]]:
+    """Load a processed project from the cache.
+
+    :param cache_file: The cache to load the project from.
+    :param key: The key of the project to load.
+
+    :return: The project and its parse info, or None if the cache does not
+        hold the project for key.
+    """
+    try:
+        with cache_file.open(encoding="utf-8") as cache:
+            cached = json.load(cache)
+        if not isinstance(cached, dict) or cached.get("key") != key:
+            return None
+        project = Project.unmarshal(cached["project"])
+        parse_info = cached["parse_info"]
+    except FileNotFoundError:
+        return None
+    # An unreadable cache is just a cache miss, it is replaced on save.
+    except Exception as err:  # pylint: disable=broad-except
+        emit.trace(f"cannot load project cache {str(cache_file)!r}: {err}")
+        return None
+
+    emit.trace(f"using processed project from {str(cache_file)!r}")
+    return project, parse_info
+
+
+def save(
+    cache_file: Path,
+    *,
+    key: str,
+    project: Project,
+    parse_info: Dict[str, List[str]],
+) -> None:
+    """Save a processed project to the cache.
+
+    :param cache_file: The cache to save the project to.
+    :param key: The key of the project.
+    :param project: The processed and validated project.
+    :param parse_info: The parse info extracted from the project.
+    """
+    cached = {"key": key, "project": project.marshal(), "parse_info": parse_info}
+    try:
+        data = json.dumps(cached)
+    # Projects holding values JSON cannot represent, such as YAML dates in
+    # passthrough, are just not cached.
+    except (TypeError, ValueError) as err:
+        emit.trace(f"cannot save project cache {str(cache_file)!r}: {err}")
+        return
+
+    temp_file = cache_file.with_name(f"{cache_file.name}.{os.getpid()}")
+    try:
+        cache_file.parent.mkdir(parents=True, exist_ok=True)
+        temp_file.write_text(data, encoding="utf-8")
+        temp_file.replace(cache_file)
+    except OSError as err:
+        emit.trace(f"cannot save project cache {str(cache_file)!r}: {err}")
+    finally:
+        temp_file.unlink(missing_ok=True)
@@ -23,19 +23,29 @@ import yaml.error
 
 from snapcraft import errors, utils
 
+try:
+    # The libyaml based loader is much faster, use it where available.
+    from yaml import CSafeLoader as _BaseSafeLoader
+except ImportError:
+    from yaml import SafeLoader as _BaseSafeLoader  # type: ignore
 
-def _check_duplicate_keys(node):
+
+def _check_duplicate_keys(loader, node):
     mappings = set()
 
     for key_node, _ in node.value:
         try:
             if key_node.value in mappings:
-                raise yaml.constructor.ConstructorError(
-                    "while constructing a mapping",
-                    node.start_mark,
-                    f"found duplicate key {key_node.value!r}",
-                    node.start_mark,
+                # Raised once the document is loaded, after the base check.
+                loader.duplicate_key_errors.append(
+                    yaml.constructor.ConstructorError(
+                        "while constructing a mapping",
+                        node.start_mark,
+                        f"found duplicate key {key_node.value!r}",
+                        node.start_mark,
+                    )
                 )
+                return
             mappings.add(key_node.value)
         except TypeError:
             # Ignore errors for malformed inputs that will be caught later.
@@ -43,27 +53,18 @@ def _check_duplicate_keys(node):
 
 
 def _dict_constructor(loader, node):
-    _check_duplicate_keys(node)
-
-    # Necessary in order to make yaml merge tags work
-    loader.flatten_mapping(node)
-    value = loader.construct_pairs(node)
+    _check_duplicate_keys(loader, node)
 
-    try:
-        return dict(value)
-    except TypeError as type_error:
-        raise yaml.constructor.ConstructorError(
-            "while constructing a mapping",
-            node.start_mark,
-            "found unhashable key",
-            node.start_mark,
-        ) from type_error
+    # SafeConstructor.construct_mapping flattens yaml merge tags and
+    # reports unhashable keys.
+    return loader.construct_mapping(node)
 
 
-class _SafeLoader(yaml.SafeLoader):  # pylint: disable=too-many-ancestors
+class _SafeLoader(_BaseSafeLoader):  # pylint: disable=too-many-ancestors
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
 
+        self.duplicate_key_errors = []
         self.add_constructor(
             yaml.resolver.BaseResolver.DEFAULT_MAPPING_TAG, _dict_constructor
         )
@@ -77,25 +78,28 @@ def load(filestream: TextIO) -> Dict[str, Any]:
     :raises SnapcraftError: if loading didn't succeed.
     :raises LegacyFallback: if the project's base is not core22.
     """
+    loader = _SafeLoader(filestream)
     try:
-        data = yaml.safe_load(filestream)
-        build_base = utils.get_effective_base(
-            base=data.get("base"),
-            build_base=data.get("build_base"),
-            project_type=data.get("type"),
-            name=data.get("name"),
-        )
-
-        if build_base is None:
-            raise errors.LegacyFallback("no base defined")
-        if build_base != "core22":
-            raise errors.LegacyFallback("base is not core22")
+        data = loader.get_single_data()
     except yaml.error.YAMLError as err:
         raise errors.SnapcraftError(f"snapcraft.yaml parsing error: {err!s}") from err
-
-    filestream.seek(0)
-
-    try:
-        return yaml.load(filestream, Loader=_SafeLoader)
-    except yaml.error.YAMLError as err:
+    finally:
+        loader.dispose()
+
+    build_base = utils.get_effective_base(
+        base=data.get("base"),
+        build_base=data.get("build_base"),
+        project_type=data.get("type"),
+        name=data.get("name"),
+    )
+
+    if build_base is None:
+        raise errors.LegacyFallback("no base defined")
+    if build_base != "core22":
+        raise errors.LegacyFallback("base is not core22")
+
+    if loader.duplicate_key_errors:
+        err = loader.duplicate_key_errors[0]
         raise errors.SnapcraftError(f"snapcraft.yaml parsing error: {err!s}") from err
+
+    return data
@@ -411,6 +411,16 @@ class Project(ProjectModel):
 
         return project
 
+    def marshal(self) -> Dict[str, Any]:
+        """Marshal this project into a dictionary.
+
+        Only the fields that were set are included, the result can be
+        passed to ``unmarshal`` to recreate the project.
+
+        :return: The project data.
+        """
+        return self.dict(by_alias=True, exclude_unset=True)
+
     def _get_content_plugs(self) -> List[ContentPlug]:
         """Get list of content plugs."""
         if self.plugs is not None:
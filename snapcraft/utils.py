@@ -204,6 +204,35 @@ def get_parallel_build_count() -> int:
     return build_count
 
 
+def get_parallel_parts_count() -> int:
+    """Obtain the number of parts whose pull and build may run concurrently.
+
+    Parts are processed one at a time unless the environment variable
+    ``SNAPCRAFT_PARALLEL_PARTS`` is set.
+
+    :return: The number of parts to process concurrently.
+
+    :raises SnapcraftError: If ``SNAPCRAFT_PARALLEL_PARTS`` is not a
+        positive integer.
+    """
+    value = os.environ.get("SNAPCRAFT_PARALLEL_PARTS")
+    if value is None:
+        return 1
+
+    try:
+        parts_count = int(value)
+    except ValueError:
+        parts_count = 0
+
+    if parts_count < 1:
+        raise errors.SnapcraftError(
+            f"Invalid value {value!r} for SNAPCRAFT_PARALLEL_PARTS.",
+            resolution="Set SNAPCRAFT_PARALLEL_PARTS to a positive integer or unset it.",
+        )
+
+    return parts_count
+
+
 def confirm_with_user(prompt_text, default=False) -> bool:
     """Query user for yes/no answer.
 
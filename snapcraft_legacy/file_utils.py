@@ -17,6 +17,7 @@
 import errno
 import hashlib
 import logging
+import mmap
 import os
 import pathlib
 import re
@@ -29,9 +30,14 @@ from typing import Callable, Generator, List, Optional, Pattern, Set
 
 from snapcraft_legacy.internal import common, errors
 
+if sys.platform != "win32":
+    import fcntl
 
 logger = logging.getLogger(__name__)
 
+# The FICLONE ioctl from linux/fs.h, sharing the data of a file with another.
+_FICLONE = 0x40049409
+
 
 def replace_in_file(
     directory: str, file_pattern: Pattern, search_pattern: Pattern, replacement: str
@@ -171,6 +177,44 @@ def copy(source: str, destination: str, *, follow_symlinks: bool = False) -> Non
         )
 
 
+def reflink_or_copy(
+    source: str, destination: str, *, follow_symlinks: bool = True
+) -> None:
+    """Copy source to destination, sharing data blocks if possible.
+
+    On file systems supporting reflinks (e.g. btrfs or xfs) the copy is
+    immediate and later changes to either file do not affect the other.
+    Otherwise, or across file systems, the data is copied. File metadata
+    is copied as with shutil.copy2.
+
+    :param str source: The file to copy.
+    :param str destination: Where to put the copy.
+    :param bool follow_symlinks: Whether or not symlinks should be followed.
+        If not, a symlink source is copied as a symlink and an existing
+        destination is replaced rather than written through.
+    """
+    if not follow_symlinks:
+        if os.path.islink(source):
+            copy(source, destination)
+            return
+        with suppress(OSError):
+            os.unlink(destination)
+
+    if sys.platform != "win32":
+        try:
+            with open(source, "rb") as source_file, open(
+                destination, "wb"
+            ) as destination_file:
+                fcntl.ioctl(destination_file.fileno(), _FICLONE, source_file.fileno())
+        except OSError:
+            pass
+        else:
+            shutil.copystat(source, destination)
+            return
+
+    shutil.copy2(source, destination)
+
+
 def link_or_copy_tree(
     source_tree: str,
     destination_tree: str,
@@ -304,6 +348,11 @@ def requires_path_exists(path: str, error_fmt: str = None) -> Generator:
     yield
 
 
+# Hashing a mapped file in blocks this size lets hashlib release the GIL
+# for long stretches without mapping in the whole file at once.
+_HASH_BLOCK_SIZE = 2**24
+
+
 def _file_reader_iter(path: str, block_size=2**20):
     with open(path, "rb") as f:
         block = f.read(block_size)
@@ -313,15 +362,31 @@ def _file_reader_iter(path: str, block_size=2**20):
 
 
 def calculate_sha3_384(path: str) -> str:
-    """Calculate sha3 384 hash, reading the file in 1MB chunks."""
+    """Calculate sha3 384 hash for path."""
     return calculate_hash(path, algorithm="sha3_384")
 
 
 def calculate_hash(path: str, *, algorithm: str) -> str:
-    """Calculate the hash for path with algorithm."""
+    """Calculate the hash for path with algorithm.
+
+    Regular files are mapped into memory and hashed in large blocks
+    straight from the page cache, anything else is read in 1MB chunks.
+    """
     # This will raise an AttributeError if algorithm is unsupported
     hasher = getattr(hashlib, algorithm)()
 
+    with open(path, "rb") as f:
+        try:
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except (OSError, ValueError):
+            # Empty files and pipes cannot be mapped.
+            mapped = None
+        if mapped is not None:
+            with mapped, memoryview(mapped) as view:
+                for offset in range(0, len(view), _HASH_BLOCK_SIZE):
+                    hasher.update(view[offset : offset + _HASH_BLOCK_SIZE])
+            return hasher.hexdigest()
+
     for block in _file_reader_iter(path):
         hasher.update(block)
     return hasher.hexdigest()
@@ -16,5 +16,8 @@
 
 from ._apt import AptStagePackageCache  # noqa
 from ._cache import SnapcraftCache  # noqa
+from ._deb import DebTreeCache  # noqa
+from ._elf import ElfCache  # noqa
 from ._file import FileCache  # noqa
+from ._git import GitMirrorCache  # noqa
 from ._snap import SnapCache  # noqa
@@ -0,0 +1,158 @@
+# -*- Mode:Python; indent-tabs-mode:nil; tab-width:4 -*-
+#
+# Copyright (C) 2022 Canonical Ltd
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License version 3 as
+# published by the Free Software Foundation.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import contextlib
+import logging
+import os
+import shutil
+import tempfile
+import time
+from typing import List, Optional, Tuple
+
+from ._cache import SnapcraftStagePackageCache
+
+logger = logging.getLogger(__name__)
+
+# The default upper bound for the size of all cached trees.
+DEFAULT_MAX_SIZE = 4 * 2**30
+
+# Seconds after which a tree still being populated is taken as abandoned
+# by an interrupted build.
+_ABANDONED_TREE_AGE = 60 * 60
+
+
+class DebTreeCache(SnapcraftStagePackageCache):
+    """Content addressed cache of extracted deb trees.
+
+    Each entry is a directory holding the extracted tree of a deb and its
+    size, keyed on a digest of the deb. Files are copied or reflinked out
+    of the cache, never hard-linked, so changes made to them afterwards do
+    not reach the cache. The least recently used entries are evicted when
+    the cache grows past its maximum size.
+    """
+
+    def __init__(self, *, max_size: int = DEFAULT_MAX_SIZE) -> None:
+        """Create a new DebTreeCache.
+
+        :param int max_size: the size in bytes of all the cached trees
+                             above which entries are evicted by prune.
+        """
+        super().__init__()
+        self.trees_dir = os.path.join(self.stage_package_cache_root, "trees")
+        self.max_size = max_size
+        os.makedirs(self.trees_dir, exist_ok=True)
+
+    def get(self, *, key: str) -> Optional[str]:
+        """Return the path to the tree cached for key, marking it as used.
+
+        :param str key: the key the tree was added with.
+        :returns: the path to the tree or None if not cached.
+        """
+        entry_dir = os.path.join(self.trees_dir, key)
+        try:
+            os.utime(entry_dir)
+        except FileNotFoundError:
+            return None
+
+        logger.debug(f"Cache hit for deb tree {key!r}")
+        return os.path.join(entry_dir, "tree")
+
+    def make_tree_dir(self) -> str:
+        """Return a new empty directory to populate and add to the cache.
+
+        The directory is on the same file system as the cache so it can be
+        moved in place by add.
+        """
+        entry_dir = tempfile.mkdtemp(prefix=".", dir=self.trees_dir)
+        tree_dir = os.path.join(entry_dir, "tree")
+        os.mkdir(tree_dir)
+        return tree_dir
+
+    def add(self, *, key: str, tree_dir: str) -> str:
+        """Move tree_dir, created by make_tree_dir, into the cache for key.
+
+        :param str key: the key to cache the tree for.
+        :param str tree_dir: the populated directory.
+        :returns: the path to the cached tree.
+        """
+        entry_dir = os.path.dirname(tree_dir)
+        with open(os.path.join(entry_dir, "size"), "w") as size_file:
+            size_file.write(str(_get_tree_size(tree_dir)))
+
+        cached_entry_dir = os.path.join(self.trees_dir, key)
+        try:
+            os.rename(entry_dir, cached_entry_dir)
+        except OSError:
+            # Added concurrently by someone else, use theirs.
+            if not os.path.isdir(cached_entry_dir):
+                raise
+            shutil.rmtree(entry_dir)
+
+        return os.path.join(cached_entry_dir, "tree")
+
+    def discard(self, *, tree_dir: str) -> None:
+        """Remove tree_dir, created by make_tree_dir, without caching it."""
+        shutil.rmtree(os.path.dirname(tree_dir), ignore_errors=True)
+
+    def prune(self) -> None:
+        """Evict the least recently used trees until under max_size.
+
+        Trees left behind half populated by interrupted builds are removed
+        once they have not changed for a while.
+        """
+        entries: List[Tuple[int, int, str]] = []
+        total_size = 0
+        with os.scandir(self.trees_dir) as scanner:
+            for entry in scanner:
+                # Entries being populated start with a dot.
+                if entry.name.startswith("."):
+                    if _is_abandoned(entry.path):
+                        logger.debug(f"Removing abandoned deb tree {entry.path!r}")
+                        shutil.rmtree(entry.path, ignore_errors=True)
+                    continue
+                try:
+                    with open(os.path.join(entry.path, "size")) as size_file:
+                        size = int(size_file.read())
+                    used = entry.stat().st_mtime_ns
+                except (OSError, ValueError):
+                    size, used = 0, 0
+                entries.append((used, size, entry.path))
+                total_size += size
+
+        for _, size, entry_dir in sorted(entries):
+            if total_size <= self.max_size:
+                break
+            logger.debug(f"Evicting deb tree {entry_dir!r}")
+            shutil.rmtree(entry_dir, ignore_errors=True)
+            total_size -= size
+
+
+def _is_abandoned(entry_dir: str) -> bool:
+    # Populating the tree changes its modification time, not the entry's.
+    modified = 0.0
+    for path in (entry_dir, os.path.join(entry_dir, "tree")):
+        with contextlib.suppress(OSError):
+            modified = max(modified, os.stat(path).st_mtime)
+    # Entries gone in the meantime were added or discarded.
+    return bool(modified) and time.time() - modified > _ABANDONED_TREE_AGE
+
+
+def _get_tree_size(tree_dir: str) -> int:
+    size = 0
+    for root, directories, files in os.walk(tree_dir):
+        for file_name in files:
+            size += os.lstat(os.path.join(root, file_name)).st_size
+    return size
@@ -0,0 +1,182 @@
+# -*- Mode:Python; indent-tabs-mode:nil; tab-width:4 -*-
+#
+# Copyright (C) 2022 Canonical Ltd
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License version 3 as
+# published by the Free Software Foundation.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import json
+import logging
+import os
+import sqlite3
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Bump whenever the layout of the stored attributes changes.
+_SCHEMA_VERSION = 2
+
+
+class ElfCacheEntry(NamedTuple):
+    """Cached data for a file.
+
+    attributes is None for regular files that are not ELF files.
+    """
+
+    attributes: Optional[Dict[str, Any]]
+    ld_library_paths: Optional[List[str]]
+    libraries: Optional[Dict[str, str]]
+
+
+class ElfCache:
+    """Persistent cache of ELF attributes and library dependencies.
+
+    Entries are keyed on the path of the file and are only returned while
+    the inode, size and modification time of the file remain unchanged.
+    """
+
+    def __init__(self, *, path: str) -> None:
+        """Open (or create) the cache stored in path.
+
+        :param str path: the path to the database file.
+        """
+        self.path = path
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+
+        self._connection = sqlite3.connect(path)
+        version = self._connection.execute("PRAGMA user_version").fetchone()[0]
+        if version != _SCHEMA_VERSION:
+            logger.debug(f"Resetting ELF cache {path!r} with version {version}")
+            self._connection.execute("DROP TABLE IF EXISTS elf_files")
+            self._connection.execute(f"PRAGMA user_version = {_SCHEMA_VERSION}")
+        self._connection.execute(
+            "CREATE TABLE IF NOT EXISTS elf_files ("
+            "path TEXT PRIMARY KEY, inode INTEGER, size INTEGER, "
+            "mtime_ns INTEGER, attributes TEXT, ld_library_paths TEXT, "
+            "libraries TEXT)"
+        )
+
+    def __enter__(self) -> "ElfCache":
+        return self
+
+    def __exit__(self, exc_type, exc_value, exc_traceback) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """Write pending changes and close the cache."""
+        self._connection.commit()
+        self._connection.close()
+
+    def get(self, path: str) -> Optional[ElfCacheEntry]:
+        """Return the cached entry for path if the file has not changed.
+
+        :param str path: path to the file.
+        :returns: the ElfCacheEntry or None if there is no valid entry.
+        """
+        try:
+            key = _get_key(path)
+        except OSError:
+            return None
+
+        row = self._connection.execute(
+            "SELECT attributes, ld_library_paths, libraries FROM elf_files "
+            "WHERE path = ? AND inode = ? AND size = ? AND mtime_ns = ?",
+            (path, *key),
+        ).fetchone()
+        if row is None:
+            return None
+
+        return ElfCacheEntry(*(_load(column) for column in row))
+
+    def get_libraries(
+        self, path: str, *, ld_library_paths: List[str]
+    ) -> Optional[Dict[str, str]]:
+        """Return the cached libraries resolved for path with ld_library_paths.
+
+        Entries referring to libraries that no longer exist are ignored.
+
+        :param str path: path to the ELF file.
+        :param list ld_library_paths: the library paths used for resolution.
+        :returns: a mapping of soname to path or None if not cached.
+        """
+        entry = self.get(path)
+        if (
+            entry is None
+            or entry.libraries is None
+            or entry.ld_library_paths != ld_library_paths
+        ):
+            return None
+
+        if any(
+            p.startswith("/") and not os.path.exists(p)
+            for p in entry.libraries.values()
+        ):
+            return None
+
+        return entry.libraries
+
+    def set_attributes(
+        self, path: str, *, attributes: Optional[Dict[str, Any]]
+    ) -> None:
+        """Cache the attributes for path, invalidating cached libraries.
+
+        :param str path: path to the file.
+        :param dict attributes: the marshalled ELF attributes, or None if
+                                path is not an ELF file.
+        """
+        try:
+            key = _get_key(path)
+        except OSError:
+            return
+
+        self._connection.execute(
+            "INSERT OR REPLACE INTO elf_files VALUES (?, ?, ?, ?, ?, NULL, NULL)",
+            (path, *key, _dump(attributes)),
+        )
+
+    def set_libraries(
+        self, path: str, *, ld_library_paths: List[str], libraries: Dict[str, str]
+    ) -> None:
+        """Cache the libraries resolved for path with ld_library_paths.
+
+        :param str path: path to the ELF file, its attributes must have
+                         been cached already.
+        :param list ld_library_paths: the library paths used for resolution.
+        :param dict libraries: a mapping of soname to path.
+        """
+        try:
+            key = _get_key(path)
+        except OSError:
+            return
+
+        self._connection.execute(
+            "UPDATE elf_files SET ld_library_paths = ?, libraries = ? "
+            "WHERE path = ? AND inode = ? AND size = ? AND mtime_ns = ?",
+            (_dump(ld_library_paths), _dump(libraries), path, *key),
+        )
+
+
+def _get_key(path: str) -> Tuple[int, int, int]:
+    stat_result = os.stat(path)
+    return stat_result.st_ino, stat_result.st_size, stat_result.st_mtime_ns
+
+
+def _dump(value: Any) -> Optional[str]:
+    if value is None:
+        return None
+    return json.dumps(value)
+
+
+def _load(value: Optional[str]) -> Any:
+    if value is None:
+        return None
+    return json.loads(value)
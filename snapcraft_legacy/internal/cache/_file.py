@@ -15,9 +15,9 @@
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 import logging
 import os
-import shutil
 from typing import Optional
 
+from snapcraft_legacy import file_utils
 from snapcraft_legacy.file_utils import calculate_hash
 
 from ._cache import SnapcraftCache
@@ -37,31 +37,34 @@ class FileCache(SnapcraftCache):
         super().__init__()
         self.file_cache = os.path.join(self.cache_root, namespace)
 
-    def cache(self, *, filename: str, algorithm: str, hash: str) -> Optional[str]:
+    def cache(
+        self, *, filename: str, algorithm: str, hash: str, verify: bool = True
+    ) -> Optional[str]:
         """Cache a file revision with hash in XDG cache, unless it already exists.
         :param str filename: path to the file to cache.
         :param str algorithm: algorithm used to calculate the hash as
                               understood by hashlib.
         :param str hash: hash for filename calculated with algorithm.
+        :param bool verify: whether to check hash against filename, callers
+                            which already did can skip reading it again.
         :returns: path to cached file.
         """
         # First we verify
-        calculated_hash = calculate_hash(filename, algorithm=algorithm)
-        if calculated_hash != hash:
+        if verify and calculate_hash(filename, algorithm=algorithm) != hash:
             logger.warning(
                 "Skipping caching of {!r} as the expected "
                 "hash does not match the one "
                 "provided".format(filename)
             )
             return None
-        cached_file_path = os.path.join(self.file_cache, algorithm, hash)
+        cached_file_path = self.get_file_path(algorithm=algorithm, hash=hash)
         os.makedirs(os.path.dirname(cached_file_path), exist_ok=True)
         try:
             if not os.path.isfile(cached_file_path):
                 # this must not be hard-linked, as rebuilding a snap
                 # with changes should invalidate the cache, hence avoids
                 # using fileutils.link_or_copy.
-                shutil.copyfile(filename, cached_file_path)
+                file_utils.reflink_or_copy(filename, cached_file_path)
         except OSError:
             logger.warning("Unable to cache file {}.".format(cached_file_path))
             return None
@@ -75,9 +78,22 @@ class FileCache(SnapcraftCache):
         :param str hash: hash for filename calculated with algorithm.
         :returns: path to cached file.
         """
-        cached_file_path = os.path.join(self.file_cache, algorithm, hash)
+        cached_file_path = self.get_file_path(algorithm=algorithm, hash=hash)
         if os.path.exists(cached_file_path):
             logger.debug("Cache hit for hash {!r}".format(hash))
             return cached_file_path
         else:
             return None
+
+    def get_file_path(self, *, algorithm: str, hash: str) -> str:
+        """Get the filepath where the file with hash is cached.
+
+        Files may be written straight to this path, as long as they are
+        verified against hash and then moved into place atomically.
+
+        :param str algorithm: algorithm used to calculate the hash as
+                              understood by hashlib.
+        :param str hash: hash for filename calculated with algorithm.
+        :returns: path to the cached file, which may not exist.
+        """
+        return os.path.join(self.file_cache, algorithm, hash)
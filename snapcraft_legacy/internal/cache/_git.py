@@ -0,0 +1,61 @@
+# -*- Mode:Python; indent-tabs-mode:nil; tab-width:4 -*-
+#
+# Copyright (C) 2022 Canonical Ltd
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License version 3 as
+# published by the Free Software Foundation.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import contextlib
+import hashlib
+import os
+import sys
+from typing import Iterator
+
+from ._cache import SnapcraftCache
+
+if sys.platform != "win32":
+    import fcntl
+
+
+class GitMirrorCache(SnapcraftCache):
+    """Cache of bare git mirrors, shared by all projects.
+
+    Each remote repository gets its own mirror, keyed on its url. Access to
+    a mirror is coordinated with a lock file next to it: updating requires
+    an exclusive lock, cloning from it a shared one.
+    """
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.git_cache_root = os.path.join(self.cache_root, "git")
+        os.makedirs(self.git_cache_root, exist_ok=True)
+
+    def get_mirror_dir(self, url: str) -> str:
+        """Return the path to the mirror for url, which may not exist yet."""
+        key = hashlib.sha256(url.encode()).hexdigest()
+        return os.path.join(self.git_cache_root, f"{key}.git")
+
+    @contextlib.contextmanager
+    def lock(self, url: str, *, exclusive: bool) -> Iterator[str]:
+        """Lock the mirror for url, yielding the path to the mirror.
+
+        :param str url: the url of the mirrored repository.
+        :param bool exclusive: whether to take an exclusive lock, required
+                               to create or update the mirror.
+        """
+        mirror_dir = self.get_mirror_dir(url)
+        with open(f"{mirror_dir}.lock", "w") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+            try:
+                yield mirror_dir
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
@@ -26,9 +26,10 @@ import subprocess
 import sys
 import tempfile
 import urllib
+from concurrent.futures import ThreadPoolExecutor
 from contextlib import suppress
 from pathlib import Path
-from typing import Callable, List, Union
+from typing import Callable, Iterable, Iterator, List, TypeVar, Union
 
 from snapcraft_legacy.internal import errors
 
@@ -51,6 +52,9 @@ env = []  # type: List[str]
 
 logger = logging.getLogger(__name__)
 
+T = TypeVar("T")
+R = TypeVar("R")
+
 
 def assemble_env():
     return "\n".join(["export " + e for e in env])
@@ -171,6 +175,81 @@ def is_offline() -> bool:
     return os.getenv("SNAPCRAFT_OFFLINE") is not None
 
 
+def get_max_workers(default: int) -> int:
+    """Return the number of workers to use for concurrent tasks.
+
+    :param int default: the worker count to use when SNAPCRAFT_MAX_WORKERS
+                        is not set in the environment.
+    :raises snapcraft_legacy.internal.errors.InvalidWorkerCountError:
+        if SNAPCRAFT_MAX_WORKERS is not a positive integer.
+    """
+    return _get_worker_count("SNAPCRAFT_MAX_WORKERS", default)
+
+
+def get_parallel_parts_count() -> int:
+    """Return the number of parts whose pull and build may run concurrently.
+
+    Parts run one at a time unless SNAPCRAFT_PARALLEL_PARTS is set.
+
+    :raises snapcraft_legacy.internal.errors.InvalidWorkerCountError:
+        if SNAPCRAFT_PARALLEL_PARTS is not a positive integer.
+    """
+    return _get_worker_count("SNAPCRAFT_PARALLEL_PARTS", 1)
+
+
+def get_download_connections() -> int:
+    """Return the number of connections a single source download may use.
+
+    Downloads use a single connection unless SNAPCRAFT_DOWNLOAD_CONNECTIONS
+    is set.
+
+    :raises snapcraft_legacy.internal.errors.InvalidWorkerCountError:
+        if SNAPCRAFT_DOWNLOAD_CONNECTIONS is not a positive integer.
+    """
+    return _get_worker_count("SNAPCRAFT_DOWNLOAD_CONNECTIONS", 1)
+
+
+def _get_worker_count(variable: str, default: int) -> int:
+    value = os.getenv(variable)
+    if value is None:
+        return max(1, default)
+
+    try:
+        count = int(value)
+    except ValueError:
+        raise errors.InvalidWorkerCountError(value=value, variable=variable)
+
+    if count < 1:
+        raise errors.InvalidWorkerCountError(value=value, variable=variable)
+
+    return count
+
+
+def run_concurrently(
+    function: Callable[[T], R], items: Iterable[T], *, max_workers: int
+) -> Iterator[R]:
+    """Call function on each of items in a pool of threads.
+
+    The results are yielded in the order of items, each as soon as it and
+    the ones before it are available. If a call fails, or the caller stops
+    iterating, the calls not started yet are cancelled and this returns
+    once the running ones have finished.
+
+    :param function: the function to call with each item.
+    :param items: the items to call function with.
+    :param int max_workers: the maximum number of concurrent calls.
+    :raises: the error raised by the first failed call in the order of items.
+    """
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        jobs = [executor.submit(function, item) for item in items]
+        try:
+            for job in jobs:
+                yield job.result()
+        finally:
+            for job in jobs:
+                job.cancel()
+
+
 def is_snap() -> bool:
     snap_name = os.environ.get("SNAP_NAME", "")
     is_snap = snap_name == "snapcraft"
@@ -13,25 +13,45 @@
 #
 # You should have received a copy of the GNU General Public License
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
+import collections
+import concurrent.futures
 import contextlib
 import functools
 import glob
+import itertools
 import logging
 import os
 import pathlib
 import re
 import shutil
+import struct
 import subprocess
 import tempfile
-from typing import Dict, FrozenSet, List, Optional, Sequence, Set, Tuple, Union
+from typing import (
+    Any,
+    Callable,
+    Deque,
+    Dict,
+    FrozenSet,
+    Iterable,
+    List,
+    NamedTuple,
+    Optional,
+    Sequence,
+    Set,
+    Tuple,
+    TypeVar,
+    Union,
+)
 
 import elftools.common.exceptions
 import elftools.elf.elffile
+import elftools.elf.enums
 from elftools.construct import ConstructError
 from pkg_resources import parse_version
 
 from snapcraft_legacy import file_utils
-from snapcraft_legacy.internal import common, errors, repo
+from snapcraft_legacy.internal import cache, common, errors, repo
 from snapcraft_legacy.project._project_options import ProjectOptions
 
 logger = logging.getLogger(__name__)
@@ -158,6 +178,50 @@ def _determine_libraries(*, path: str, ld_library_paths: List[str]) -> Dict[str,
     return {}
 
 
+def _determine_libraries_for_path(
+    path: str, ld_library_paths: List[str]
+) -> Dict[str, str]:
+    # Positional wrapper so it can be mapped over a process pool.
+    return _determine_libraries(path=path, ld_library_paths=ld_library_paths)
+
+
+_T = TypeVar("_T")
+
+
+def _map_concurrently(
+    func: Callable[..., _T], *iterables: Iterable, workers: int
+) -> List[_T]:
+    """Map func over iterables using a pool of worker processes.
+
+    Results are returned in the order of the input.  If workers is 1 or
+    there is not enough work to share, func is run in this process.
+    """
+    arguments = list(zip(*iterables))
+    if workers <= 1 or len(arguments) <= 1:
+        return [func(*args) for args in arguments]
+
+    workers = min(workers, len(arguments))
+    chunksize = max(1, len(arguments) // (workers * 4))
+    with concurrent.futures.ProcessPoolExecutor(max_workers=workers) as executor:
+        return list(executor.map(func, *zip(*arguments), chunksize=chunksize))
+
+
+def _get_search_paths(
+    root_path: str, core_base_path: Optional[str], content_dirs: Set[str]
+) -> List[str]:
+    search_paths = [root_path, *content_dirs]
+    if core_base_path is not None:
+        search_paths.append(core_base_path)
+    return search_paths
+
+
+def _get_ld_library_paths(search_paths: List[str], arch_triplet: str) -> List[str]:
+    ld_library_paths: List[str] = list()
+    for path in search_paths:
+        ld_library_paths.extend(common.get_library_paths(path, arch_triplet))
+    return ld_library_paths
+
+
 class NeededLibrary:
     """Represents an ELF library version."""
 
@@ -227,6 +291,41 @@ class SonameCache:
         self._soname_paths = new_soname_paths
 
 
+class LibraryIndex:
+    """An index of the files found in library search paths.
+
+    Directories are only read once, the first time they are needed, so
+    resolving many libraries against the same search paths does not list
+    or walk them repeatedly.  The index must not outlive changes to the
+    directories it covers.
+    """
+
+    def __init__(self) -> None:
+        self._directories: Dict[str, FrozenSet[str]] = dict()
+        self._trees: Dict[str, List[Tuple[str, FrozenSet[str]]]] = dict()
+
+    def list_directory(self, directory: str) -> FrozenSet[str]:
+        """Return the names of the entries in directory."""
+        with contextlib.suppress(KeyError):
+            return self._directories[directory]
+
+        try:
+            names = frozenset(os.listdir(directory))
+        except OSError:
+            names = frozenset()
+        self._directories[directory] = names
+        return names
+
+    def walk(self, root: str) -> List[Tuple[str, FrozenSet[str]]]:
+        """Return (directory, file names) for root, in os.walk order."""
+        with contextlib.suppress(KeyError):
+            return self._trees[root]
+
+        tree = [(directory, frozenset(files)) for directory, _, files in os.walk(root)]
+        self._trees[root] = tree
+        return tree
+
+
 class Library:
     """Represents the SONAME and path to the library."""
 
@@ -239,6 +338,7 @@ class Library:
         core_base_path: Optional[str],
         arch: ElfArchitectureTuple,
         soname_cache: SonameCache,
+        library_index: Optional[LibraryIndex] = None,
     ) -> None:
 
         self.soname = soname
@@ -247,6 +347,7 @@ class Library:
         self.core_base_path = core_base_path
         self.arch = arch
         self.soname_cache = soname_cache
+        self.library_index = library_index
 
         # Resolve path, if possible.
         self.path = self._crawl_for_path()
@@ -300,7 +401,14 @@ class Library:
             return self.soname_path
 
         for path in valid_search_paths:
-            for root, directories, files in os.walk(path):
+            if self.library_index is not None:
+                tree: Iterable[Tuple[str, Iterable[str]]] = self.library_index.walk(
+                    path
+                )
+            else:
+                tree = ((root, files) for root, _, files in os.walk(path))
+
+            for root, files in tree:
                 if self.soname not in files:
                     continue
 
@@ -335,6 +443,32 @@ class ElfFile:
         with open(path, "rb") as bin_file:
             return bin_file.read(4) == b"\x7fELF"
 
+    @classmethod
+    def unmarshal(cls, data: Dict[str, Any]) -> "ElfFile":
+        """Create an ElfFile from data returned by marshal.
+
+        The file itself is not read.
+        """
+        elf_file = cls.__new__(cls)
+        elf_file.path = data["path"]
+        elf_file.dependencies = set()
+        elf_file.arch = tuple(data["arch"]) if data["arch"] else None  # type: ignore
+        elf_file.interp = data["interp"]
+        elf_file.soname = data["soname"]
+        elf_file.rpath = data["rpath"]
+        elf_file.runpath = data["runpath"]
+        elf_file.versions = set(data["versions"])
+        elf_file.needed = dict()
+        for name, versions in data["needed"].items():
+            elf_file.needed[name] = NeededLibrary(name=name)
+            elf_file.needed[name].versions.update(versions)
+        elf_file.execstack_set = data["execstack_set"]
+        elf_file.is_dynamic = data["is_dynamic"]
+        elf_file.build_id = data["build_id"]
+        elf_file.has_debug_info = data["has_debug_info"]
+        elf_file.elf_type = data["elf_type"]
+        return elf_file
+
     def __init__(self, *, path: str) -> None:
         """Initialize an ElfFile instance.
 
@@ -346,6 +480,8 @@ class ElfFile:
         self.arch: Optional[ElfArchitectureTuple] = None
         self.interp: str = ""
         self.soname: str = ""
+        self.rpath: str = ""
+        self.runpath: str = ""
         self.versions: Set[str] = set()
         self.needed: Dict[str, NeededLibrary] = dict()
         self.execstack_set: bool = False
@@ -393,6 +529,10 @@ class ElfFile:
                         self.needed[needed] = NeededLibrary(name=needed)
                     elif tag.entry.d_tag == "DT_SONAME":
                         self.soname = _ensure_str(tag.soname)
+                    elif tag.entry.d_tag == "DT_RPATH":
+                        self.rpath = _ensure_str(tag.rpath)
+                    elif tag.entry.d_tag == "DT_RUNPATH":
+                        self.runpath = _ensure_str(tag.runpath)
 
             for segment in elf.iter_segments():
                 if segment["p_type"] == "PT_GNU_STACK":
@@ -443,6 +583,26 @@ class ElfFile:
 
             self.elf_type = elf.header["e_type"]
 
+    def marshal(self) -> Dict[str, Any]:
+        """Return the extracted attributes as a serializable dictionary."""
+        return {
+            "path": self.path,
+            "arch": list(self.arch) if self.arch else None,
+            "interp": self.interp,
+            "soname": self.soname,
+            "rpath": self.rpath,
+            "runpath": self.runpath,
+            "versions": sorted(self.versions),
+            "needed": {
+                name: sorted(library.versions) for name, library in self.needed.items()
+            },
+            "execstack_set": self.execstack_set,
+            "is_dynamic": self.is_dynamic,
+            "build_id": self.build_id,
+            "has_debug_info": self.has_debug_info,
+            "elf_type": self.elf_type,
+        }
+
     def is_linker_compatible(self, *, linker_version: str) -> bool:
         """Determines if linker will work given the required glibc version."""
         version_required = self.get_required_glibc()
@@ -479,6 +639,8 @@ class ElfFile:
         content_dirs: Set[str],
         arch_triplet: str,
         soname_cache: SonameCache = None,
+        libraries: Optional[Dict[str, str]] = None,
+        library_index: Optional[LibraryIndex] = None,
     ) -> Set[str]:
         """Load the set of libraries that are needed to satisfy elf's runtime.
 
@@ -490,6 +652,10 @@ class ElfFile:
                                    dependencies.
         :param SonameCache soname_cache: a cache of previously search
                                          dependencies.
+        :param dict libraries: the soname to path mapping reported by the
+                               dynamic linker, if already determined.
+        :param LibraryIndex library_index: an index used to search for
+                                           libraries in the search paths.
         :returns: a set of string with paths to the library dependencies of
                   elf.
         """
@@ -498,17 +664,13 @@ class ElfFile:
 
         logger.debug("Getting dependencies for {!r}".format(self.path))
 
-        search_paths = [root_path, *content_dirs]
-        if core_base_path is not None:
-            search_paths.append(core_base_path)
-
-        ld_library_paths: List[str] = list()
-        for path in search_paths:
-            ld_library_paths.extend(common.get_library_paths(path, arch_triplet))
+        search_paths = _get_search_paths(root_path, core_base_path, content_dirs)
 
-        libraries = _determine_libraries(
-            path=self.path, ld_library_paths=ld_library_paths
-        )
+        if libraries is None:
+            libraries = _determine_libraries(
+                path=self.path,
+                ld_library_paths=_get_ld_library_paths(search_paths, arch_triplet),
+            )
         for soname, soname_path in libraries.items():
             if self.arch is None:
                 raise RuntimeError("failed to parse architecture")
@@ -521,6 +683,7 @@ class ElfFile:
                     core_base_path=core_base_path,
                     arch=self.arch,
                     soname_cache=soname_cache,
+                    library_index=library_index,
                 )
             )
 
@@ -532,6 +695,317 @@ class ElfFile:
         return dependencies
 
 
+class _DynamicInfo(NamedTuple):
+    """The subset of ELF attributes the dynamic linker needs for a library."""
+
+    path: str
+    arch: ElfArchitectureTuple
+    needed: List[str]
+    rpath: str
+    runpath: str
+
+
+_EI_CLASS_NAMES = {v: k for k, v in elftools.elf.enums.ENUM_EI_CLASS.items()}
+_EI_DATA_NAMES = {v: k for k, v in elftools.elf.enums.ENUM_EI_DATA.items()}
+_E_MACHINE_NAMES = {
+    v: k for k, v in elftools.elf.enums.ENUM_E_MACHINE.items() if k != "_default_"
+}
+
+_PT_LOAD = 1
+_PT_DYNAMIC = 2
+_DT_NEEDED = 1
+_DT_STRTAB = 5
+_DT_RPATH = 15
+_DT_RUNPATH = 29
+
+
+def _read_dynamic_info(path: str) -> Optional[_DynamicInfo]:
+    """Read the architecture and dynamic section entries of path.
+
+    This only reads the ELF and program headers and the dynamic segment,
+    which is considerably cheaper than a full ElfFile.
+
+    :returns: the _DynamicInfo or None if path cannot be parsed.
+    """
+    try:
+        with open(path, "rb") as elf_file:
+            return _parse_dynamic_info(path, elf_file)
+    except (OSError, ValueError, struct.error):
+        return None
+
+
+def _parse_dynamic_info(path: str, elf_file) -> Optional[_DynamicInfo]:  # noqa: C901
+    ident = elf_file.read(16)
+    if len(ident) != 16 or ident[:4] != b"\x7fELF":
+        return None
+
+    endianness = {1: "<", 2: ">"}[ident[5]]
+    if ident[4] == 2:
+        header_format, phdr_format, dyn_format = "HHIQQQIHHHHHH", "IIQQQQQQ", "qQ"
+    elif ident[4] == 1:
+        header_format, phdr_format, dyn_format = "HHIIIIIHHHHHH", "IIIIIIII", "iI"
+    else:
+        return None
+
+    header_format = endianness + header_format
+    header = struct.unpack(header_format, elf_file.read(struct.calcsize(header_format)))
+    e_machine, e_phoff, e_phentsize, e_phnum = (
+        header[1],
+        header[4],
+        header[8],
+        header[9],
+    )
+
+    phdr_format = endianness + phdr_format
+    loads: List[Tuple[int, int, int]] = list()
+    dynamic: Optional[Tuple[int, int]] = None
+    elf_file.seek(e_phoff)
+    program_headers = elf_file.read(e_phentsize * e_phnum)
+    for index in range(e_phnum):
+        phdr = struct.unpack_from(phdr_format, program_headers, index * e_phentsize)
+        if ident[4] == 2:
+            p_type, p_offset, p_vaddr, p_filesz = phdr[0], phdr[2], phdr[3], phdr[5]
+        else:
+            p_type, p_offset, p_vaddr, p_filesz = phdr[0], phdr[1], phdr[2], phdr[4]
+        if p_type == _PT_LOAD:
+            loads.append((p_vaddr, p_offset, p_filesz))
+        elif p_type == _PT_DYNAMIC:
+            dynamic = (p_offset, p_filesz)
+
+    arch = (
+        _EI_CLASS_NAMES[ident[4]],
+        _EI_DATA_NAMES[ident[5]],
+        _E_MACHINE_NAMES.get(e_machine, e_machine),
+    )
+    if dynamic is None:
+        return _DynamicInfo(path=path, arch=arch, needed=[], rpath="", runpath="")
+
+    dyn_format = endianness + dyn_format
+    elf_file.seek(dynamic[0])
+    dynamic_data = elf_file.read(dynamic[1])
+    entries: List[Tuple[int, int]] = list()
+    for d_tag, d_val in struct.iter_unpack(
+        dyn_format,
+        dynamic_data[
+            : len(dynamic_data) - len(dynamic_data) % struct.calcsize(dyn_format)
+        ],
+    ):
+        if d_tag == 0:
+            break
+        entries.append((d_tag, d_val))
+
+    strtab_address = dict(entries).get(_DT_STRTAB)
+    strtab_offset: Optional[int] = None
+    for vaddr, offset, filesz in loads:
+        if strtab_address is not None and vaddr <= strtab_address < vaddr + filesz:
+            strtab_offset = strtab_address - vaddr + offset
+    if strtab_offset is None:
+        return None
+
+    def read_string(offset: int) -> str:
+        elf_file.seek(strtab_offset + offset)
+        data = b""
+        while b"\0" not in data:
+            chunk = elf_file.read(256)
+            if not chunk:
+                raise ValueError("unterminated string")
+            data += chunk
+        return data[: data.index(b"\0")].decode()
+
+    needed: List[str] = list()
+    rpath = runpath = ""
+    for d_tag, d_val in entries:
+        if d_tag == _DT_NEEDED:
+            needed.append(read_string(d_val))
+        elif d_tag == _DT_RPATH:
+            rpath = read_string(d_val)
+        elif d_tag == _DT_RUNPATH:
+            runpath = read_string(d_val)
+
+    return _DynamicInfo(
+        path=path, arch=arch, needed=needed, rpath=rpath, runpath=runpath
+    )
+
+
+# Matches the DT_NEEDED names of dynamic linkers, e.g.; ld-linux-x86-64.so.2
+# or ld64.so.2, which ldd reports without a resolved path.
+_DYNAMIC_LINKER_NEEDED_REGEX = re.compile(r"^ld(64)?([-.][\w-]*)?\.so(\.\d+)*$")
+
+
+class LibraryResolver:
+    """Resolve the libraries an ELF file loads without running the linker.
+
+    This emulates the search performed by the dynamic linker: DT_RPATH of
+    the loading objects (unless DT_RUNPATH is set), LD_LIBRARY_PATH,
+    DT_RUNPATH and finally the host's ld.so.conf and default library
+    directories.  Transitive dependencies are followed breadth first, as
+    ldd does.
+
+    Whenever the outcome cannot be determined with certainty, e.g. a
+    library is not found, a candidate cannot be parsed or an unsupported
+    dynamic string token is used, resolve returns None and the dynamic
+    linker must be queried instead.
+    """
+
+    def __init__(
+        self,
+        *,
+        ld_library_paths: List[str],
+        arch_triplet: str,
+        library_index: LibraryIndex,
+        elf_cache: Optional[cache.ElfCache] = None,
+    ) -> None:
+        self._ld_library_paths = ld_library_paths
+        self._system_library_paths = _get_system_library_paths(arch_triplet)
+        self._library_index = library_index
+        self._elf_cache = elf_cache
+        self._libraries: Dict[str, Optional[Union[ElfFile, _DynamicInfo]]] = dict()
+
+    def resolve(self, elf_file: ElfFile) -> Optional[Dict[str, str]]:
+        """Return the soname to path mapping ldd would report for elf_file.
+
+        :param ElfFile elf_file: the ELF file to resolve libraries for.
+        :returns: a dictionary mapping library name to path, or None if the
+                  libraries cannot be resolved in-process.
+        """
+        libraries: Dict[str, str] = dict()
+        pending: Deque[
+            Tuple[Union[ElfFile, _DynamicInfo], List[str]]
+        ] = collections.deque([(elf_file, [])])
+
+        while pending:
+            current, loader_rpaths = pending.popleft()
+            origin = os.path.dirname(current.path)
+            rpaths = _expand_search_path(current.rpath, origin=origin)
+            runpaths = _expand_search_path(current.runpath, origin=origin)
+            if rpaths is None or runpaths is None:
+                return None
+
+            # DT_RPATH is ignored for objects that have DT_RUNPATH.
+            if runpaths:
+                search_paths = [*self._ld_library_paths, *runpaths]
+                child_rpaths = loader_rpaths
+            else:
+                child_rpaths = [*rpaths, *loader_rpaths]
+                search_paths = [*child_rpaths, *self._ld_library_paths]
+
+            for name in current.needed:
+                if name in libraries or _DYNAMIC_LINKER_NEEDED_REGEX.match(name):
+                    continue
+
+                library = self._find_library(
+                    name, search_paths=search_paths, arch=elf_file.arch
+                )
+                if library is None:
+                    return None
+
+                libraries[name] = library.path
+                pending.append((library, child_rpaths))
+
+        return libraries
+
+    def _find_library(
+        self,
+        name: str,
+        *,
+        search_paths: List[str],
+        arch: Optional[ElfArchitectureTuple],
+    ) -> Optional[Union[ElfFile, _DynamicInfo]]:
+        if "/" in name:
+            return None
+
+        for directory in search_paths:
+            library, ambiguous = self._find_in_directory(name, directory, arch)
+            if ambiguous:
+                return None
+            if library is not None:
+                return library
+
+        # The host's ld.so.cache is not parsed, so only trust it if the
+        # library is found in a single system directory.
+        candidates: List[Union[ElfFile, _DynamicInfo]] = list()
+        for directory in self._system_library_paths:
+            library, ambiguous = self._find_in_directory(name, directory, arch)
+            if ambiguous:
+                return None
+            if library is not None and not any(
+                os.path.samefile(library.path, c.path) for c in candidates
+            ):
+                candidates.append(library)
+
+        if len(candidates) != 1:
+            return None
+        return candidates[0]
+
+    def _find_in_directory(
+        self, name: str, directory: str, arch: Optional[ElfArchitectureTuple]
+    ) -> Tuple[Optional[Union[ElfFile, _DynamicInfo]], bool]:
+        names = self._library_index.list_directory(directory)
+        # Hardware capability subdirectories take precedence when present.
+        if "glibc-hwcaps" in names or "tls" in names:
+            return None, True
+        if name not in names:
+            return None, False
+
+        path = os.path.abspath(os.path.join(directory, name))
+        if not os.path.isfile(path):
+            return None, False
+
+        library = self._load_library(path)
+        if library is None:
+            return None, True
+
+        # The dynamic linker skips libraries built for other architectures.
+        if library.arch != arch:
+            return None, False
+
+        return library, False
+
+    def _load_library(self, path: str) -> Optional[Union[ElfFile, _DynamicInfo]]:
+        with contextlib.suppress(KeyError):
+            return self._libraries[path]
+
+        library: Optional[Union[ElfFile, _DynamicInfo]] = None
+        cache_entry = self._elf_cache.get(path) if self._elf_cache else None
+        if cache_entry is not None and cache_entry.attributes is not None:
+            library = ElfFile.unmarshal(cache_entry.attributes)
+        elif cache_entry is None:
+            library = _read_dynamic_info(path)
+
+        self._libraries[path] = library
+        return library
+
+
+def _expand_search_path(search_path: str, *, origin: str) -> Optional[List[str]]:
+    """Split search_path and expand $ORIGIN, None for unsupported tokens."""
+    paths: List[str] = list()
+    for path in search_path.split(":"):
+        if not path:
+            continue
+        path = path.replace("${ORIGIN}", origin).replace("$ORIGIN", origin)
+        if "$" in path:
+            return None
+        paths.append(path)
+    return paths
+
+
+def _get_system_library_paths(arch_triplet: str) -> List[str]:
+    """Return the host library directories, in ld.so.conf order."""
+    paths: List[str] = list()
+    with contextlib.suppress(OSError):
+        paths.extend(_extract_ld_library_paths("/etc/ld.so.conf"))
+    paths.extend(
+        [
+            os.path.join("/lib", arch_triplet),
+            os.path.join("/usr/lib", arch_triplet),
+            "/lib",
+            "/usr/lib",
+        ]
+    )
+    # Keep the first occurrence of each path, as ld.so searches them in order.
+    return list(dict.fromkeys(paths))
+
+
 class Patcher:
     """Patcher holds the necessary logic to patch elf files."""
 
@@ -562,70 +1036,87 @@ class Patcher:
 
         If the ELF is executable, patch it to use the configured linker.
         If the ELF has dependencies (DT_NEEDED), set an rpath to them.
+        Files that already use the configured linker and rpath are left
+        untouched.
 
         :param ElfFile elf: a data object representing an elf file and its
                             relevant attributes.
         :raises snapcraft_legacy.internal.errors.PatcherError:
             raised when the elf_file cannot be patched.
         """
-        patchelf_args = []
-        if elf_file.interp:
+        patchelf_calls = []  # type: List[List[str]]
+        patchelf_args = []  # type: List[str]
+        if elf_file.interp and elf_file.interp != self._dynamic_linker:
             patchelf_args.extend(["--set-interpreter", self._dynamic_linker])
+        rpath = None
         if elf_file.dependencies:
             rpath = self._get_rpath(elf_file)
-            # Due to https://github.com/NixOS/patchelf/issues/94 we need
-            # to first clear the current rpath
-            self._run_patchelf(
-                patchelf_args=["--remove-rpath"], elf_file_path=elf_file.path
-            )
-            # Parameters:
-            # --force-rpath: use RPATH instead of RUNPATH.
-            # --shrink-rpath: will remove unneeded entries, with the
-            #                 side effect of preferring host libraries
-            #                 so we simply do not use it.
-            # --set-rpath: set the RPATH to the colon separated argument.
-            patchelf_args.extend(["--force-rpath", "--set-rpath", rpath])
+            if elf_file.runpath or elf_file.rpath != rpath:
+                # Due to https://github.com/NixOS/patchelf/issues/94 we need
+                # to first clear the current rpath
+                patchelf_calls.append(["--remove-rpath"])
+                # Parameters:
+                # --force-rpath: use RPATH instead of RUNPATH.
+                # --shrink-rpath: will remove unneeded entries, with the
+                #                 side effect of preferring host libraries
+                #                 so we simply do not use it.
+                # --set-rpath: set the RPATH to the colon separated argument.
+                patchelf_args.extend(["--force-rpath", "--set-rpath", rpath])
 
         # no patchelf_args means there is nothing to do.
         if not patchelf_args:
+            logger.debug("Skipping already patched file: {!r}".format(elf_file.path))
             return
 
-        self._run_patchelf(patchelf_args=patchelf_args, elf_file_path=elf_file.path)
+        patchelf_calls.append(patchelf_args)
+        self._run_patchelf(patchelf_calls=patchelf_calls, elf_file_path=elf_file.path)
 
-    def _run_patchelf(self, *, patchelf_args: List[str], elf_file_path: str) -> None:
-        # Run patchelf on a copy of the primed file and replace it
+        # Keep the in-memory attributes in line with the patched file.
+        if elf_file.interp:
+            elf_file.interp = self._dynamic_linker
+        if rpath is not None:
+            elf_file.rpath = rpath
+            elf_file.runpath = ""
+
+    def _run_patchelf(
+        self, *, patchelf_calls: List[List[str]], elf_file_path: str
+    ) -> None:
+        # Run patchelf on a copy of the primed file and move it in place
         # after it is successful. This allows us to break the potential
         # hard link created when migrating the file across the steps of
         # the part.
-        with tempfile.NamedTemporaryFile() as temp_file:
-            shutil.copy2(elf_file_path, temp_file.name)
-
-            cmd = [self._patchelf_cmd] + patchelf_args + [temp_file.name]
-            try:
-                logger.debug("executing: %s", " ".join(cmd))
-                subprocess.check_call(cmd)
-            # There is no need to catch FileNotFoundError as patchelf should be
-            # bundled with snapcraft which means its lack of existence is a
-            # "packager" error.
-            except subprocess.CalledProcessError as call_error:
-                raise errors.PatcherGenericError(
-                    elf_file=elf_file_path, process_exception=call_error
-                )
-
-            # We unlink to break the potential hard link
-            os.unlink(elf_file_path)
-            shutil.copy2(temp_file.name, elf_file_path)
-
-    def _get_existing_rpath(self, elf_file_path):
-        output = subprocess.check_output(
-            [self._patchelf_cmd, "--print-rpath", elf_file_path]
+        temp_fd, temp_file_path = tempfile.mkstemp(
+            prefix=".{}.".format(os.path.basename(elf_file_path)),
+            dir=os.path.dirname(elf_file_path),
         )
-        return output.decode().strip().split(":")
+        os.close(temp_fd)
+        try:
+            shutil.copy2(elf_file_path, temp_file_path)
+
+            for patchelf_args in patchelf_calls:
+                cmd = [self._patchelf_cmd] + patchelf_args + [temp_file_path]
+                try:
+                    logger.debug("executing: %s", " ".join(cmd))
+                    subprocess.check_call(cmd)
+                # There is no need to catch FileNotFoundError as patchelf
+                # should be bundled with snapcraft which means its lack of
+                # existence is a "packager" error.
+                except subprocess.CalledProcessError as call_error:
+                    raise errors.PatcherGenericError(
+                        elf_file=elf_file_path, process_exception=call_error
+                    )
+
+            # Replacing the path breaks the potential hard link.
+            os.replace(temp_file_path, elf_file_path)
+        finally:
+            if os.path.exists(temp_file_path):
+                os.unlink(temp_file_path)
 
     def _get_rpath(self, elf_file) -> str:
         origin_rpaths = list()  # type: List[str]
         base_rpaths = set()  # type: Set[str]
-        existing_rpaths = self._get_existing_rpath(elf_file.path)
+        # patchelf --print-rpath reports DT_RUNPATH when DT_RPATH is unset.
+        existing_rpaths = (elf_file.rpath or elf_file.runpath).split(":")
 
         for dependency in elf_file.dependencies:
             if dependency.path:
@@ -694,8 +1185,16 @@ def _extract_ld_library_paths(ld_conf_file: str) -> List[str]:
             # Remove comments from line
             line = comments.sub("", line).strip()
 
-            if line:
-                paths.extend(path_delimiters.split(line))
+            if line.split(maxsplit=1)[:1] == ["include"]:
+                # Included globs are relative to the including file.
+                for include_glob in line.split()[1:]:
+                    include_glob = os.path.join(
+                        os.path.dirname(ld_conf_file), include_glob
+                    )
+                    for include_file in sorted(glob.glob(include_glob)):
+                        paths.extend(_extract_ld_library_paths(include_file))
+            elif line:
+                paths.extend(p for p in path_delimiters.split(line) if p)
 
     return paths
 
@@ -703,16 +1202,131 @@ def _extract_ld_library_paths(ld_conf_file: str) -> List[str]:
 _libraries = None
 
 
-def get_elf_files(root: str, file_list: Sequence[str]) -> FrozenSet[ElfFile]:
+def load_dependencies(
+    elf_files: Iterable[ElfFile],
+    *,
+    root_path: str,
+    core_base_path: Optional[str],
+    content_dirs: Set[str],
+    arch_triplet: str,
+    soname_cache: SonameCache,
+    workers: int = 1,
+    elf_cache: Optional[cache.ElfCache] = None,
+    library_index: Optional[LibraryIndex] = None,
+) -> Set[str]:
+    """Load the dependencies for all elf_files.
+
+    The dynamic linker is queried for each ELF file concurrently using up to
+    workers processes, the results are then resolved against soname_cache
+    in a stable order so the outcome is the same as loading them serially.
+
+    :param elf_files: the ElfFile objects to load dependencies for.
+    :param int workers: the maximum number of processes to use.
+    :param ElfCache elf_cache: a persistent cache of previously determined
+                               libraries for unchanged files.
+    :param LibraryIndex library_index: if set, libraries are resolved
+                                       in-process with a LibraryResolver
+                                       using this index, only querying the
+                                       dynamic linker when the resolver
+                                       cannot.
+    :returns: a set of string with paths to the library dependencies of all
+              elf_files.
+    """
+    ordered_elf_files = sorted(elf_files, key=lambda e: e.path)
+    search_paths = _get_search_paths(root_path, core_base_path, content_dirs)
+    ld_library_paths = _get_ld_library_paths(search_paths, arch_triplet)
+
+    libraries_by_path: Dict[str, Dict[str, str]] = dict()
+    if elf_cache is not None:
+        for elf_file in ordered_elf_files:
+            libraries = elf_cache.get_libraries(
+                elf_file.path, ld_library_paths=ld_library_paths
+            )
+            if libraries is not None:
+                libraries_by_path[elf_file.path] = libraries
+
+    if library_index is not None:
+        resolver = LibraryResolver(
+            ld_library_paths=ld_library_paths,
+            arch_triplet=arch_triplet,
+            library_index=library_index,
+            elf_cache=elf_cache,
+        )
+        for elf_file in ordered_elf_files:
+            if elf_file.path in libraries_by_path:
+                continue
+            libraries = resolver.resolve(elf_file)
+            if libraries is not None:
+                libraries_by_path[elf_file.path] = libraries
+
+    pending_paths = [
+        elf_file.path
+        for elf_file in ordered_elf_files
+        if elf_file.path not in libraries_by_path
+    ]
+    for path, libraries in zip(
+        pending_paths,
+        _map_concurrently(
+            _determine_libraries_for_path,
+            pending_paths,
+            itertools.repeat(ld_library_paths),
+            workers=workers,
+        ),
+    ):
+        libraries_by_path[path] = libraries
+        if elf_cache is not None:
+            elf_cache.set_libraries(
+                path, ld_library_paths=ld_library_paths, libraries=libraries
+            )
+
+    dependencies: Set[str] = set()
+    for elf_file in ordered_elf_files:
+        dependencies.update(
+            elf_file.load_dependencies(
+                root_path=root_path,
+                core_base_path=core_base_path,
+                content_dirs=content_dirs,
+                arch_triplet=arch_triplet,
+                soname_cache=soname_cache,
+                libraries=libraries_by_path[elf_file.path],
+                library_index=library_index,
+            )
+        )
+    return dependencies
+
+
+def _load_elf_file(path: str) -> Tuple[Optional[ElfFile], Optional[str]]:
+    """Return the ElfFile for path, or a warning if it could not be parsed."""
+    try:
+        return ElfFile(path=path), None
+    except elftools.common.exceptions.ELFError:
+        # Ignore invalid ELF files.
+        return None, None
+    except errors.CorruptedElfFileError as exception:
+        return None, exception.get_brief()
+
+
+def get_elf_files(
+    root: str,
+    file_list: Sequence[str],
+    *,
+    workers: int = 1,
+    elf_cache: Optional[cache.ElfCache] = None,
+) -> FrozenSet[ElfFile]:
     """Return a frozenset of elf files from file_list prepended with root.
 
     :param str root: the root directory from where the file_list is generated.
     :param file_list: a list of file in root.
+    :param int workers: the maximum number of processes used to parse the
+                        ELF files.
+    :param ElfCache elf_cache: a persistent cache of the attributes of
+                               previously parsed files.
     :returns: a frozentset of ElfFile objects.
     """
     elf_files = set()  # type: Set[ElfFile]
+    elf_paths: List[str] = list()
 
-    for part_file in file_list:
+    for part_file in sorted(file_list):
         # Filter out object (*.o) files-- we only care about binaries.
         if part_file.endswith(".o"):
             continue
@@ -723,20 +1337,34 @@ def get_elf_files(root: str, file_list: Sequence[str]) -> FrozenSet[ElfFile]:
             logger.debug("Skipped link {!r} while finding dependencies".format(path))
             continue
 
-        # Ignore if file does not have ELF header.
-        if not ElfFile.is_elf(path):
+        cache_entry = elf_cache.get(path) if elf_cache is not None else None
+        if cache_entry is not None:
+            # A cached entry without attributes is a known non ELF file.
+            if cache_entry.attributes is not None:
+                elf_file = ElfFile.unmarshal(cache_entry.attributes)
+                if elf_file.needed:
+                    elf_files.add(elf_file)
             continue
 
-        try:
-            elf_file = ElfFile(path=path)
-        except elftools.common.exceptions.ELFError:
-            # Ignore invalid ELF files.
-            continue
-        except errors.CorruptedElfFileError as exception:
-            # Log if the ELF file seems corrupted
-            logger.warning(exception.get_brief())
+        # Ignore if file does not have ELF header.
+        if ElfFile.is_elf(path):
+            elf_paths.append(path)
+        elif elf_cache is not None and os.path.isfile(path):
+            elf_cache.set_attributes(path, attributes=None)
+
+    for elf_file, warning in _map_concurrently(
+        _load_elf_file, elf_paths, workers=workers
+    ):
+        # Log if the ELF file seems corrupted
+        if warning is not None:
+            logger.warning(warning)
+
+        if elf_file is None:
             continue
 
+        if elf_cache is not None:
+            elf_cache.set_attributes(elf_file.path, attributes=elf_file.marshal())
+
         # If ELF has dynamic symbols, add it.
         if elf_file.needed:
             elf_files.add(elf_file)
@@ -839,3 +839,35 @@ class BuildAttributePatchelfConflictError(SnapcraftException):
 
     def get_resolution(self) -> str:
         return f"Use either 'no-patchelf' or 'enable-patchelf', not both."
+
+
+class InvalidWorkerCountError(SnapcraftException):
+    """An exception to raise when the configured worker count is invalid."""
+
+    def __init__(self, *, value: str, variable: str = "SNAPCRAFT_MAX_WORKERS") -> None:
+        self._value = value
+        self._variable = variable
+
+    def get_brief(self) -> str:
+        return f"Invalid value {self._value!r} for {self._variable}."
+
+    def get_resolution(self) -> str:
+        return f"Set {self._variable} to a positive integer or unset it."
+
+
+class PartStepFailedError(SnapcraftException):
+    """An exception to raise when a step failed in a worker process."""
+
+    def __init__(self, *, part_name: str, step: steps.Step, message: str) -> None:
+        self._part_name = part_name
+        self._step = step
+        self._message = message
+
+    def get_brief(self) -> str:
+        return f"Failed to run the {self._step.name} step for {self._part_name!r}."
+
+    def get_details(self) -> str:
+        return self._message
+
+    def get_resolution(self) -> str:
+        return "Review the output for the part above."
@@ -19,7 +19,7 @@ from urllib.request import urlretrieve
 from progressbar import AnimatedMarker, Bar, Percentage, ProgressBar, UnknownLength
 
 
-def _init_progress_bar(total_length, destination, message=None):
+def init_progress_bar(total_length, destination, message=None):
     if not message:
         message = "Downloading {!r}".format(os.path.basename(destination))
 
@@ -55,7 +55,7 @@ def download_requests_stream(request_stream, destination, message=None, total_re
         if os.path.exists(destination):
             total_length += total_read
 
-    progress_bar = _init_progress_bar(total_length, destination, message)
+    progress_bar = init_progress_bar(total_length, destination, message)
     progress_bar.start()
 
     if os.path.exists(destination):
@@ -88,7 +88,7 @@ class UrllibDownloader(object):
 
     def _progress_callback(self, block_num, block_size, total_length):
         if not self.progress_bar:
-            self.progress_bar = _init_progress_bar(
+            self.progress_bar = init_progress_bar(
                 total_length, self.destination, self.message
             )
             self.progress_bar.start()
@@ -15,7 +15,14 @@
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
 import logging
-from typing import List, Optional, Sequence, Set
+import multiprocessing
+import multiprocessing.connection
+import os
+import pickle
+import sys
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, NamedTuple, Optional, Sequence, Set, Tuple
 
 from snapcraft_legacy import config, plugins, storeapi
 from snapcraft_legacy.internal import (
@@ -24,6 +31,7 @@ from snapcraft_legacy.internal import (
     pluginhandler,
     project_loader,
     repo,
+    sources,
     states,
     steps,
 )
@@ -141,7 +149,7 @@ def execute(
         )
     global_state.save(filepath=project_config.project._get_global_state_file_path())
 
-    executor = _Executor(project_config)
+    executor = _Executor(project_config, jobs=common.get_parallel_parts_count())
     executor.run(step, part_names)
     if not executor.steps_were_run:
         logger.warning(
@@ -169,14 +177,25 @@ def _replace_in_part(part):
     return part
 
 
+class _Worker(NamedTuple):
+    part: pluginhandler.PluginHandler
+    process: multiprocessing.Process
+    connection: multiprocessing.connection.Connection
+    stdout_log_path: str
+    stderr_log_path: str
+
+
 class _Executor:
-    def __init__(self, project_config):
+    def __init__(self, project_config, *, jobs: int = 1):
         self.config = project_config
         self.project = project_config.project
         self.parts_config = project_config.parts
         self.steps_were_run = False
 
         self._cache = StatusCache(project_config)
+        # The pull and build steps of up to jobs parts run concurrently.
+        self._jobs = jobs
+        self._scheduling = False
 
     def run(self, step: steps.Step, part_names=None):
         if part_names:
@@ -195,11 +214,246 @@ class _Executor:
                     # XXX check only for collisions on the parts that have
                     # already been built --elopio - 20170713
                     pluginhandler.check_for_collisions(self.config.all_parts)
+                elif current_step == steps.PULL:
+                    self._prefetch_sources(part_names, parts, step)
+                if (
+                    self._jobs > 1
+                    and not self._scheduling
+                    and current_step in (steps.PULL, steps.BUILD)
+                ):
+                    self._handle_step_concurrently(
+                        part_names, parts, step, current_step, cli_config
+                    )
+                    continue
                 for part in parts:
                     self._handle_step(part_names, part, step, current_step, cli_config)
 
         self._create_meta(step, processed_part_names)
 
+    def _prefetch_sources(
+        self,
+        requested_part_names: Sequence[str],
+        parts: List[pluginhandler.PluginHandler],
+        requested_step: steps.Step,
+    ) -> None:
+        """Download the file sources of the parts about to be pulled at once.
+
+        Downloads land in the file cache, where pull picks them up. Failures
+        are only logged, pull downloads the source again and reports them.
+        """
+        # Only sources with a checksum are prefetched, each of them once as
+        # they are downloaded to the same place in the cache.
+        handlers_by_checksum: Dict[str, sources.FileBase] = dict()
+        for part in parts:
+            if (
+                isinstance(part.source_handler, sources.FileBase)
+                and part.source_handler.source_checksum
+                and self._step_needs_action(
+                    requested_part_names, part, requested_step, steps.PULL
+                )
+            ):
+                handlers_by_checksum.setdefault(
+                    part.source_handler.source_checksum, part.source_handler
+                )
+        handlers = list(handlers_by_checksum.values())
+        if len(handlers) < 2:
+            return
+
+        with ThreadPoolExecutor(
+            max_workers=common.get_max_workers(len(handlers))
+        ) as executor:
+            jobs = [executor.submit(handler.prefetch) for handler in handlers]
+            for handler, job in zip(handlers, jobs):
+                try:
+                    job.result()
+                except Exception as prefetch_error:
+                    logger.debug(
+                        "Could not prefetch {!r}: {}".format(
+                            handler.source, prefetch_error
+                        )
+                    )
+
+    def _handle_step_concurrently(
+        self,
+        requested_part_names: Sequence[str],
+        parts: List[pluginhandler.PluginHandler],
+        requested_step: steps.Step,
+        current_step: steps.Step,
+        cli_config,
+    ) -> None:
+        """Handle current_step for parts, running independent parts together.
+
+        A part is only handled once the parts it depends on, among parts, have
+        been handled. Parts that need the step to run do so in a forked worker
+        process, as the environment set up for a step is process wide. Their
+        dependencies are staged here beforehand, so that shared directories
+        are only ever written to by this process. The output of each worker
+        goes to its own log, which is replayed once the worker is done.
+        """
+        pending = list(parts)
+        workers: Dict[str, _Worker] = dict()
+        error: Optional[Exception] = None
+
+        self._scheduling = True
+        try:
+            with tempfile.TemporaryDirectory(prefix="snapcraft-parts-") as log_dir:
+                while pending or workers:
+                    while error is None and len(workers) < self._jobs:
+                        part = self._get_ready_part(pending, workers)
+                        if part is None:
+                            break
+                        pending.remove(part)
+
+                        if not self._step_needs_action(
+                            requested_part_names, part, requested_step, current_step
+                        ):
+                            self._handle_step(
+                                requested_part_names,
+                                part,
+                                requested_step,
+                                current_step,
+                                cli_config,
+                            )
+                            continue
+
+                        try:
+                            self._handle_part_dependencies(step=current_step, part=part)
+                        except Exception as dependency_error:
+                            error = dependency_error
+                            break
+
+                        workers[part.name] = self._start_worker(
+                            (
+                                requested_part_names,
+                                part,
+                                requested_step,
+                                current_step,
+                                cli_config,
+                            ),
+                            os.path.join(log_dir, part.name),
+                        )
+
+                    if not workers:
+                        break
+
+                    ready = multiprocessing.connection.wait(
+                        [w.connection for w in workers.values()]
+                    )
+                    for worker in [
+                        w for w in workers.values() if w.connection in ready
+                    ]:
+                        del workers[worker.part.name]
+                        worker_error = self._finish_worker(worker, current_step)
+                        if error is None:
+                            error = worker_error
+        finally:
+            self._scheduling = False
+            for worker in workers.values():
+                worker.process.terminate()
+                worker.process.join()
+
+        if error is not None:
+            raise error
+
+    def _get_ready_part(
+        self, pending: List[pluginhandler.PluginHandler], workers: Dict[str, _Worker]
+    ) -> Optional[pluginhandler.PluginHandler]:
+        unfinished_part_names = {p.name for p in pending} | set(workers)
+        for part in pending:
+            dependency_names = {
+                p.name for p in self.parts_config.get_dependencies(part.name)
+            }
+            if not dependency_names & unfinished_part_names:
+                return part
+        return None
+
+    def _step_needs_action(
+        self,
+        requested_part_names: Sequence[str],
+        part: pluginhandler.PluginHandler,
+        requested_step: steps.Step,
+        current_step: steps.Step,
+    ) -> bool:
+        # Mirrors the decisions taken by _handle_step.
+        return (
+            not self._cache.has_step_run(part, current_step)
+            or bool(
+                requested_part_names
+                and current_step == requested_step
+                and part.name in requested_part_names
+            )
+            or self._cache.get_dirty_report(part, current_step) is not None
+            or self._cache.get_outdated_report(part, current_step) is not None
+        )
+
+    def _start_worker(self, handle_step_args, log_path: str) -> _Worker:
+        part = handle_step_args[1]
+        # Output is kept apart so that it is replayed to the right stream.
+        log_paths = ("{}.stdout".format(log_path), "{}.stderr".format(log_path))
+        parent_connection, child_connection = multiprocessing.Pipe(duplex=False)
+        process = multiprocessing.get_context("fork").Process(
+            target=self._run_worker,
+            args=(child_connection, log_paths, handle_step_args),
+        )
+        # Anything buffered would otherwise be written again by the worker.
+        sys.stdout.flush()
+        sys.stderr.flush()
+        process.start()
+        child_connection.close()
+        return _Worker(part, process, parent_connection, *log_paths)
+
+    def _run_worker(
+        self, connection, log_paths: Tuple[str, str], handle_step_args
+    ) -> None:
+        for log_path, stream in zip(log_paths, (sys.stdout, sys.stderr)):
+            with open(log_path, "wb") as log_file:
+                os.dup2(log_file.fileno(), stream.fileno())
+
+        self.steps_were_run = False
+        try:
+            self._handle_step(*handle_step_args)
+        except Exception as error:
+            logger.debug("Worker failed", exc_info=True)
+            result = (False, _dump_error(error), str(error))
+        else:
+            result = (True, self.steps_were_run, None)
+        finally:
+            sys.stdout.flush()
+            sys.stderr.flush()
+
+        connection.send(result)
+        connection.close()
+
+    def _finish_worker(self, worker: _Worker, step: steps.Step) -> Optional[Exception]:
+        try:
+            succeeded, value, message = worker.connection.recv()
+        except EOFError:
+            succeeded, value, message = False, None, "The worker exited unexpectedly."
+        worker.connection.close()
+        worker.process.join()
+
+        for log_path, stream in (
+            (worker.stdout_log_path, sys.stdout),
+            (worker.stderr_log_path, sys.stderr),
+        ):
+            with open(log_path, "r", errors="replace") as log_file:
+                stream.write(log_file.read())
+            stream.flush()
+
+        # The worker may have run and cleaned any step from this one onwards,
+        # their status needs to be reloaded.
+        for current_step in [step] + step.next_steps():
+            self._cache.clear_step(worker.part, current_step)
+
+        if succeeded:
+            self.steps_were_run |= value
+            return None
+        if value is not None:
+            return _load_error(value)
+        return errors.PartStepFailedError(
+            part_name=worker.part.name, step=step, message=message
+        )
+
     def _handle_step(
         self,
         requested_part_names: Sequence[str],
@@ -410,7 +664,11 @@ class _Executor:
                 "Updating {} step for".format(step.name),
                 "({})".format(outdated_report.get_summary()),
             )
-            update_function()
+            if step in (steps.STAGE, steps.PRIME):
+                # Files shared with other parts must survive the update.
+                update_function(self.config.get_project_state(step))
+            else:
+                update_function()
 
             # We know we just ran this step, so rather than check, manually
             # twiddle the cache
@@ -421,6 +679,25 @@ class _Executor:
             )
 
 
+def _dump_error(error: Exception) -> Optional[bytes]:
+    # Most exceptions take keyword arguments, which pickle does not support,
+    # so their state is restored without calling __init__.
+    try:
+        dumped_error = pickle.dumps((type(error), error.args, error.__dict__))
+        _load_error(dumped_error)
+    except Exception:
+        return None
+    return dumped_error
+
+
+def _load_error(dumped_error: bytes) -> Exception:
+    error_type, args, state = pickle.loads(dumped_error)
+    error = error_type.__new__(error_type, *args)
+    error.args = args
+    error.__dict__.update(state)
+    return error
+
+
 def notify_part_progress(part, progress, hint="", debug=False):
     if debug:
         logger.debug("%s %s %s", progress, part.name, hint)
@@ -13,32 +13,69 @@
 #
 # You should have received a copy of the GNU General Public License
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
+import concurrent.futures
 import logging
+import os
 import re
 import subprocess
 from typing import FrozenSet
 
 from snapcraft_legacy import file_utils
-from snapcraft_legacy.internal import elf
+from snapcraft_legacy.internal import common, elf
 
 logger = logging.getLogger(__name__)
 
 
+# Both patterns only ever match within the first line of a file.
+_ARGLESS_SHEBANG_PATTERN = re.compile(r"\A#!.*(python\S*)$", re.MULTILINE)
+_SHEBANG_PATTERN_WITH_ARGS = re.compile(
+    r"\A#!.*(python\S*)[ \t\f\v]+(\S+)$", re.MULTILINE
+)
+_ARGLESS_SHEBANG_REPLACEMENT = r"#!/usr/bin/env \1"
+_SHEBANG_WITH_ARGS_REPLACEMENT = r"""#!/bin/sh\n''''exec \1 \2 -- "$0" "$@" # '''"""
+
+
 def rewrite_python_shebangs(root_dir):
     """Recursively change #!/usr/bin/pythonX shebangs to #!/usr/bin/env pythonX
 
     :param str root_dir: Directory that will be crawled for shebangs.
     """
+    file_paths = []
+    for root, directories, files in os.walk(root_dir):
+        for file_name in files:
+            file_path = os.path.join(root, file_name)
+            # Don't bother trying to rewrite a symlink. It's either invalid
+            # or the linked file will be rewritten on its own.
+            if not os.path.islink(file_path):
+                file_paths.append(file_path)
+
+    # Most files are only opened to find they have no shebang, threads
+    # suffice to overlap that I/O.
+    workers = common.get_max_workers(os.cpu_count() or 1)
+    with concurrent.futures.ThreadPoolExecutor(max_workers=workers) as executor:
+        for _ in executor.map(rewrite_python_shebang, file_paths):
+            pass
+
+
+def rewrite_python_shebang(file_path: str) -> None:
+    """Change a #!/usr/bin/pythonX shebang in file_path to use env.
 
-    file_pattern = re.compile(r"")
-    argless_shebang_pattern = re.compile(r"\A#!.*(python\S*)$", re.MULTILINE)
-    shebang_pattern_with_args = re.compile(
-        r"\A#!.*(python\S*)[ \t\f\v]+(\S+)$", re.MULTILINE
-    )
+    Only the first line is read, and only for files starting with a shebang.
+    The rest of the file is left untouched.
 
-    file_utils.replace_in_file(
-        root_dir, file_pattern, argless_shebang_pattern, r"#!/usr/bin/env \1"
-    )
+    :param str file_path: path to the file to rewrite, must not be a symlink.
+    """
+    try:
+        with open(file_path, "rb") as f:
+            if f.read(2) != b"#!":
+                return
+            first_line = b"#!" + f.readline()
+    except PermissionError as e:
+        logger.warning("Unable to open {path}: {error}".format(path=file_path, error=e))
+        return
+
+    original = first_line.decode("utf-8", "surrogateescape")
+    replaced = _ARGLESS_SHEBANG_PATTERN.sub(_ARGLESS_SHEBANG_REPLACEMENT, original)
 
     # The above rewrite will barf if the shebang includes any args to python.
     # For example, if the shebang was `#!/usr/bin/python3 -Es`, just replacing
@@ -49,12 +86,22 @@ def rewrite_python_shebangs(root_dir):
     # then exec the original shebang with included arguments. This requires
     # some quoting hacks to ensure the file can be interpreted by both sh as
     # well as python, but it's better than shipping our own `env`.
-    file_utils.replace_in_file(
-        root_dir,
-        file_pattern,
-        shebang_pattern_with_args,
-        r"""#!/bin/sh\n''''exec \1 \2 -- "$0" "$@" # '''""",
-    )
+    replaced = _SHEBANG_PATTERN_WITH_ARGS.sub(_SHEBANG_WITH_ARGS_REPLACEMENT, replaced)
+    if replaced == original:
+        return
+
+    try:
+        with open(file_path, "r+b") as f:
+            f.seek(len(first_line))
+            rest = f.read()
+            f.seek(0)
+            f.truncate()
+            f.write(replaced.encode("utf-8", "surrogateescape"))
+            f.write(rest)
+    except PermissionError as e:
+        logger.warning(
+            "Unable to open {path} for writing: {error}".format(path=file_path, error=e)
+        )
 
 
 def clear_execstack(*, elf_files: FrozenSet[elf.ElfFile]) -> None:
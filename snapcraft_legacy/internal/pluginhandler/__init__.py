@@ -15,22 +15,24 @@
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
 import collections
+import concurrent.futures
 import contextlib
 import copy
-import filecmp
 import io
 import logging
 import os
 import pathlib
 import shutil
+import stat
 import subprocess
 import sys
 from glob import iglob
-from typing import TYPE_CHECKING, Dict, List, Optional, Sequence, Set, cast
+from typing import TYPE_CHECKING, Dict, List, Optional, Sequence, Set, Tuple, cast
 
 import snapcraft_legacy.extractors
 from snapcraft_legacy import file_utils, plugins, yaml_utils
 from snapcraft_legacy.internal import (
+    cache,
     common,
     elf,
     errors,
@@ -113,6 +115,10 @@ class PluginHandler:
         self._stage_state: Optional[states.StageState] = None
         self._prime_state: Optional[states.PrimeState] = None
 
+        # The state of all parts for the step being updated incrementally,
+        # see _update_shared_area.
+        self._update_project_state: Optional[Dict[str, states.PartState]] = None
+
         self._project = project
         self.deps: List[str] = list()
 
@@ -580,6 +586,14 @@ class PluginHandler:
         if self.stage_packages_path.exists():
             shutil.rmtree(self.stage_packages_path)
 
+        if isinstance(self.source_handler, sources.Local):
+            with contextlib.suppress(FileNotFoundError):
+                os.remove(
+                    sources.Local.get_index_path(
+                        states.get_step_state_file(self.part_state_dir, steps.PULL)
+                    )
+                )
+
         if isinstance(self.plugin, plugins.v1.PluginV1):
             self.plugin.clean_pull()
         self.mark_cleaned(steps.PULL)
@@ -859,8 +873,14 @@ class PluginHandler:
         if self.is_clean(steps.STAGE):
             self.mark_stage_done(set(), set())
 
+    def update_stage(self, project_staged_state):
+        self._update_shared_area(steps.STAGE, project_staged_state)
+
     def _do_stage(self):
         snap_files, snap_dirs = self.migratable_fileset_for(steps.STAGE)
+        only_changed = self._remove_stale_files(
+            steps.STAGE, self._project.stage_dir, snap_files, snap_dirs
+        )
 
         def fixup_func(file_path):
             if os.path.islink(file_path):
@@ -877,6 +897,7 @@ class PluginHandler:
             self.part_install_dir,
             self._project.stage_dir,
             fixup_func=fixup_func,
+            only_changed=only_changed,
         )
         # TODO once `snappy try` is in place we will need to copy
         # dependencies here too
@@ -918,6 +939,9 @@ class PluginHandler:
         if self.is_clean(steps.PRIME):
             self.mark_prime_done(set(), set(), set(), set())
 
+    def update_prime(self, project_primed_state):
+        self._update_shared_area(steps.PRIME, project_primed_state)
+
     def _get_primed_stage_packages(self, snap_files: Set[str]) -> Set[str]:
         primed_stage_packages: Set[str] = set()
         for snap_file in snap_files:
@@ -929,8 +953,15 @@ class PluginHandler:
 
     def _do_prime(self) -> None:
         snap_files, snap_dirs = self.migratable_fileset_for(steps.PRIME)
+        only_changed = self._remove_stale_files(
+            steps.PRIME, self._project.prime_dir, snap_files, snap_dirs
+        )
         _migrate_files(
-            snap_files, snap_dirs, self._project.stage_dir, self._project.prime_dir
+            snap_files,
+            snap_dirs,
+            self._project.stage_dir,
+            self._project.prime_dir,
+            only_changed=only_changed,
         )
 
         if (
@@ -947,8 +978,6 @@ class PluginHandler:
         )
 
     def _handle_elf(self, snap_files: Sequence[str]) -> Set[str]:
-        elf_files = elf.get_elf_files(self._project.prime_dir, snap_files)
-        all_dependencies: Set[str] = set()
         if self._project._snap_meta.base is not None:
             core_path = common.get_installed_snap_path(self._project._snap_meta.base)
         else:
@@ -960,15 +989,24 @@ class PluginHandler:
         # Determine content directories.
         content_dirs = self._project._get_provider_content_dirs()
 
-        for elf_file in elf_files:
-            all_dependencies.update(
-                elf_file.load_dependencies(
-                    root_path=self._project.prime_dir,
-                    core_base_path=core_path,
-                    content_dirs=content_dirs,
-                    arch_triplet=self._project.arch_triplet,
-                    soname_cache=self._soname_cache,
-                )
+        workers = common.get_max_workers(self._project.parallel_build_count)
+        with cache.ElfCache(path=self._project._get_elf_cache_file_path()) as elf_cache:
+            elf_files = elf.get_elf_files(
+                self._project.prime_dir,
+                snap_files,
+                workers=workers,
+                elf_cache=elf_cache,
+            )
+            all_dependencies = elf.load_dependencies(
+                elf_files,
+                root_path=self._project.prime_dir,
+                core_base_path=core_path,
+                content_dirs=content_dirs,
+                arch_triplet=self._project.arch_triplet,
+                soname_cache=self._soname_cache,
+                workers=workers,
+                elf_cache=elf_cache,
+                library_index=elf.LibraryIndex(),
             )
 
         # Split the necessary dependencies into their corresponding location.
@@ -1062,18 +1100,76 @@ class PluginHandler:
 
         self.mark_cleaned(steps.PRIME)
 
+    def _update_shared_area(
+        self, step: steps.Step, project_state: Dict[str, states.PartState]
+    ) -> None:
+        """Run step again, only migrating what changed since it last ran.
+
+        Files and directories that are no longer part of the step are
+        removed, unless other parts use them, and only the files that
+        changed are migrated again.  Steps overridden with a scriptlet
+        are cleaned and run again instead.
+        """
+        default_scriptlet = "snapcraftctl {}".format(step.name)
+        override_scriptlet = self._part_properties.get(
+            "override-{}".format(step.name), default_scriptlet
+        )
+        if override_scriptlet != default_scriptlet:
+            getattr(self, "clean_{}".format(step.name))(project_state)
+            getattr(self, step.name)()
+            return
+
+        self._update_project_state = project_state
+        try:
+            getattr(self, step.name)()
+        finally:
+            self._update_project_state = None
+
+    def _remove_stale_files(
+        self,
+        step: steps.Step,
+        shared_directory: str,
+        snap_files: Set[str],
+        snap_dirs: Set[str],
+    ) -> bool:
+        """Remove what step previously migrated that is no longer needed.
+
+        :returns: True if step is being updated incrementally.
+        """
+        if self._update_project_state is None:
+            return False
+
+        state = self.get_state(step)
+        try:
+            stale_files = state.files - snap_files
+            stale_directories = state.directories - snap_dirs
+        except AttributeError:
+            raise errors.MissingStateCleanError(step)
+
+        self._clean_shared_files(
+            shared_directory,
+            stale_files,
+            stale_directories,
+            self._update_project_state,
+        )
+        return True
+
     def _clean_shared_area(self, shared_directory, part_state, project_state):
-        primed_files = part_state.files
-        primed_directories = part_state.directories
+        self._clean_shared_files(
+            shared_directory, part_state.files, part_state.directories, project_state
+        )
 
+    def _clean_shared_files(
+        self, shared_directory, primed_files, primed_directories, project_state
+    ):
         # We want to make sure we don't remove a file or directory that's
         # being used by another part. So we'll examine the state for all parts
         # in the project and leave any files or directories found to be in
         # common.
         for other_name, other_state in project_state.items():
             if other_state and (other_name != self.name):
-                primed_files -= other_state.files
-                primed_directories -= other_state.directories
+                primed_files = primed_files - other_state.files
+                primed_directories = primed_directories - other_state.directories
 
         # Finally, clean the files and directories that are specific to this
         # part.
@@ -1227,44 +1323,54 @@ def _migratable_filesets(fileset, srcdir):
 
     # Chop files, including whole trees if any dirs are mentioned.
     snap_files = include_files - exclude_files
-    for exclude_dir in exclude_dirs:
-        snap_files = set([x for x in snap_files if not x.startswith(exclude_dir + "/")])
+    if exclude_dirs:
+        exclude_prefixes = tuple(d + "/" for d in exclude_dirs)
+        snap_files = set([x for x in snap_files if not x.startswith(exclude_prefixes)])
 
     # Separate dirs from files.
-    snap_dirs = set(
-        [
-            x
-            for x in snap_files
-            if os.path.isdir(os.path.join(srcdir, x))
-            and not os.path.islink(os.path.join(srcdir, x))
-        ]
-    )
+    snap_dirs = set([x for x in snap_files if _is_real_dir(os.path.join(srcdir, x))])
 
     # Remove snap_dirs from snap_files.
     snap_files = snap_files - snap_dirs
 
+    # Parents are shared by many paths, only resolve each of them once.
+    resolved_parents: Dict[str, str] = dict()
+
+    def _resolve(relative_path: str) -> str:
+        # Same as file_utils.get_resolved_relative_path.
+        parent_relpath, filename = os.path.split(relative_path)
+        try:
+            parent_abspath = resolved_parents[parent_relpath]
+        except KeyError:
+            parent_abspath = os.path.realpath(os.path.join(srcdir, parent_relpath))
+            resolved_parents[parent_relpath] = parent_abspath
+        return os.path.relpath(os.path.join(parent_abspath, filename), srcdir)
+
+    resolved_snap_files = set(_resolve(snap_file) for snap_file in snap_files)
+
     # Include (resolved) parent directories for each selected file.
-    for snap_file in snap_files:
-        snap_file = file_utils.get_resolved_relative_path(snap_file, srcdir)
+    parent_dirs: Set[str] = set()
+    for snap_file in resolved_snap_files:
         dirname = os.path.dirname(snap_file)
-        while dirname:
-            snap_dirs.add(dirname)
+        # Once a parent is added, so are all of its own parents.
+        while dirname and dirname not in parent_dirs:
+            parent_dirs.add(dirname)
             dirname = os.path.dirname(dirname)
 
-    # Resolve parent paths for dirs and files.
-    resolved_snap_dirs = set()
-    for snap_dir in snap_dirs:
-        snap_dir = file_utils.get_resolved_relative_path(snap_dir, srcdir)
-        resolved_snap_dirs.add(snap_dir)
-
-    resolved_snap_files = set()
-    for snap_file in snap_files:
-        snap_file = file_utils.get_resolved_relative_path(snap_file, srcdir)
-        resolved_snap_files.add(snap_file)
+    # Resolve parent paths for dirs.
+    resolved_snap_dirs = set(_resolve(snap_dir) for snap_dir in snap_dirs | parent_dirs)
 
     return resolved_snap_files, resolved_snap_dirs
 
 
+def _is_real_dir(path: str) -> bool:
+    """Return True if path is a directory and not a symlink to one."""
+    try:
+        return stat.S_ISDIR(os.lstat(path).st_mode)
+    except OSError:
+        return False
+
+
 def _migrate_files(
     snap_files,
     snap_dirs,
@@ -1273,11 +1379,20 @@ def _migrate_files(
     missing_ok=False,
     follow_symlinks=False,
     fixup_func=lambda *args: None,
+    only_changed=False,
 ):
+    """Migrate snap_files and snap_dirs from srcdir into dstdir.
+
+    If only_changed is set, existing directories and files which are already
+    up to date in dstdir are left untouched.
+    """
     for snap_dir in sorted(snap_dirs):
         src = os.path.join(srcdir, snap_dir)
         dst = os.path.join(dstdir, snap_dir)
 
+        if only_changed and os.path.isdir(dst):
+            continue
+
         snapcraft_legacy.file_utils.create_similar_directory(src, dst)
 
     for snap_file in sorted(snap_files):
@@ -1291,6 +1406,10 @@ def _migrate_files(
         if os.path.islink(dst):
             continue
 
+        # pkg-config files are always fixed up again as they depend on dstdir.
+        if only_changed and not src.endswith(".pc") and _is_migrated(src, dst):
+            continue
+
         # Otherwise, remove and re-link it.
         if os.path.exists(dst):
             os.remove(dst)
@@ -1303,6 +1422,25 @@ def _migrate_files(
         fixup_func(dst)
 
 
+def _is_migrated(src: str, dst: str) -> bool:
+    """Return True if dst is a link to or an unmodified copy of src."""
+    try:
+        src_stat = os.stat(src)
+        dst_stat = os.lstat(dst)
+    except FileNotFoundError:
+        return False
+
+    if (src_stat.st_dev, src_stat.st_ino) == (dst_stat.st_dev, dst_stat.st_ino):
+        return True
+
+    # Copies preserve the modification time of the source.
+    return (
+        stat.S_ISREG(dst_stat.st_mode)
+        and src_stat.st_size == dst_stat.st_size
+        and src_stat.st_mtime_ns == dst_stat.st_mtime_ns
+    )
+
+
 def _organize_filesets(part_name, fileset, base_dir, overwrite):
     for key in sorted(fileset, key=lambda x: ["*" in x, x]):
         src = os.path.join(base_dir, key)
@@ -1452,10 +1590,98 @@ def _validate_relative_paths(files):
             raise errors.PluginError('path "{}" must be relative'.format(d))
 
 
-def _file_collides(file_this, file_other):
-    if not file_this.endswith(".pc"):
-        return not filecmp.cmp(file_this, file_other, shallow=False)
+class _PathComparer:
+    """Compare paths across parts, caching metadata and content hashes.
+
+    Every path is only stat'ed once and the contents of every file are
+    only read once, however many parts stage it.
+    """
+
+    def __init__(self) -> None:
+        self._stats: Dict[str, Optional[os.stat_result]] = dict()
+        self._digests: Dict[Tuple[int, int], str] = dict()
+
+    def _lstat(self, path: str) -> Optional[os.stat_result]:
+        try:
+            return self._stats[path]
+        except KeyError:
+            pass
+
+        try:
+            stat_result: Optional[os.stat_result] = os.lstat(path)
+        except FileNotFoundError:
+            stat_result = None
+        self._stats[path] = stat_result
+        return stat_result
+
+    def _digest(self, path: str, stat_result: os.stat_result) -> str:
+        key = (stat_result.st_dev, stat_result.st_ino)
+        try:
+            return self._digests[key]
+        except KeyError:
+            digest = file_utils.calculate_hash(path, algorithm="sha256")
+            self._digests[key] = digest
+            return digest
+
+    def paths_collide(self, path1: str, path2: str) -> bool:
+        stat1 = self._lstat(path1)
+        stat2 = self._lstat(path2)
+        if stat1 is None or stat2 is None:
+            return False
+
+        path1_is_link = stat.S_ISLNK(stat1.st_mode)
+        path2_is_link = stat.S_ISLNK(stat2.st_mode)
+
+        # Paths collide if they're both symlinks, but pointing to different places
+        if path1_is_link and path2_is_link:
+            return os.readlink(path1) != os.readlink(path2)
+
+        # Paths collide if one is a symlink, but not the other
+        elif path1_is_link or path2_is_link:
+            return True
+
+        path1_is_dir = stat.S_ISDIR(stat1.st_mode)
+        path2_is_dir = stat.S_ISDIR(stat2.st_mode)
+
+        # Paths collide if one is a directory, but not the other
+        if path1_is_dir != path2_is_dir:
+            return True
+
+        # Paths collide if neither path is a directory, and the files have
+        # different contents
+        elif not path1_is_dir and self._file_collides(path1, stat1, path2, stat2):
+            return True
+
+        # Otherwise, paths do not conflict
+        else:
+            return False
+
+    def _file_collides(
+        self,
+        file_this: str,
+        stat_this: os.stat_result,
+        file_other: str,
+        stat_other: os.stat_result,
+    ) -> bool:
+        # Hard linked files cannot differ.
+        if (stat_this.st_dev, stat_this.st_ino) == (
+            stat_other.st_dev,
+            stat_other.st_ino,
+        ):
+            return False
+
+        if file_this.endswith(".pc"):
+            return _pc_file_collides(file_this, file_other)
+
+        if stat_this.st_size != stat_other.st_size:
+            return True
+
+        return self._digest(file_this, stat_this) != self._digest(
+            file_other, stat_other
+        )
 
+
+def _pc_file_collides(file_this, file_other):
     pc_file_1 = open(file_this)
     pc_file_2 = open(file_other)
 
@@ -1475,68 +1701,52 @@ def _file_collides(file_this, file_other):
 
 
 def check_for_collisions(parts):
-    """Raises a SnapcraftPartConflictError if conflicts are found."""
-    parts_files = {}
-    for part in parts:
+    """Raises a SnapcraftPartConflictError if conflicts are found.
+
+    A single index of paths to the parts staging them is built, so only
+    the paths shared by parts are compared.
+    """
+    # Maps each path to the indices of the parts staging it, in order.
+    path_owners: Dict[str, List[int]] = collections.defaultdict(list)
+    # Maps (part index, other part index) to the paths both stage.
+    common_paths: Dict[Tuple[int, int], List[str]] = collections.defaultdict(list)
+    for index, part in enumerate(parts):
         # Gather our own files up
         part_files, part_directories = part.migratable_fileset_for(steps.STAGE)
-        part_contents = part_files | part_directories
-
-        # Scan previous parts for collisions
-        for other_part_name in parts_files:
-            common = part_contents & parts_files[other_part_name]["files"]
-            conflict_files = []
-            for f in common:
-                this = os.path.join(part.part_install_dir, f)
-                other = os.path.join(parts_files[other_part_name]["installdir"], f)
-
-                if _paths_collide(this, other):
-                    conflict_files.append(f)
+        for path in part_files | part_directories:
+            owners = path_owners[path]
+            for other_index in owners:
+                common_paths[index, other_index].append(path)
+            owners.append(index)
+
+    comparer = _PathComparer()
+
+    def _get_conflict_files(part_indices: Tuple[int, int]) -> List[str]:
+        part = parts[part_indices[0]]
+        other_part = parts[part_indices[1]]
+        return [
+            f
+            for f in common_paths[part_indices]
+            if comparer.paths_collide(
+                os.path.join(part.part_install_dir, f),
+                os.path.join(other_part.part_install_dir, f),
+            )
+        ]
 
+    # Report the first conflict in part order, as a serial scan would.
+    part_pairs = sorted(common_paths)
+    workers = common.get_max_workers(os.cpu_count() or 1)
+    with concurrent.futures.ThreadPoolExecutor(max_workers=workers) as executor:
+        for part_indices, conflict_files in zip(
+            part_pairs, executor.map(_get_conflict_files, part_pairs)
+        ):
             if conflict_files:
                 raise errors.SnapcraftPartConflictError(
-                    other_part_name=other_part_name,
-                    part_name=part.name,
+                    other_part_name=parts[part_indices[1]].name,
+                    part_name=parts[part_indices[0]].name,
                     conflict_files=conflict_files,
                 )
 
-        # And add our files to the list
-        parts_files[part.name] = {
-            "files": part_contents,
-            "installdir": part.part_install_dir,
-        }
-
-
-def _paths_collide(path1: str, path2: str) -> bool:
-    if not (os.path.lexists(path1) and os.path.lexists(path2)):
-        return False
-
-    path1_is_dir = os.path.isdir(path1)
-    path2_is_dir = os.path.isdir(path2)
-    path1_is_link = os.path.islink(path1)
-    path2_is_link = os.path.islink(path2)
-
-    # Paths collide if they're both symlinks, but pointing to different places
-    if path1_is_link and path2_is_link:
-        return os.readlink(path1) != os.readlink(path2)
-
-    # Paths collide if one is a symlink, but not the other
-    elif path1_is_link or path2_is_link:
-        return True
-
-    # Paths collide if one is a directory, but not the other
-    elif path1_is_dir != path2_is_dir:
-        return True
-
-    # Paths collide if neither path is a directory, and the files have
-    # different contents
-    elif not (path1_is_dir and path2_is_dir) and _file_collides(path1, path2):
-        return True
-
-    # Otherwise, paths do not conflict
-    else:
-        return False
-
 
 def _get_includes(fileset):
     return [x for x in fileset if x[0] != "-"]
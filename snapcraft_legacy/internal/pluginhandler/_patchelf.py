@@ -19,7 +19,7 @@ import os
 from typing import Dict  # noqa: F401
 from typing import FrozenSet, List
 
-from snapcraft_legacy.internal import elf, errors
+from snapcraft_legacy.internal import common, elf, errors
 from snapcraft_legacy.project import Project
 
 logger = logging.getLogger(__name__)
@@ -79,10 +79,11 @@ class PartPatcher:
         # Patching all files instead of a subset of them to ensure the
         # environment is consistent and the chain of dlopens that may
         # happen remains sane.
-        for elf_file in self._elf_files:
+        # The work is done by patchelf subprocesses, so threads suffice.
+        def patch(elf_file: elf.ElfFile) -> None:
             try:
                 elf_patcher.patch(elf_file=elf_file)
-            except errors.PatcherError as patch_error:
+            except errors.PatcherError:
                 logger.warning(
                     "An attempt to patch {!r} so that it would work "
                     "correctly in diverse environments was made and failed. "
@@ -91,7 +92,11 @@ class PartPatcher:
                         elf_file.path
                     )
                 )
-                raise patch_error
+                raise
+
+        workers = common.get_max_workers(self._project.parallel_build_count)
+        for _ in common.run_concurrently(patch, self._elf_files, max_workers=workers):
+            pass
 
     def _verify_compat(self) -> None:
         if self._project._snap_meta.base is None:
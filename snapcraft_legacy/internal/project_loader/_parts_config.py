@@ -14,11 +14,11 @@
 # You should have received a copy of the GNU General Public License
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
+import heapq
 import logging
 from collections import ChainMap
 from os import path
-from typing import Set  # noqa: F401
-from typing import List
+from typing import Dict, List, Set
 
 import snapcraft_legacy
 from snapcraft_legacy.internal import elf, pluginhandler, repo
@@ -72,43 +72,52 @@ class PartsConfig:
     def _compute_dependencies(self):
         """Gather the lists of dependencies and adds to all_parts."""
 
+        parts = {part.name: part for part in self.all_parts}
         for part in self.all_parts:
             dep_names = self.after_requests.get(part.name, [])
             for dep_name in dep_names:
-                dep = self.get_part(dep_name)
+                dep = parts.get(dep_name)
                 if not dep:
                     raise errors.SnapcraftAfterPartMissingError(part.name, dep_name)
 
                 part.deps.append(dep)
 
     def _sort_parts(self):
-        """Performs an inneficient but easy to follow sorting of parts."""
-        sorted_parts = []
+        """Sort parts so that each part comes after its dependencies.
+
+        Ties are broken on the part names, so parts are processed in a
+        consistent order between runs.
+        """
+        # Walk the graph from the parts nothing depends on, peeling off
+        # the part that sorts last by name; the result is the reverse of
+        # that walk.
+        ranks = {
+            part.name: rank
+            for rank, part in enumerate(sorted(self.all_parts, key=lambda p: p.name))
+        }
+        dependents = {part.name: 0 for part in self.all_parts}
+        for part in self.all_parts:
+            for dep in set(part.deps):
+                dependents[dep.name] += 1
 
-        # We want to process parts in a consistent order between runs. The
-        # simplest way to do this is to sort them by name.
-        self.all_parts = sorted(
-            self.all_parts, key=lambda part: part.name, reverse=True
-        )
+        ready = [(-ranks[p.name], p) for p in self.all_parts if not dependents[p.name]]
+        heapq.heapify(ready)
 
-        while self.all_parts:
-            top_part = None
-            for part in self.all_parts:
-                mentioned = False
-                for other in self.all_parts:
-                    if part in other.deps:
-                        mentioned = True
-                        break
-                if not mentioned:
-                    top_part = part
-                    break
-            if not top_part:
-                raise errors.SnapcraftLogicError(
-                    "circular dependency chain found in parts definition"
-                )
-            sorted_parts = [top_part] + sorted_parts
-            self.all_parts.remove(top_part)
+        sorted_parts = []
+        while ready:
+            _, part = heapq.heappop(ready)
+            sorted_parts.append(part)
+            for dep in set(part.deps):
+                dependents[dep.name] -= 1
+                if not dependents[dep.name]:
+                    heapq.heappush(ready, (-ranks[dep.name], dep))
+
+        if len(sorted_parts) != len(self.all_parts):
+            raise errors.SnapcraftLogicError(
+                "circular dependency chain found in parts definition"
+            )
 
+        sorted_parts.reverse()
         return sorted_parts
 
     def get_dependencies(
@@ -117,17 +126,17 @@ class PartsConfig:
         """Returns a set of all the parts upon which part_name depends."""
 
         dependency_names = set(self.after_requests.get(part_name, []))
-        dependencies = {p for p in self.all_parts if p.name in dependency_names}
 
         if recursive:
-            # No need to worry about infinite recursion due to circular
-            # dependencies since the YAML validation won't allow it.
-            for dependency_name in dependency_names:
-                dependencies |= self.get_dependencies(
-                    dependency_name, recursive=recursive
-                )
+            # Walk each dependency once, shared dependencies are common.
+            pending = list(dependency_names)
+            while pending:
+                for name in self.after_requests.get(pending.pop(), []):
+                    if name not in dependency_names:
+                        dependency_names.add(name)
+                        pending.append(name)
 
-        return dependencies
+        return {p for p in self.all_parts if p.name in dependency_names}
 
     def get_reverse_dependencies(
         self, part_name: str, *, recursive: bool = False
@@ -218,48 +227,70 @@ class PartsConfig:
     def build_env_for_part(self, part, root_part=True) -> List[str]:
         """Return a build env of all the part's dependencies."""
 
-        env = []  # type: List[str]
         stagedir = self._project.stage_dir
-
-        if root_part:
-            # this has to come before any {}/usr/bin
-            env += part.env(part.part_install_dir)
-            env += runtime_env(part.part_install_dir, self._project.arch_triplet)
-            env += runtime_env(stagedir, self._project.arch_triplet)
-            env += build_env(
-                part.part_install_dir,
-                self._project.info.name,
-                self._project.arch_triplet,
-            )
-            env += build_env_for_stage(
-                stagedir, self._project.info.name, self._project.arch_triplet
+        # The stage directory does not change while the environment is
+        # computed, so probe it and walk each dependency only once.
+        stage_env = runtime_env(stagedir, self._project.arch_triplet)
+        dependency_envs = dict()  # type: Dict[str, List[str]]
+
+        if not root_part:
+            return list(
+                self._build_env_for_dependency(part, stage_env, dependency_envs)
             )
 
-            global_env = get_snapcraft_global_environment(self._project)
-            part_env = get_snapcraft_part_directory_environment(part)
+        env = []  # type: List[str]
+
+        # this has to come before any {}/usr/bin
+        env += part.env(part.part_install_dir)
+        env += runtime_env(part.part_install_dir, self._project.arch_triplet)
+        env += stage_env
+        env += build_env(
+            part.part_install_dir, self._project.info.name, self._project.arch_triplet
+        )
+        env += build_env_for_stage(
+            stagedir, self._project.info.name, self._project.arch_triplet
+        )
+
+        global_env = get_snapcraft_global_environment(self._project)
+        part_env = get_snapcraft_part_directory_environment(part)
 
-            for variable, value in ChainMap(part_env, global_env).items():
-                env.append('{}="{}"'.format(variable, value))
+        for variable, value in ChainMap(part_env, global_env).items():
+            env.append('{}="{}"'.format(variable, value))
 
-            # Finally, add the declared environment from the part.
-            # This is done only for the "root" part.
-            for be in part.build_environment:
-                env.extend([f'{k}="{v}"' for k, v in be.items()])
-        else:
-            env += part.env(stagedir)
-            env += runtime_env(stagedir, self._project.arch_triplet)
+        # Finally, add the declared environment from the part.
+        # This is done only for the "root" part.
+        for be in part.build_environment:
+            env.extend([f'{k}="{v}"' for k, v in be.items()])
 
         for dep_part in part.deps:
-            env += dep_part.env(stagedir)
-            env += self.build_env_for_part(dep_part, root_part=False)
-
-        # LP: #1767625
-        # Remove duplicates from using the same plugin in dependent parts.
-        seen = set()  # type: Set[str]
-        deduped_env = list()  # type: List[str]
-        for e in env:
-            if e not in seen:
-                deduped_env.append(e)
-                seen.add(e)
-
-        return deduped_env
+            env += self._build_env_for_dependency(dep_part, stage_env, dependency_envs)
+
+        return _deduplicate(env)
+
+    def _build_env_for_dependency(
+        self, part, stage_env: List[str], dependency_envs: Dict[str, List[str]]
+    ) -> List[str]:
+        if part.name not in dependency_envs:
+            env = list(part.env(self._project.stage_dir))
+            env += stage_env
+            for dep_part in part.deps:
+                env += self._build_env_for_dependency(
+                    dep_part, stage_env, dependency_envs
+                )
+
+            dependency_envs[part.name] = _deduplicate(env)
+
+        return dependency_envs[part.name]
+
+
+def _deduplicate(env: List[str]) -> List[str]:
+    # LP: #1767625
+    # Remove duplicates from using the same plugin in dependent parts.
+    seen = set()  # type: Set[str]
+    deduped_env = list()  # type: List[str]
+    for e in env:
+        if e not in seen:
+            deduped_env.append(e)
+            seen.add(e)
+
+    return deduped_env
@@ -14,6 +14,8 @@
 # You should have received a copy of the GNU General Public License
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
+import hashlib
+import json
 import logging
 import os
 import pathlib
@@ -21,11 +23,13 @@ import shutil
 import subprocess
 from collections import OrderedDict
 from copy import deepcopy
+from typing import Optional, Set
 
 import snapcraft_legacy
 import snapcraft_legacy.internal.sources
 from snapcraft_legacy import yaml_utils
-from snapcraft_legacy.file_utils import rmtree
+from snapcraft_legacy.file_utils import link_or_copy, rmtree
+from snapcraft_legacy.internal import common
 from snapcraft_legacy.internal.meta import _version
 from snapcraft_legacy.internal.remote_build import errors
 from snapcraft_legacy.project import Project
@@ -66,6 +70,12 @@ class WorkTree:
         self._cache_dir = os.path.join(self._base_dir, "cache")
         os.makedirs(self._cache_dir, exist_ok=True)
 
+        # Source archives from previous runs, named after the fingerprint
+        # of what they were made from.
+        self._archives_dir = os.path.join(self._base_dir, "archives")
+        os.makedirs(self._archives_dir, exist_ok=True)
+        self._used_archives: Set[str] = set()
+
         # Initialize clean repo to ship to remote builder.
         self._repo_dir = os.path.join(self._base_dir, "repo")
         if os.path.exists(self._repo_dir):
@@ -131,11 +141,74 @@ class WorkTree:
             )
         return os.path.join(self._repo_sources_dir, part_name, tarball_filename)
 
-    def _archive_part_sources(self, part_name: str, selector=None):
+    def _get_source_fingerprint(
+        self, part_name: str, source: str, source_handler, selector=None
+    ) -> Optional[str]:
+        """Get a digest identifying the sources pulled for a part.
+
+        Local sources are identified by the paths, sizes and modification
+        times of the files pulled from them, others only if pinned to an
+        exact revision.
+
+        :param str part_name: Name of part.
+        :param str source: Source URL.
+        :param source_handler: Source handler for source.
+        :param str selector: Source selector, if any (e.g. "on amd64").
+        :return: The fingerprint, or None if it cannot be known without
+                 pulling.
+        """
+        part_config = self._snapcraft_config["parts"][part_name]
+        source_properties = {
+            key: value
+            for key, value in part_config.items()
+            if key.startswith("source-") and key != "source-subdir"
+        }
+        hasher = hashlib.sha256()
+        hasher.update(
+            json.dumps(
+                [
+                    part_name,
+                    selector,
+                    source,
+                    part_config.get("plugin") == "dump",
+                    source_properties,
+                ],
+                sort_keys=True,
+                default=str,
+            ).encode()
+        )
+
+        if isinstance(source_handler, snapcraft_legacy.internal.sources.Local):
+            for root, directories, files in source_handler.walk():
+                directories.sort()
+                for name in directories + sorted(files):
+                    path = os.path.join(root, name)
+                    stat = os.lstat(path)
+                    hasher.update(
+                        "{}\0{}\0{}\0{}\0{}\n".format(
+                            os.path.relpath(path, source_handler.source_abspath),
+                            stat.st_mode,
+                            stat.st_size,
+                            stat.st_mtime_ns,
+                            stat.st_ino,
+                        ).encode()
+                    )
+        elif not (
+            part_config.get("source-checksum") or part_config.get("source-commit")
+        ):
+            return None
+
+        return hasher.hexdigest()
+
+    def _archive_part_sources(
+        self, part_name: str, selector=None, fingerprint: Optional[str] = None
+    ):
         """Archive sources at source_dir into archive_path.
 
         :param str part_name: Name of part.
         :param str selector: Source selector, if any (e.g. "on amd64").
+        :param str fingerprint: Fingerprint of the sources, to keep the
+                                archive for later runs.
         :return: Relative path to archive within repository.
         """
         source_path = self._get_part_cache_dir(part_name, selector)
@@ -144,13 +217,57 @@ class WorkTree:
         logger.debug("creating source archive: {}".format(archive_path))
 
         os.makedirs(os.path.split(archive_path)[0], exist_ok=True)
-        command = ["tar", "czf", archive_path, "-C", source_path, "."]
+        if os.path.exists(archive_path):
+            os.unlink(archive_path)
+        if shutil.which("pigz"):
+            # Compatible with gzip, but compresses using all cores.
+            command = ["tar", "-I", "pigz", "-cf", archive_path, "-C", source_path, "."]
+        else:
+            command = ["tar", "czf", archive_path, "-C", source_path, "."]
         subprocess.check_call(command)
+
+        if fingerprint is not None:
+            link_or_copy(archive_path, self._get_cached_archive_path(fingerprint))
+
+        return self._get_archive_relpath(archive_path)
+
+    def _get_cached_archive_path(self, fingerprint: str) -> str:
+        self._used_archives.add(fingerprint)
+        return os.path.join(self._archives_dir, fingerprint + ".tar.gz")
+
+    def _reuse_archive(self, part_name: str, fingerprint: str, selector=None):
+        """Reuse an archive made from sources with fingerprint, if any.
+
+        :param str part_name: Name of part.
+        :param str fingerprint: Fingerprint of the sources.
+        :param str selector: Source selector, if any (e.g. "on amd64").
+        :return: Relative path to archive within repository, or None.
+        """
+        cached_archive_path = self._get_cached_archive_path(fingerprint)
+        if not os.path.exists(cached_archive_path):
+            return None
+
+        archive_path = self._get_part_tarball_path(part_name, selector)
+        logger.debug("reusing source archive: {}".format(archive_path))
+        os.makedirs(os.path.split(archive_path)[0], exist_ok=True)
+        if os.path.exists(archive_path):
+            os.unlink(archive_path)
+        link_or_copy(cached_archive_path, archive_path)
+        return self._get_archive_relpath(archive_path)
+
+    def _get_archive_relpath(self, archive_path: str) -> str:
         relpath = os.path.relpath(archive_path, self._repo_dir)
 
         # Ensure Linux path formatting is used.
         return pathlib.Path(relpath).as_posix()
 
+    def _prune_archives(self) -> None:
+        """Remove archives which were not used by the last run."""
+        for archive_name in os.listdir(self._archives_dir):
+            fingerprint = archive_name[: -len(".tar.gz")]
+            if fingerprint not in self._used_archives:
+                os.unlink(os.path.join(self._archives_dir, archive_name))
+
     def _pull_source(self, part_name: str, source: str, selector=None) -> str:
         """Pull source_url for part to source_dir. Returns source.
 
@@ -179,6 +296,15 @@ class WorkTree:
             logger.debug("passing through source for {}: {}".format(print_name, source))
             return source
 
+        fingerprint = self._get_source_fingerprint(
+            part_name, source, source_handler, selector
+        )
+        if fingerprint is not None:
+            archive_relpath = self._reuse_archive(part_name, fingerprint, selector)
+            if archive_relpath is not None:
+                logger.info("Sources for {} are unchanged.".format(print_name))
+                return archive_relpath
+
         logger.info("Packaging sources for {}...".format(print_name))
 
         # Remove existing cache directory (if exists)
@@ -193,7 +319,7 @@ class WorkTree:
         source_handler.pull()
 
         # Create source archive.
-        return self._archive_part_sources(part_name, selector)
+        return self._archive_part_sources(part_name, selector, fingerprint)
 
     def _process_part_sources(
         self, part_name: str, part_config: OrderedDict
@@ -321,10 +447,19 @@ class WorkTree:
         # Create sources directory for source archives.
         os.makedirs(self._repo_sources_dir, exist_ok=True)
 
-        # Process each part with sources.
-        for part_name, part_config in self._snapcraft_config["parts"].items():
-            part_config = self._process_part_sources(part_name, part_config)
-            self._prepared_snapcraft_config["parts"][part_name] = part_config
+        # Process each part with sources, packaging them concurrently as
+        # most of the time is spent in tar and file system calls.
+        parts = self._snapcraft_config["parts"]
+        self._used_archives = set()
+        workers = common.get_max_workers(os.cpu_count() or 1)
+        prepared_parts = common.run_concurrently(
+            lambda part: self._process_part_sources(*part),
+            parts.items(),
+            max_workers=workers,
+        )
+        for part_name, prepared_part in zip(parts, prepared_parts):
+            self._prepared_snapcraft_config["parts"][part_name] = prepared_part
+        self._prune_archives()
 
         # Set version.
         self._set_prepared_project_version()
@@ -24,6 +24,7 @@ import pathlib
 import re
 import shutil
 import stat
+import tempfile
 from typing import List, Optional, Set
 
 from snapcraft_legacy import file_utils
@@ -51,6 +52,9 @@ class BaseRepo:
     At the end of the `unpack` method `normalize` needs to be called to
     adapt the artifacts downloaded to be generic enough for building a snap."""
 
+    # The version of the modifications done by normalize_package.
+    _NORMALIZE_PACKAGE_VERSION = 2
+
     @classmethod
     def get_package_libraries(cls, package_name: str) -> Set[str]:
         """Return a list of libraries in package_name.
@@ -202,8 +206,31 @@ class BaseRepo:
         """
         cls._remove_useless_files(unpackdir)
         cls._fix_artifacts(unpackdir)
-        cls._fix_xml_tools(unpackdir)
-        cls._fix_shebangs(unpackdir)
+
+    @classmethod
+    def normalize_package(cls, unpackdir: str) -> None:
+        """Normalize the artifacts of a single package in unpackdir.
+
+        Only the modifications done by normalize that do not depend on where
+        the package is installed, or on other packages, are performed. This
+        allows for unpacked packages to be cached and normalize to leave
+        their files untouched when they are installed.
+
+        Bump _NORMALIZE_PACKAGE_VERSION when these modifications change.
+
+        :param str unpackdir: directory where the package was unpacked.
+        """
+        cls._remove_useless_files(unpackdir)
+        for root, dirs, files in os.walk(unpackdir):
+            for entry in itertools.chain(files, dirs):
+                path = os.path.join(root, entry)
+                mode = os.lstat(path).st_mode
+                if stat.S_ISLNK(mode):
+                    continue
+
+                _fix_filemode(path, mode)
+                if stat.S_ISREG(mode):
+                    cls._fix_shebang(path)
 
     @classmethod
     def _mark_origin_stage_package(
@@ -242,41 +269,50 @@ class BaseRepo:
 
         Some unpacked items will also contain suid binaries which we do not
         want in the resulting snap.
+
+        Hard-coded prefixes in pkg-config files and xml tools, as well as
+        python shebangs, are fixed too. All of it is done in a single walk
+        as unpacked trees can be large.
         """
+        xml_tools = {
+            os.path.join(unpackdir, "usr", "bin", "xml2-config"),
+            os.path.join(unpackdir, "usr", "bin", "xslt-config"),
+        }
+
         for root, dirs, files in os.walk(unpackdir):
             # Symlinks to directories will be in dirs, while symlinks to
             # non-directories will be in files.
             for entry in itertools.chain(files, dirs):
                 path = os.path.join(root, entry)
-                if os.path.islink(path):
+                try:
+                    mode = os.lstat(path).st_mode
+                except FileNotFoundError:
+                    continue
+
+                if stat.S_ISLNK(mode):
                     cls._fix_symlink(path, unpackdir)
-                elif os.path.exists(path):
-                    _fix_filemode(path)
-
-                if (
-                    path.endswith(".pc")
-                    and os.path.isfile(path)
-                    and not os.path.islink(path)
-                ):
+                    continue
+
+                _fix_filemode(path, mode)
+                if not stat.S_ISREG(mode):
+                    continue
+
+                if path.endswith(".pc"):
                     fix_pkg_config(unpackdir, path)
+                if path in xml_tools:
+                    cls._fix_xml_tool(path, unpackdir)
+                cls._fix_shebang(path)
 
     @classmethod
-    def _fix_xml_tools(cls, unpackdir: str) -> None:
-        xml2_config_path = os.path.join(unpackdir, "usr", "bin", "xml2-config")
-        with contextlib.suppress(FileNotFoundError):
-            file_utils.search_and_replace_contents(
-                xml2_config_path,
-                re.compile(r"prefix=/usr"),
-                "prefix={}/usr".format(unpackdir),
-            )
-
-        xslt_config_path = os.path.join(unpackdir, "usr", "bin", "xslt-config")
-        with contextlib.suppress(FileNotFoundError):
-            file_utils.search_and_replace_contents(
-                xslt_config_path,
-                re.compile(r"prefix=/usr"),
-                "prefix={}/usr".format(unpackdir),
-            )
+    def _fix_xml_tool(cls, xml_tool_path: str, unpackdir: str) -> None:
+        # The prefix depends on unpackdir, so the file cannot be shared with
+        # a cached package.
+        _break_hard_link(xml_tool_path)
+        file_utils.search_and_replace_contents(
+            xml_tool_path,
+            re.compile(r"prefix=/usr"),
+            "prefix={}/usr".format(unpackdir),
+        )
 
     @classmethod
     def _fix_symlink(cls, symlink_path: str, unpack_dir: str) -> None:
@@ -319,9 +355,9 @@ class BaseRepo:
         logger.warning("%r will be a dangling symlink", relative_link)
 
     @classmethod
-    def _fix_shebangs(cls, unpackdir: str) -> None:
-        """Change hard-coded shebangs in unpacked files to use env."""
-        mangling.rewrite_python_shebangs(unpackdir)
+    def _fix_shebang(cls, file_path: str) -> None:
+        """Change a hard-coded shebang in an unpacked file to use env."""
+        mangling.rewrite_python_shebang(file_path)
 
 
 class DummyRepo(BaseRepo):
@@ -352,13 +388,29 @@ def fix_pkg_config(
                 print(line, end="")
 
 
-def _fix_filemode(path: str) -> None:
-    mode = stat.S_IMODE(os.stat(path, follow_symlinks=False).st_mode)
+def _fix_filemode(path: str, st_mode: Optional[int] = None) -> None:
+    if st_mode is None:
+        st_mode = os.stat(path, follow_symlinks=False).st_mode
+    mode = stat.S_IMODE(st_mode)
     if mode & 0o4000 or mode & 0o2000:
         logger.warning("Removing suid/guid from {}".format(path))
         os.chmod(path, mode & 0o1777)
 
 
+def _break_hard_link(path: str) -> None:
+    if os.stat(path).st_nlink < 2:
+        return
+
+    fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(path))
+    os.close(fd)
+    try:
+        shutil.copy2(path, temp_path)
+        os.replace(temp_path, path)
+    except OSError:
+        os.unlink(temp_path)
+        raise
+
+
 def get_pkg_name_parts(pkg_name):
     """Break package name into base parts"""
 
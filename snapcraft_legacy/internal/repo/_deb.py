@@ -16,18 +16,20 @@
 
 import fileinput
 import functools
+import io
 import logging
 import os
 import pathlib
 import re
 import subprocess
 import sys
-import tempfile
+import tarfile
 from typing import Dict, List, Optional, Set, Tuple  # noqa: F401
 
 from xdg import BaseDirectory
 
 from snapcraft_legacy import file_utils
+from snapcraft_legacy.internal import cache, common
 from snapcraft_legacy.internal.indicators import is_dumb_terminal
 
 from . import errors
@@ -280,6 +282,55 @@ def get_packages_in_base(*, base: str) -> List[DebPackage]:
     return package_list
 
 
+def _copy_cached_file(source: str, destination: str) -> None:
+    file_utils.reflink_or_copy(source, destination, follow_symlinks=False)
+
+
+def _read_deb_control(deb_path: pathlib.Path) -> Dict[str, str]:
+    """Return the fields of the control file in the deb at deb_path.
+
+    A deb is an ar archive holding a control.tar member with the package
+    metadata, only that member is read.
+
+    :raises ValueError: if deb_path is not a deb or has no control file.
+    :raises tarfile.TarError: if the control member cannot be read.
+    """
+    with open(deb_path, "rb") as deb_file:
+        if deb_file.read(8) != b"!<arch>\n":
+            raise ValueError("not an ar archive")
+
+        while True:
+            # Member headers are 60 bytes: the name in the first 16 and the
+            # size in decimal at offset 48, data is padded to an even size.
+            header = deb_file.read(60)
+            if len(header) < 60:
+                raise ValueError("no control member")
+            name = header[:16].decode("ascii").rstrip(" /")
+            size = int(header[48:58])
+            if name.startswith("control.tar"):
+                control_tar = deb_file.read(size)
+                break
+            deb_file.seek(size + size % 2, os.SEEK_CUR)
+
+    with tarfile.open(fileobj=io.BytesIO(control_tar)) as tar:
+        control_file = None
+        for member in tar.getmembers():
+            if member.isfile() and os.path.normpath(member.name) == "control":
+                control_file = tar.extractfile(member)
+                break
+        if control_file is None:
+            raise ValueError("no control file")
+        control = control_file.read().decode("utf-8")
+
+    fields = dict()
+    for line in control.splitlines():
+        # Continuation lines start with whitespace.
+        if line[:1] not in ("", " ", "\t") and ":" in line:
+            key, value = line.split(":", 1)
+            fields[key] = value.strip()
+    return fields
+
+
 class Ubuntu(BaseRepo):
     @classmethod
     def get_package_libraries(cls, package_name: str) -> Set[str]:
@@ -481,20 +532,53 @@ class Ubuntu(BaseRepo):
     def unpack_stage_packages(
         cls, *, stage_packages_path: pathlib.Path, install_path: pathlib.Path
     ) -> None:
-        pkg_path = None
+        pkg_paths = sorted(stage_packages_path.glob("*.deb"))
+        if not pkg_paths:
+            return
+
+        # Packages are extracted and marked concurrently, the work is mostly
+        # done by dpkg-deb and file system calls so threads suffice. They
+        # are merged into install_path in order as they become available so
+        # that the result does not depend on scheduling.
+        tree_cache = cache.DebTreeCache()
+        workers = common.get_max_workers(os.cpu_count() or 1)
+        for tree_dir in common.run_concurrently(
+            functools.partial(cls._unpack_deb, tree_cache=tree_cache),
+            pkg_paths,
+            max_workers=workers,
+        ):
+            # Stage files to install_dir. The cached trees are shared by all
+            # builds, so they are copied rather than hard-linked: files in
+            # install_dir may be edited in place.
+            file_utils.link_or_copy_tree(
+                tree_dir, install_path.as_posix(), copy_function=_copy_cached_file
+            )
 
-        for pkg_path in stage_packages_path.glob("*.deb"):
-            with tempfile.TemporaryDirectory(suffix="deb-extract") as extract_dir:
-                # Extract deb package.
-                cls._extract_deb(pkg_path, extract_dir)
-                # Mark source of files.
-                marked_name = cls._extract_deb_name_version(pkg_path)
-                cls._mark_origin_stage_package(extract_dir, marked_name)
-                # Stage files to install_dir.
-                file_utils.link_or_copy_tree(extract_dir, install_path.as_posix())
+        tree_cache.prune()
+        cls.normalize(str(install_path))
 
-        if pkg_path:
-            cls.normalize(str(install_path))
+    @classmethod
+    def _unpack_deb(cls, deb_path: pathlib.Path, tree_cache: cache.DebTreeCache) -> str:
+        """Return the path to the cached tree for deb_path, unpacking it if needed."""
+        deb_hash = file_utils.calculate_hash(str(deb_path), algorithm="sha256")
+        key = f"{deb_hash}-{cls._NORMALIZE_PACKAGE_VERSION}"
+        tree_dir = tree_cache.get(key=key)
+        if tree_dir is not None:
+            return tree_dir
+
+        tree_dir = tree_cache.make_tree_dir()
+        try:
+            # Extract deb package.
+            cls._extract_deb(deb_path, tree_dir)
+            # Mark source of files.
+            marked_name = cls._extract_deb_name_version(deb_path)
+            cls._mark_origin_stage_package(tree_dir, marked_name)
+            cls.normalize_package(tree_dir)
+        except Exception:
+            tree_cache.discard(tree_dir=tree_dir)
+            raise
+
+        return tree_cache.add(key=key, tree_dir=tree_dir)
 
     @classmethod
     def build_package_is_valid(cls, package_name) -> bool:
@@ -516,6 +600,15 @@ class Ubuntu(BaseRepo):
 
     @classmethod
     def _extract_deb_name_version(cls, deb_path: pathlib.Path) -> str:
+        # Reading the control file directly avoids forking dpkg-deb, which
+        # is still used for archives using a compression tarfile does not
+        # support.
+        try:
+            control = _read_deb_control(deb_path)
+            return "{}={}".format(control["Package"], control["Version"])
+        except (OSError, ValueError, KeyError, tarfile.TarError) as error:
+            logger.debug(f"Cannot read control file from {deb_path!r}: {error}")
+
         try:
             output = subprocess.check_output(
                 ["dpkg-deb", "--show", "--showformat=${Package}=${Version}", deb_path]
@@ -18,13 +18,17 @@ import contextlib
 import logging
 import os
 import sys
+import threading
 from subprocess import CalledProcessError, check_call, check_output
-from typing import List, Sequence, Set, Union
+from typing import Any, Dict, List, Optional, Sequence, Set, Union
 from urllib import parse
 
 import requests_unixsocket
 from requests import exceptions
 
+from snapcraft_legacy import file_utils
+from snapcraft_legacy.internal import common
+
 from . import errors
 
 _STORE_ASSERTION = [
@@ -33,6 +37,11 @@ _STORE_ASSERTION = [
 ]
 
 _CHANNEL_RISKS = ["stable", "candidate", "beta", "edge"]
+# Where snapd keeps the file of each installed snap revision.
+_SNAPD_SNAPS_DIR = "/var/lib/snapd/snaps"
+# Size of the reads when streaming a snap file from snapd.
+_SNAP_FILE_CHUNK_SIZE = 2**20
+
 logger = logging.getLogger(__name__)
 
 
@@ -65,8 +74,13 @@ class SnapPackage:
             return False
         return cls(snap).installed
 
-    def __init__(self, snap):
-        """Lifecycle handler for a snap of the format <snap-name>/<channel>."""
+    def __init__(self, snap, *, local_snaps: Optional[Dict[str, Any]] = None):
+        """Lifecycle handler for a snap of the format <snap-name>/<channel>.
+
+        :param local_snaps: information on all the installed snaps by name,
+                            as returned by get_local_snaps, to use instead
+                            of querying snapd for this snap.
+        """
         self.name, self.channel = _get_parsed_snap(snap)
         self._original_channel = self.channel
         if not self.channel or self.channel == "stable":
@@ -80,6 +94,10 @@ class SnapPackage:
         self._is_installed = None
         self._is_in_store = None
 
+        if local_snaps is not None:
+            self._local_snap_info = local_snaps.get(self.name)
+            self._is_installed = self._local_snap_info is not None
+
     @property
     def installed(self):
         if self._is_installed is None:
@@ -196,10 +214,29 @@ class SnapPackage:
                 assertion_file.write(get_assertion(assertion))
                 assertion_file.write(b"\n")
 
-        snap_file_iter = _get_local_snap_file_iter(self.name, chunk_size=1024)
-        with open(snap_path, "wb") as snap_file:
-            for buf in snap_file_iter:
-                snap_file.write(buf)
+        # Copying the installed file directly avoids streaming it through
+        # snapd, but requires the privileges to read it.
+        local_snap_path = self._get_local_snap_path()
+        if local_snap_path is not None:
+            file_utils.reflink_or_copy(local_snap_path, snap_path)
+        else:
+            _download_local_snap_file(self.name, snap_path)
+
+    def _get_local_snap_path(self) -> Optional[str]:
+        """Return the path to the installed snap file, if it is readable."""
+        local_snap_info = self.get_local_snap_info()
+        local_snap_path = os.path.join(
+            _SNAPD_SNAPS_DIR,
+            "{}_{}.snap".format(self.name, local_snap_info["revision"]),
+        )
+        if not os.access(local_snap_path, os.R_OK):
+            return None
+
+        installed_size = local_snap_info.get("installed-size")
+        if installed_size is not None:
+            if os.path.getsize(local_snap_path) != installed_size:
+                return None
+        return local_snap_path
 
     def download(self, *, directory: str = None):
         """Downloads a given snap."""
@@ -273,32 +310,39 @@ def download_snaps(*, snaps_list: Sequence[str], directory: str) -> None:
     # TODO manifest.yaml with snap revision from future machine output
     # for `snap download`.
     os.makedirs(directory, exist_ok=True)
-    for snap in snaps_list:
-        snap_pkg = SnapPackage(snap)
 
+    def download(snap_pkg: SnapPackage) -> None:
         # TODO: use dependency injected echoer
         logger.info("Downloading snap {!r}".format(snap_pkg.name))
         snap_pkg.download(directory=directory)
 
+    # Each snap is downloaded by its own `snap download`, let them run at
+    # the same time.
+    _run_concurrently(download, [SnapPackage(snap) for snap in snaps_list])
+
 
 def install_snaps(snaps_list: Union[Sequence[str], Set[str]]) -> List[str]:
     """Install snaps of the format <snap-name>/<channel>.
 
     :return: a list of "name=revision" for the snaps installed.
     """
-    snaps_installed = []
-    for snap in snaps_list:
-        snap_pkg = SnapPackage(snap)
+    # Find out what is installed with a single request, and look all the
+    # snaps up in the store at once.
+    local_snaps = get_local_snaps()
+    snap_pkgs = [SnapPackage(snap, local_snaps=local_snaps) for snap in snaps_list]
+    snap_infos = _run_concurrently(SnapPackage.get_store_snap_info, snap_pkgs)
 
+    snaps_installed = []
+    for snap_pkg, snap_info in zip(snap_pkgs, snap_infos):
         # Allow bases to be installed from non stable channels.
-        snap_info = snap_pkg.get_store_snap_info()
         snap_pkg_channel = snap_info["channel"]
         snap_pkg_type = snap_info["type"]
         if snap_pkg_channel != "stable" and snap_pkg_type == "base":
             snap_pkg = SnapPackage(
                 "{snap_name}/latest/{channel}".format(
                     snap_name=snap_pkg.name, channel=snap_pkg_channel
-                )
+                ),
+                local_snaps=local_snaps,
             )
 
         if not snap_pkg.installed:
@@ -310,6 +354,19 @@ def install_snaps(snaps_list: Union[Sequence[str], Set[str]]) -> List[str]:
     return snaps_installed
 
 
+def _run_concurrently(function, snap_pkgs: List[SnapPackage]) -> List[Any]:
+    """Call function on each of snap_pkgs concurrently.
+
+    :return: the results in the order of snap_pkgs.
+    :raises: the error raised for the first of snap_pkgs that failed.
+    """
+    if not snap_pkgs:
+        return []
+
+    workers = common.get_max_workers(len(snap_pkgs))
+    return list(common.run_concurrently(function, snap_pkgs, max_workers=workers))
+
+
 def _snap_command_requires_sudo():
     # snap whoami returns - if the user is not logged in.
     output = check_output(["snap", "whoami"])
@@ -355,22 +412,52 @@ def get_snapd_socket_path_template():
     return "http+unix://%2Frun%2Fsnapd.socket/v2/{}"
 
 
-def _get_local_snap_file_iter(snap_name, *, chunk_size: int):
+_snapd_session = None
+_snapd_session_lock = threading.Lock()
+
+
+def _get_snapd_session() -> requests_unixsocket.Session:
+    """Return the session used for all requests to snapd.
+
+    Reusing it keeps connections to snapd open across requests.
+    """
+    global _snapd_session
+
+    with _snapd_session_lock:
+        if _snapd_session is None:
+            _snapd_session = requests_unixsocket.Session()
+        return _snapd_session
+
+
+def _download_local_snap_file(snap_name: str, snap_path: str) -> None:
     slug = "snaps/{}/file".format(parse.quote(snap_name, safe=""))
     url = get_snapd_socket_path_template().format(slug)
     try:
-        snap_file = requests_unixsocket.get(url)
+        snap_file = _get_snapd_session().get(url, stream=True)
     except exceptions.ConnectionError as e:
         raise errors.SnapdConnectionError(snap_name, url) from e
-    snap_file.raise_for_status()
-    return snap_file.iter_content(chunk_size)
+
+    with contextlib.closing(snap_file):
+        snap_file.raise_for_status()
+        with open(snap_path, "wb") as destination_file:
+            # Reserve the space upfront so the file is laid out in one go.
+            content_length = snap_file.headers.get("Content-Length")
+            if content_length and hasattr(os, "posix_fallocate"):
+                with contextlib.suppress(OSError, ValueError):
+                    os.posix_fallocate(
+                        destination_file.fileno(), 0, int(content_length)
+                    )
+            for buf in snap_file.iter_content(_SNAP_FILE_CHUNK_SIZE):
+                destination_file.write(buf)
+            # Drop any reserved space that was not written to.
+            destination_file.truncate()
 
 
 def _get_local_snap_info(snap_name):
     slug = "snaps/{}".format(parse.quote(snap_name, safe=""))
     url = get_snapd_socket_path_template().format(slug)
     try:
-        snap_info = requests_unixsocket.get(url)
+        snap_info = _get_snapd_session().get(url)
     except exceptions.ConnectionError as e:
         raise errors.SnapdConnectionError(snap_name, url) from e
     snap_info.raise_for_status()
@@ -382,22 +469,38 @@ def _get_store_snap_info(snap_name):
     # we do a strict search either 1 result or a 404 will be returned.
     slug = "find?{}".format(parse.urlencode(dict(name=snap_name)))
     url = get_snapd_socket_path_template().format(slug)
-    snap_info = requests_unixsocket.get(url)
+    snap_info = _get_snapd_session().get(url)
     snap_info.raise_for_status()
     return snap_info.json()["result"][0]
 
 
+def _get_local_snaps_info() -> List[Dict[str, Any]]:
+    slug = "snaps"
+    url = get_snapd_socket_path_template().format(slug)
+    snap_info = _get_snapd_session().get(url)
+    snap_info.raise_for_status()
+    return snap_info.json()["result"]
+
+
+def get_local_snaps() -> Optional[Dict[str, Any]]:
+    """Return information on all the snaps installed in the system.
+
+    :return: the payload for each installed snap by name, or None if
+             snapd cannot be reached.
+    """
+    try:
+        return {snap["name"]: snap for snap in _get_local_snaps_info()}
+    except (exceptions.ConnectionError, exceptions.HTTPError):
+        return None
+
+
 def get_installed_snaps():
     """Return all the snaps installed in the system.
 
     :return: a list of "name=revision" for the snaps installed.
     """
-    slug = "snaps"
-    url = get_snapd_socket_path_template().format(slug)
     try:
-        snap_info = requests_unixsocket.get(url)
-        snap_info.raise_for_status()
-        local_snaps = snap_info.json()["result"]
+        local_snaps = _get_local_snaps_info()
     except exceptions.ConnectionError:
         local_snaps = []
     return ["{}={}".format(snap["name"], snap["revision"]) for snap in local_snaps]
@@ -87,6 +87,7 @@ import re
 import sys
 
 from . import errors
+from ._base import FileBase  # noqa: F401
 
 if sys.platform == "linux":
     from ._7z import SevenZip  # noqa
@@ -14,20 +14,16 @@
 # You should have received a copy of the GNU General Public License
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 import os
-import shutil
 import subprocess
 import sys
-
-import requests
+from typing import Optional
 
 import snapcraft_legacy.internal.common
+from snapcraft_legacy import file_utils
 from snapcraft_legacy.internal.cache import FileCache
-from snapcraft_legacy.internal.indicators import (
-    download_requests_stream,
-    download_urllib_source,
-)
+from snapcraft_legacy.internal.indicators import download_urllib_source
 
-from . import errors
+from . import _download, errors
 from ._checksum import split_checksum, verify_checksum
 
 
@@ -111,25 +107,51 @@ class FileBase(Base):
         # First check if it is a url and download and if not
         # it is probably locally referenced.
         if is_source_url:
-            source_file = self.download()
+            source_file = self._link_cached_file()
+            if source_file is None:
+                source_file = self.download()
         else:
             basename = os.path.basename(self.source)
             source_file = os.path.join(self.source_dir, basename)
             # We make this copy as the provisioning logic can delete
             # this file and we don't want that.
             try:
-                shutil.copy2(self.source, source_file)
+                file_utils.reflink_or_copy(self.source, source_file)
             except FileNotFoundError as exc:
                 raise errors.SnapcraftSourceNotFoundError(self.source) from exc
 
-        # Verify before provisioning
-        if self.source_checksum:
+        # Downloads are verified as they are received, verify local
+        # sources before provisioning.
+        if self.source_checksum and not is_source_url:
             verify_checksum(self.source_checksum, source_file)
 
         # We finally provision, but we don't clean the target so override-pull
         # can actually have meaning when using these sources.
         self.provision(self.source_dir, src=source_file, clean_target=False)
 
+    def _link_cached_file(self) -> Optional[str]:
+        """Link the cached copy of the source into source_dir, if cached.
+
+        Provisioning only reads the file before removing it, so it does not
+        need a copy of its own and the cached copy is left untouched.
+        """
+        if not self.source_checksum:
+            return None
+
+        algorithm, hash = split_checksum(self.source_checksum)
+        cache_file = FileCache().get(algorithm=algorithm, hash=hash)
+        if not cache_file:
+            return None
+
+        self.file = os.path.join(self.source_dir, os.path.basename(self.source))
+        if os.path.lexists(self.file):
+            os.unlink(self.file)
+        try:
+            os.link(cache_file, self.file)
+        except OSError:
+            file_utils.reflink_or_copy(cache_file, self.file)
+        return self.file
+
     def download(self, filepath: str = None) -> str:
         if filepath is None:
             self.file = os.path.join(self.source_dir, os.path.basename(self.source))
@@ -144,24 +166,58 @@ class FileBase(Base):
             if cache_file:
                 # We make this copy as the provisioning logic can delete
                 # this file and we don't want that.
-                shutil.copy2(cache_file, self.file)
+                file_utils.reflink_or_copy(cache_file, self.file)
                 return self.file
 
         # If not we download and store
         if snapcraft_legacy.internal.common.get_url_scheme(self.source) == "ftp":
             download_urllib_source(self.source, self.file)
+            if self.source_checksum:
+                verify_checksum(self.source_checksum, self.file)
         else:
-            try:
-                request = requests.get(self.source, stream=True, allow_redirects=True)
-                request.raise_for_status()
-            except requests.exceptions.RequestException as e:
-                raise errors.SnapcraftRequestError(message=e)
-
-            download_requests_stream(request, self.file)
+            _download.download(
+                self.source,
+                self.file,
+                source_checksum=self.source_checksum,
+                connections=snapcraft_legacy.internal.common.get_download_connections(),
+            )
 
-        # We verify the file if source_checksum is defined
-        # and we cache the file for future reuse.
+        # The file has been verified if source_checksum is defined,
+        # we cache it for future reuse.
         if self.source_checksum:
-            algorithm, digest = verify_checksum(self.source_checksum, self.file)
-            file_cache.cache(filename=self.file, algorithm=algorithm, hash=hash)
+            file_cache.cache(
+                filename=self.file, algorithm=algorithm, hash=hash, verify=False
+            )
         return self.file
+
+    def prefetch(self) -> None:
+        """Download the source into the cache ahead of pull.
+
+        Only sources with a checksum are cached, and so only those are
+        prefetched; it is a no-op for anything already cached. No progress
+        is shown as several sources may be prefetched at once.
+        """
+        common = snapcraft_legacy.internal.common
+        if (
+            not self.source_checksum
+            or not common.isurl(self.source)
+            or common.get_url_scheme(self.source) == "ftp"
+        ):
+            return
+
+        algorithm, hash = split_checksum(self.source_checksum)
+        file_cache = FileCache()
+        if file_cache.get(algorithm=algorithm, hash=hash):
+            return
+
+        # The download is verified before it is moved into the cache, and an
+        # interrupted prefetch resumes from the partial file it left there.
+        cache_file = file_cache.get_file_path(algorithm=algorithm, hash=hash)
+        os.makedirs(os.path.dirname(cache_file), exist_ok=True)
+        _download.download(
+            self.source,
+            cache_file,
+            source_checksum=self.source_checksum,
+            connections=common.get_download_connections(),
+            show_progress=False,
+        )
@@ -13,7 +13,7 @@
 #
 # You should have received a copy of the GNU General Public License
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
-from typing import Tuple
+from typing import Optional, Tuple
 
 from snapcraft_legacy.file_utils import calculate_hash
 
@@ -33,11 +33,15 @@ def split_checksum(source_checksum: str) -> Tuple:
     return (algorithm, digest)
 
 
-def verify_checksum(source_checksum: str, checkfile: str) -> Tuple:
+def verify_checksum(
+    source_checksum: str, checkfile: str, *, calculated_digest: Optional[str] = None
+) -> Tuple:
     """Verifies that checkfile corresponds to the given source_checksum.
     :param str source_checksum: algorithm/hash expected for checkfile.
     :param str checkfile: the file to calculate the sum for with the
                           algorithm defined in source_checksum.
+    :param str calculated_digest: the digest of checkfile, if already
+                                  calculated while writing it.
     :raises ValueError: if source_checksum is not of the form algorithm/hash.
     :raises DigestDoesNotMatchError: if checkfile does not match the expected
                                      hash calculated with the algorithm defined
@@ -46,7 +50,8 @@ def verify_checksum(source_checksum: str, checkfile: str) -> Tuple:
     """
     algorithm, digest = split_checksum(source_checksum)
 
-    calculated_digest = calculate_hash(checkfile, algorithm=algorithm)
+    if calculated_digest is None:
+        calculated_digest = calculate_hash(checkfile, algorithm=algorithm)
     if digest != calculated_digest:
         raise errors.DigestDoesNotMatchError(digest, calculated_digest)
 
@@ -0,0 +1,355 @@
+# -*- Mode:Python; indent-tabs-mode:nil; tab-width:4 -*-
+#
+# Copyright (C) 2022 Canonical Ltd
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License version 3 as
+# published by the Free Software Foundation.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""Resumable and segmented downloads of source files."""
+
+import contextlib
+import hashlib
+import logging
+import os
+import threading
+from time import sleep
+from typing import Optional
+
+import requests
+
+from snapcraft_legacy.internal.common import run_concurrently
+from snapcraft_legacy.internal.indicators import init_progress_bar, is_dumb_terminal
+
+from . import errors
+from ._checksum import split_checksum, verify_checksum
+
+logger = logging.getLogger(__name__)
+
+# How many times an interrupted transfer is resumed before giving up.
+_RETRIES = 5
+
+# Seconds to wait for the server to connect or send more data.
+_TIMEOUT = 60
+
+# Files are only split in segments of at least this size.
+_MIN_SEGMENT_SIZE = 8 * 2**20
+
+_CHUNK_SIZE = 2**16
+
+_RETRIABLE_ERRORS = (
+    requests.exceptions.ChunkedEncodingError,
+    requests.exceptions.ConnectionError,
+    requests.exceptions.Timeout,
+)
+
+
+class _Progress:
+    """A progress bar that can be updated from several threads."""
+
+    def __init__(
+        self, *, total_length: int, destination: str, show: bool, total_read: int = 0
+    ) -> None:
+        self._total_read = total_read
+        self._lock = threading.Lock()
+        self._progress_bar = None
+        if show:
+            self._progress_bar = init_progress_bar(total_length, destination)
+            self._progress_bar.start()
+
+    def update(self, length: int) -> None:
+        with self._lock:
+            self._total_read += length
+            if self._progress_bar and not is_dumb_terminal():
+                self._progress_bar.update(self._total_read)
+
+    def finish(self) -> None:
+        if self._progress_bar:
+            self._progress_bar.finish()
+
+
+def download(
+    url: str,
+    destination: str,
+    *,
+    source_checksum: Optional[str] = None,
+    connections: int = 1,
+    show_progress: bool = True,
+) -> None:
+    """Download url to destination.
+
+    Data goes to a partial file next to destination until the download is
+    complete. Interrupted transfers are resumed with range requests. A
+    partial file left behind by an earlier run is only resumed if the
+    server confirms, through the validator (ETag or Last-Modified) stored
+    next to it, that the file has not changed since. Given more than one
+    connection, big files are fetched in concurrent segments if the server
+    supports range requests.
+
+    :param str url: the url to download.
+    :param str destination: the path to download url to.
+    :param str source_checksum: algorithm/digest to verify the download
+                                against, hashed as the data is received.
+    :param int connections: the maximum number of connections to use.
+    :param bool show_progress: whether to show a progress bar.
+    :raises SnapcraftRequestError: if the download fails.
+    :raises DigestDoesNotMatchError: if the download does not match
+                                     source_checksum.
+    """
+    partial_path = destination + ".partial"
+    algorithm = split_checksum(source_checksum)[0] if source_checksum else None
+
+    if (
+        connections > 1
+        and not os.path.exists(partial_path)
+        and _download_segments(
+            url, partial_path, destination, connections, show_progress
+        )
+    ):
+        # Segments arrive out of order, the file is hashed once complete.
+        digest = None
+    else:
+        digest = _download_stream(
+            url, partial_path, destination, algorithm, show_progress
+        )
+
+    if source_checksum:
+        try:
+            verify_checksum(source_checksum, partial_path, calculated_digest=digest)
+        except errors.DigestDoesNotMatchError:
+            os.unlink(partial_path)
+            raise
+
+    os.replace(partial_path, destination)
+
+
+def _download_stream(
+    url: str,
+    partial_path: str,
+    destination: str,
+    algorithm: Optional[str],
+    show_progress: bool,
+) -> Optional[str]:
+    validator_path = partial_path + ".validator"
+    hasher = getattr(hashlib, algorithm)() if algorithm else None
+    total_read = 0
+    validator = _read_validator(validator_path)
+    if validator and os.path.exists(partial_path):
+        total_read = os.path.getsize(partial_path)
+        if hasher:
+            with open(partial_path, "rb") as partial_file:
+                for block in iter(lambda: partial_file.read(2**20), b""):
+                    hasher.update(block)
+
+    retry_count = _RETRIES
+    while True:
+        headers = dict()
+        if total_read:
+            headers["Range"] = "bytes={}-".format(total_read)
+            if validator:
+                # The server sends the whole file if it has changed.
+                headers["If-Range"] = validator
+        try:
+            with requests.get(
+                url,
+                stream=True,
+                allow_redirects=True,
+                headers=headers,
+                timeout=_TIMEOUT,
+            ) as request:
+                if total_read and request.status_code != requests.codes.partial_content:
+                    # The server did not resume, start over.
+                    total_read = 0
+                    hasher = getattr(hashlib, algorithm)() if algorithm else None
+                    if request.status_code != requests.codes.ok:
+                        os.unlink(partial_path)
+                        continue
+                request.raise_for_status()
+                if not total_read:
+                    validator = _get_validator(request)
+                    _write_validator(validator_path, validator)
+                _write_stream(
+                    request,
+                    partial_path,
+                    destination,
+                    total_read,
+                    hasher,
+                    show_progress,
+                )
+        except _RETRIABLE_ERRORS as e:
+            retry_count -= 1
+            if not retry_count:
+                raise errors.SnapcraftRequestError(message=e)
+            logger.debug(
+                "Error while downloading: {!r}. "
+                "Retries left to download: {!r}.".format(e, retry_count)
+            )
+            total_read = (
+                os.path.getsize(partial_path) if os.path.exists(partial_path) else 0
+            )
+            sleep(1)
+        except requests.exceptions.RequestException as e:
+            raise errors.SnapcraftRequestError(message=e)
+        else:
+            with contextlib.suppress(FileNotFoundError):
+                os.unlink(validator_path)
+            return hasher.hexdigest() if hasher else None
+
+
+def _get_validator(request) -> Optional[str]:
+    """Return the strong validator identifying the version being sent."""
+    etag = request.headers.get("ETag")
+    # Weak entity tags cannot be used with If-Range.
+    if etag and not etag.startswith("W/"):
+        return etag
+    return request.headers.get("Last-Modified")
+
+
+def _read_validator(validator_path: str) -> Optional[str]:
+    try:
+        with open(validator_path, "r") as validator_file:
+            return validator_file.read() or None
+    except FileNotFoundError:
+        return None
+
+
+def _write_validator(validator_path: str, validator: Optional[str]) -> None:
+    if validator:
+        with open(validator_path, "w") as validator_file:
+            validator_file.write(validator)
+    else:
+        with contextlib.suppress(FileNotFoundError):
+            os.unlink(validator_path)
+
+
+def _write_stream(
+    request,
+    partial_path: str,
+    destination: str,
+    total_read: int,
+    hasher,
+    show_progress: bool,
+) -> None:
+    total_length = 0
+    if not request.headers.get("Content-Encoding", ""):
+        total_length = int(request.headers.get("Content-Length", "0"))
+        if total_length:
+            total_length += total_read
+    received = total_read
+
+    progress = _Progress(
+        total_length=total_length,
+        destination=destination,
+        show=show_progress,
+        total_read=total_read,
+    )
+    with open(partial_path, "ab" if total_read else "wb") as partial_file:
+        for chunk in request.iter_content(_CHUNK_SIZE):
+            partial_file.write(chunk)
+            if hasher:
+                hasher.update(chunk)
+            received += len(chunk)
+            progress.update(len(chunk))
+    _check_complete(received, total_length)
+    progress.finish()
+
+
+def _check_complete(received: int, expected: int) -> None:
+    # Servers closing the connection early are not always reported as an
+    # error, treat it like any other interrupted transfer.
+    if received < expected:
+        raise requests.exceptions.ConnectionError(
+            "connection closed after {} of {} bytes".format(received, expected)
+        )
+
+
+def _download_segments(
+    url: str, partial_path: str, destination: str, connections: int, show_progress: bool
+) -> bool:
+    """Download url in concurrent segments, if the server allows it.
+
+    :returns: False if the server does not support range requests or the
+              file is too small to be worth splitting.
+    """
+    try:
+        head = requests.head(url, allow_redirects=True, timeout=_TIMEOUT)
+        head.raise_for_status()
+    except requests.exceptions.RequestException:
+        return False
+
+    if head.headers.get("Accept-Ranges") != "bytes" or head.headers.get(
+        "Content-Encoding"
+    ):
+        return False
+
+    size = int(head.headers.get("Content-Length", "0"))
+    segment_count = min(connections, size // _MIN_SEGMENT_SIZE)
+    if segment_count < 2:
+        return False
+
+    bounds = [size * i // segment_count for i in range(segment_count + 1)]
+    progress = _Progress(total_length=size, destination=destination, show=show_progress)
+    with open(partial_path, "wb") as partial_file:
+        partial_file.truncate(size)
+    fd = os.open(partial_path, os.O_WRONLY)
+    try:
+        for _ in run_concurrently(
+            lambda segment: _download_segment(head.url, fd, *segment, progress),
+            zip(bounds, bounds[1:]),
+            max_workers=segment_count,
+        ):
+            pass
+    except BaseException:
+        # Holes in the partial file must not be taken for downloaded data.
+        os.unlink(partial_path)
+        raise
+    finally:
+        os.close(fd)
+
+    progress.finish()
+    return True
+
+
+def _download_segment(
+    url: str, fd: int, start: int, end: int, progress: _Progress
+) -> None:
+    offset = start
+    retry_count = _RETRIES
+    while offset < end:
+        headers = {"Range": "bytes={}-{}".format(offset, end - 1)}
+        try:
+            with requests.get(
+                url, stream=True, headers=headers, timeout=_TIMEOUT
+            ) as request:
+                request.raise_for_status()
+                if request.status_code != requests.codes.partial_content:
+                    raise errors.SnapcraftRequestError(
+                        message="the server did not honour the range request for {!r}".format(
+                            url
+                        )
+                    )
+                for chunk in request.iter_content(_CHUNK_SIZE):
+                    chunk = chunk[: end - offset]
+                    os.pwrite(fd, chunk, offset)
+                    offset += len(chunk)
+                    progress.update(len(chunk))
+            _check_complete(offset, end)
+        except _RETRIABLE_ERRORS as e:
+            retry_count -= 1
+            if not retry_count:
+                raise errors.SnapcraftRequestError(message=e)
+            logger.debug(
+                "Error while downloading: {!r}. "
+                "Retries left to download: {!r}.".format(e, retry_count)
+            )
+            sleep(1)
+        except requests.exceptions.RequestException as e:
+            raise errors.SnapcraftRequestError(message=e)
@@ -16,10 +16,13 @@
 
 import os
 import re
+import shutil
 import subprocess
 import sys
 from typing import List
 
+from snapcraft_legacy.internal.cache import GitMirrorCache
+
 from . import errors
 from ._base import Base
 
@@ -222,7 +225,17 @@ class Git(Base):
             command.extend(["--branch", self.source_tag or self.source_branch])
         if self.source_depth:
             command.extend(["--depth", str(self.source_depth)])
-        self._run(command + [self.source, self.source_dir], **self._call_kwargs)
+
+        if self._use_mirror():
+            mirror_cache = GitMirrorCache()
+            with mirror_cache.lock(self.source, exclusive=True) as mirror_dir:
+                self._update_mirror(mirror_dir)
+            # Dissociate so the source does not break if the mirror goes away.
+            with mirror_cache.lock(self.source, exclusive=False) as mirror_dir:
+                command.extend(["--reference", mirror_dir, "--dissociate"])
+                self._run(command + [self.source, self.source_dir], **self._call_kwargs)
+        else:
+            self._run(command + [self.source, self.source_dir], **self._call_kwargs)
 
         if self.source_commit:
             self._fetch_origin_commit()
@@ -232,6 +245,31 @@ class Git(Base):
                 **self._call_kwargs
             )
 
+    def _use_mirror(self) -> bool:
+        # Shallow clones transfer less than a full mirror would, and local
+        # repositories are already cheap to clone.
+        return (
+            os.getenv("SNAPCRAFT_GIT_MIRROR") is not None
+            and not self.source_depth
+            and not os.path.isdir(self.source)
+        )
+
+    def _update_mirror(self, mirror_dir: str) -> None:
+        if os.path.isdir(mirror_dir):
+            self._run(
+                [self.command, "-C", mirror_dir, "fetch", "--prune", "origin"],
+                **self._call_kwargs
+            )
+            return
+
+        partial_mirror_dir = mirror_dir + ".partial"
+        shutil.rmtree(partial_mirror_dir, ignore_errors=True)
+        self._run(
+            [self.command, "clone", "--mirror", self.source, partial_mirror_dir],
+            **self._call_kwargs
+        )
+        os.rename(partial_mirror_dir, mirror_dir)
+
     def is_local(self):
         return os.path.exists(os.path.join(self.source_dir, ".git"))
 
@@ -17,7 +17,10 @@
 import copy
 import functools
 import glob
+import json
 import os
+import stat
+from typing import Any, Dict, List, Optional
 
 from snapcraft_legacy import file_utils
 from snapcraft_legacy.internal import common
@@ -32,8 +35,15 @@ class Local(Base):
         self.copy_function = copy_function
 
         self._ignore = functools.partial(_ignore, self.source_abspath, os.getcwd())
+        self._index: Optional[Dict[str, Any]] = None
 
     def pull(self):
+        # Once _check has found what changed, only that needs to be brought
+        # over to an existing copy of the source.
+        if self._index is not None and os.path.isdir(self.source_dir):
+            self._update()
+            return
+
         file_utils.link_or_copy_tree(
             self.source_abspath,
             self.source_dir,
@@ -41,43 +51,87 @@ class Local(Base):
             copy_function=self.copy_function,
         )
 
+    def walk(self):
+        """Walk the source like os.walk, leaving out what pull ignores."""
+        for root, directories, files in os.walk(self.source_abspath, topdown=True):
+            ignored = set(self._ignore(root, directories + files))
+            if ignored:
+                directories[:] = [d for d in directories if d not in ignored]
+                files = [f for f in files if f not in ignored]
+            yield root, directories, files
+
+    @staticmethod
+    def get_index_path(target: str) -> str:
+        """Return the path to the index of the source pulled at target.
+
+        The index records what the pulled copy of the source was made from,
+        so that checking for changes only lists modified directories.
+        """
+        return os.path.join(os.path.dirname(target), "local-source-index.json")
+
     def _check(self, target):
         try:
-            target_mtime = os.lstat(target).st_mtime
+            target_mtime_ns = os.lstat(target).st_mtime_ns
         except FileNotFoundError:
             return False
 
         self._updated_files = set()
         self._updated_directories = set()
-
-        for (root, directories, files) in os.walk(self.source_abspath, topdown=True):
-            ignored = set(self._ignore(root, directories + files, check=True))
-            if ignored:
-                # Prune our search appropriately given an ignore list, i.e.
-                # don't walk into directories that are ignored.
-                directories[:] = [d for d in directories if d not in ignored]
-
-            for file_name in set(files) - ignored:
-                path = os.path.join(root, file_name)
-                if os.lstat(path).st_mtime >= target_mtime:
-                    self._updated_files.add(os.path.relpath(path, self.source))
-
-            for directory in directories:
-                path = os.path.join(root, directory)
-                if os.lstat(path).st_mtime >= target_mtime:
-                    # Don't descend into this directory-- we'll just copy it
-                    # entirely.
-                    directories.remove(directory)
-
-                    # os.walk will include symlinks to directories here, but we
-                    # want to treat those as files
-                    relpath = os.path.relpath(path, self.source)
-                    if os.path.islink(path):
-                        self._updated_files.add(relpath)
+        self._index_path = self.get_index_path(target)
+        index = self._load_index()
+        new_index: Dict[str, Any] = {
+            "source": self.source_abspath,
+            "cwd": os.getcwd(),
+            "files": dict(),
+            "directories": dict(),
+        }
+
+        # Entries newer than target have changed, as do entries that differ
+        # from the index recorded when the source was last brought over; the
+        # latter also catches changes that keep an old mtime.
+        stack = [("", False)]
+        while stack:
+            relpath, in_updated_directory = stack.pop()
+            for name in self._list_directory(
+                relpath, index, new_index, target_mtime_ns
+            ):
+                path = os.path.join(relpath, name)
+                try:
+                    path_stat = os.lstat(os.path.join(self.source_abspath, path))
+                except FileNotFoundError:
+                    continue
+
+                # os.walk used to include symlinks to directories with the
+                # directories, but we want to treat those as files.
+                if stat.S_ISDIR(path_stat.st_mode):
+                    if not in_updated_directory and (
+                        path_stat.st_mtime_ns >= target_mtime_ns
+                        if index is None
+                        else path not in index["directories"]
+                    ):
+                        # This directory is copied entirely, only index it.
+                        self._updated_directories.add(path)
+                        stack.append((path, True))
                     else:
-                        self._updated_directories.add(relpath)
-
-        return len(self._updated_files) > 0 or len(self._updated_directories) > 0
+                        stack.append((path, in_updated_directory))
+                    continue
+
+                entry = [path_stat.st_mtime_ns, path_stat.st_size, path_stat.st_ino]
+                new_index["files"][path] = entry
+                if not in_updated_directory and (
+                    path_stat.st_mtime_ns >= target_mtime_ns
+                    or (index is not None and index["files"].get(path) != entry)
+                ):
+                    self._updated_files.add(path)
+
+        if self._updated_files or self._updated_directories:
+            # The index is only recorded once the changes are brought over.
+            self._index = new_index
+            return True
+
+        self._index = None
+        self._save_index(new_index)
+        return False
 
     def _update(self):
         # First, copy the directories
@@ -96,6 +150,74 @@ class Local(Base):
                 os.path.join(self.source_dir, file_path),
             )
 
+        # Later checks can start from what has been brought over.
+        if self._index is not None:
+            self._save_index(self._index)
+            self._index = None
+        self._updated_files = set()
+        self._updated_directories = set()
+
+    def _list_directory(
+        self,
+        relpath: str,
+        index: Optional[Dict[str, Any]],
+        new_index: Dict[str, Any],
+        target_mtime_ns: int,
+    ) -> List[str]:
+        """Return the entries in relpath which are not ignored.
+
+        The entries recorded in index are reused if the directory has not
+        been modified since, nor after target.
+        """
+        path = (
+            os.path.join(self.source_abspath, relpath)
+            if relpath
+            else self.source_abspath
+        )
+        try:
+            path_stat = os.lstat(path)
+        except FileNotFoundError:
+            return []
+
+        key = [path_stat.st_mtime_ns, path_stat.st_ino]
+        if index is not None:
+            recorded = index["directories"].get(relpath)
+            if (
+                recorded is not None
+                and recorded[:2] == key
+                and path_stat.st_mtime_ns < target_mtime_ns
+            ):
+                new_index["directories"][relpath] = recorded
+                return recorded[2]
+
+        with os.scandir(path) as entries:
+            names = [entry.name for entry in entries]
+        ignored = set(self._ignore(path, names, check=True))
+        entries = sorted(n for n in names if n not in ignored)
+        new_index["directories"][relpath] = key + [entries]
+        return entries
+
+    def _load_index(self) -> Optional[Dict[str, Any]]:
+        try:
+            with open(self._index_path) as index_file:
+                index = json.load(index_file)
+        except (FileNotFoundError, ValueError):
+            return None
+
+        # What is ignored depends on both of these.
+        if (
+            index.get("source") != self.source_abspath
+            or index.get("cwd") != os.getcwd()
+        ):
+            return None
+        return index
+
+    def _save_index(self, index: Dict[str, Any]) -> None:
+        partial_path = self._index_path + ".partial"
+        with open(partial_path, "w") as index_file:
+            json.dump(index, index_file)
+        os.replace(partial_path, self._index_path)
+
 
 def _ignore(source, current_directory, directory, files, check=False):
     if directory == source or directory == current_directory:
@@ -14,15 +14,27 @@
 # You should have received a copy of the GNU General Public License
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
+import contextlib
 import os
 import re
 import shutil
+import subprocess
 import tarfile
 import tempfile
+from typing import Iterator, List, Optional, Tuple
 
 from . import errors
 from ._base import FileBase
 
+# Decompressors able to use several cores, by the magic number of the
+# compressed data they handle.
+_PARALLEL_DECOMPRESSORS = [
+    (b"\x1f\x8b", ["pigz", "--decompress", "--stdout"]),
+    (b"BZh", ["lbzip2", "--decompress", "--stdout"]),
+    (b"\xfd7zXZ\x00", ["xz", "--decompress", "--stdout", "--threads=0"]),
+    (b"\x28\xb5\x2f\xfd", ["zstd", "--decompress", "--stdout", "--quiet"]),
+]
+
 
 class Tar(FileBase):
     def __init__(
@@ -75,39 +87,29 @@ class Tar(FileBase):
             os.remove(tarball)
 
     def _extract(self, tarball, dst):
-        with tarfile.open(tarball) as tar:
-
-            def filter_members(tar):
-                """Filters members and member names:
-                - strips common prefix
-                - bans dangerous names"""
-                members = tar.getmembers()
-                common = os.path.commonprefix([m.name for m in members])
-
-                # commonprefix() works a character at a time and will
-                # consider "d/ab" and "d/abc" to have common prefix "d/ab";
-                # check all members either start with common dir
-                for m in members:
-                    if not (
-                        m.name.startswith(common + "/")
-                        or m.isdir()
-                        and m.name == common
-                    ):
-                        # commonprefix() didn't return a dir name; go up one
-                        # level
-                        common = os.path.dirname(common)
-                        break
-
-                for m in members:
-                    if m.name == common:
-                        continue
-                    self._strip_prefix(common, m)
-                    # We mask all files to be writable to be able to easily
-                    # extract on top.
-                    m.mode = m.mode | 0o200
-                    yield m
-
-            tar.extractall(members=filter_members(tar), path=dst)
+        # The prefix common to all members is only known once the whole
+        # archive has been read, so extract it in a single pass next to dst
+        # and move what is under the prefix in place afterwards.
+        os.makedirs(dst, exist_ok=True)
+        with tempfile.TemporaryDirectory(prefix=".extract-", dir=dst) as extract_dir:
+            members: List[Tuple[str, bool]] = []
+            with _open_tar_stream(tarball) as tar:
+
+                def filter_members(tar):
+                    """Record member names and ban dangerous names."""
+                    for m in tar:
+                        members.append((m.name, m.isdir()))
+                        self._strip_prefix("", m)
+                        # We mask all files to be writable to be able to easily
+                        # extract on top.
+                        m.mode = m.mode | 0o200
+                        yield m
+
+                tar.extractall(members=filter_members(tar), path=extract_dir)
+
+            common = _get_common_prefix(members)
+            common_dir = re.sub(r"^(\.{0,2}/)*", r"", common)
+            _move_contents(os.path.join(extract_dir, common_dir), dst)
 
     def _strip_prefix(self, common, member):
         if member.name.startswith(common + "/"):
@@ -119,3 +121,78 @@ class Tar(FileBase):
             if member.linkname.startswith(common + "/"):
                 member.linkname = member.linkname[len(common + "/") :]
             member.linkname = re.sub(r"^(\.{0,2}/)*", r"", member.linkname)
+
+
+def _get_common_prefix(members: List[Tuple[str, bool]]) -> str:
+    """Return the directory common to all members, given as (name, isdir)."""
+    common = os.path.commonprefix([name for name, _ in members])
+
+    # commonprefix() works a character at a time and will
+    # consider "d/ab" and "d/abc" to have common prefix "d/ab";
+    # check all members either start with common dir
+    for name, isdir in members:
+        if not (name.startswith(common + "/") or isdir and name == common):
+            # commonprefix() didn't return a dir name; go up one
+            # level
+            common = os.path.dirname(common)
+            break
+
+    return common
+
+
+def _move_contents(src: str, dst: str) -> None:
+    """Move the contents of src into dst, replacing what is in the way."""
+    if not os.path.isdir(src):
+        return
+
+    for entry in os.scandir(src):
+        target = os.path.join(dst, entry.name)
+        target_is_dir = os.path.isdir(target) and not os.path.islink(target)
+        if entry.is_dir(follow_symlinks=False) and target_is_dir:
+            _move_contents(entry.path, target)
+            continue
+
+        if target_is_dir:
+            shutil.rmtree(target)
+        os.replace(entry.path, target)
+
+
+def _get_decompress_command(tarball: str) -> Optional[List[str]]:
+    with open(tarball, "rb") as tarball_file:
+        magic = tarball_file.read(6)
+
+    for prefix, command in _PARALLEL_DECOMPRESSORS:
+        if magic.startswith(prefix) and shutil.which(command[0]):
+            return command
+
+    return None
+
+
+@contextlib.contextmanager
+def _open_tar_stream(tarball: str) -> Iterator[tarfile.TarFile]:
+    """Open tarball for reading its members once, in order.
+
+    Compressed tarballs are decompressed by an external parallel
+    decompressor when one is available for their format.
+    """
+    command = _get_decompress_command(tarball)
+    if command is None:
+        with tarfile.open(tarball, mode="r|*") as tar:
+            yield tar
+        return
+
+    command = command + [tarball]
+    with subprocess.Popen(command, stdout=subprocess.PIPE) as proc:
+        try:
+            with tarfile.open(fileobj=proc.stdout, mode="r|") as tar:
+                yield tar
+            # Drain the padding after the end of the archive, or the
+            # decompressor fails writing to a closed pipe.
+            while proc.stdout.read(2**16):
+                pass
+        except BaseException:
+            proc.kill()
+            raise
+
+    if proc.returncode != 0:
+        raise errors.SnapcraftPullError(command, proc.returncode)
@@ -0,0 +1,55 @@
+# -*- Mode:Python; indent-tabs-mode:nil; tab-width:4 -*-
+#
+# Copyright (C) 2022 Canonical Ltd
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License version 3 as
+# published by the Free Software Foundation.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import base64
+import zlib
+from typing import Iterable, Set
+
+from snapcraft_legacy import yaml_utils
+
+
+class CompactPaths(yaml_utils.SnapcraftYAMLObject):
+    """A set of paths as stored in a state file.
+
+    The paths are sorted, joined and compressed so that states for parts
+    with many files remain small and fast to load. They are only decoded
+    when requested.
+    """
+
+    yaml_tag = "!CompactPaths"
+
+    def __init__(self, encoded: str) -> None:
+        self.encoded = encoded
+
+    @classmethod
+    def from_paths(cls, paths: Iterable[str]) -> "CompactPaths":
+        # Paths cannot contain NUL, which makes it a safe separator.
+        data = "\0".join(sorted(paths)).encode("utf-8", "surrogateescape")
+        return cls(base64.b64encode(zlib.compress(data)).decode("ascii"))
+
+    def decode(self) -> Set[str]:
+        data = zlib.decompress(base64.b64decode(self.encoded))
+        if not data:
+            return set()
+        return set(data.decode("utf-8", "surrogateescape").split("\0"))
+
+    @classmethod
+    def to_yaml(cls, dumper, data):
+        return dumper.represent_scalar(cls.yaml_tag, data.encoded)
+
+    @classmethod
+    def from_yaml(cls, loader, node):
+        return cls(loader.construct_scalar(node))
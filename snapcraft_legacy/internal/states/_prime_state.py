@@ -15,11 +15,12 @@
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
 import snapcraft_legacy.extractors
-from snapcraft_legacy.internal.states._state import PartState
+from snapcraft_legacy.internal.states._state import PathsPartState
 
 
-class PrimeState(PartState):
+class PrimeState(PathsPartState):
     yaml_tag = "!PrimeState"
+    path_attributes = ("files", "directories", "dependency_paths")
 
     def __init__(
         self,
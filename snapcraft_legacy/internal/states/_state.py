@@ -15,9 +15,11 @@
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
 import os
+from typing import Tuple
 
 from snapcraft_legacy import yaml_utils
 from snapcraft_legacy.internal import steps
+from snapcraft_legacy.internal.states._paths import CompactPaths
 
 
 class State(yaml_utils.SnapcraftYAMLObject):
@@ -73,6 +75,65 @@ class PartState(State):
         )
 
 
+class PathsPartState(PartState):
+    """A PartState tracking sets of paths, stored compactly.
+
+    The attributes named in path_attributes are written as CompactPaths
+    and only decoded the first time they are accessed after loading, so
+    reading the state of parts with many files stays cheap when only the
+    properties are needed. States written as plain YAML sets still load.
+    """
+
+    path_attributes: Tuple[str, ...] = ()
+
+    def __getattr__(self, name):
+        # Only called for attributes not set yet, i.e. paths not decoded.
+        encoded_paths = self.__dict__.get("_encoded_paths", {})
+        if name not in encoded_paths:
+            raise AttributeError(name)
+
+        paths = encoded_paths.pop(name).decode()
+        if not encoded_paths:
+            del self.__dict__["_encoded_paths"]
+        setattr(self, name, paths)
+        return paths
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state.update(state.pop("_encoded_paths", {}))
+        for name in self.path_attributes:
+            paths = state.get(name)
+            if paths is not None and not isinstance(paths, CompactPaths):
+                state[name] = CompactPaths.from_paths(paths)
+        return state
+
+    def __setstate__(self, state):
+        encoded_paths = {
+            name: value
+            for name, value in state.items()
+            if isinstance(value, CompactPaths)
+        }
+        self.__dict__.update(
+            (name, value) for name, value in state.items() if name not in encoded_paths
+        )
+        if encoded_paths:
+            self.__dict__["_encoded_paths"] = encoded_paths
+
+    def __repr__(self):
+        self._decode_paths()
+        return super().__repr__()
+
+    def __eq__(self, other):
+        self._decode_paths()
+        if isinstance(other, PathsPartState):
+            other._decode_paths()
+        return super().__eq__(other)
+
+    def _decode_paths(self) -> None:
+        for name in list(self.__dict__.get("_encoded_paths", {})):
+            getattr(self, name)
+
+
 def _get_differing_keys(dict1, dict2):
     differing_keys = set()
     for key, dict1_value in dict1.items():
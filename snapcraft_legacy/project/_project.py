@@ -152,6 +152,9 @@ class Project(ProjectOptions):
 
         return state_file_path
 
+    def _get_elf_cache_file_path(self) -> str:
+        return os.path.join(self._parts_dir, ".snapcraft_elf_cache")
+
     def _get_stage_packages_target_arch(self) -> str:
         """Get architecture for staging packages.
 
@@ -53,11 +53,12 @@ class FakeSnapdRequestHandler(fake_servers.BaseHTTPRequestHandler):
         self.wfile.write(response)
 
     def _handle_snap_file(self, parsed_url):
+        response = parsed_url.path.encode()
         self.send_response(200)
-        self.send_header("Content-Length", len(parsed_url))
+        self.send_header("Content-Length", len(response))
         self.send_header("Content-type", "text/plain")
         self.end_headers()
-        self.wfile.write(parsed_url.encode())
+        self.wfile.write(response)
 
     def _handle_snap_details(self, parsed_url):
         status_code = 404
@@ -77,6 +78,7 @@ class FakeSnapdRequestHandler(fake_servers.BaseHTTPRequestHandler):
                         "revision",
                         "confinement",
                         "id",
+                        "installed-size",
                         "tracking-channel",
                     ):
                         if key in snap:
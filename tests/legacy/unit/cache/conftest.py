@@ -33,3 +33,23 @@ def random_data_file(tmp_path):
 def file_cache(xdg_dirs):
     """Return a FileCache instance."""
     return cache.FileCache()
+
+
+@pytest.fixture()
+def elf_cache(tmp_path):
+    """Return an ElfCache instance stored in tmp_path."""
+    elf_cache = cache.ElfCache(path=(tmp_path / "elf-cache").as_posix())
+    yield elf_cache
+    elf_cache.close()
+
+
+@pytest.fixture()
+def deb_tree_cache(xdg_dirs):
+    """Return a DebTreeCache instance."""
+    return cache.DebTreeCache()
+
+
+@pytest.fixture()
+def git_mirror_cache(xdg_dirs):
+    """Return a GitMirrorCache instance."""
+    return cache.GitMirrorCache()
@@ -0,0 +1,93 @@
+# -*- Mode:Python; indent-tabs-mode:nil; tab-width:4 -*-
+#
+# Copyright (C) 2022 Canonical Ltd
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License version 3 as
+# published by the Free Software Foundation.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import os
+import time
+from pathlib import Path
+
+
+def _add_tree(deb_tree_cache, key, size):
+    tree_dir = deb_tree_cache.make_tree_dir()
+    Path(tree_dir, "usr").mkdir()
+    Path(tree_dir, "usr", "file").write_bytes(b"x" * size)
+    return deb_tree_cache.add(key=key, tree_dir=tree_dir)
+
+
+def test_get_nothing_cached(deb_tree_cache):
+    assert deb_tree_cache.get(key="1") is None
+
+
+def test_add_and_get(deb_tree_cache):
+    cached_tree = _add_tree(deb_tree_cache, "1", 10)
+
+    assert deb_tree_cache.get(key="1") == cached_tree
+    assert Path(cached_tree, "usr", "file").read_bytes() == b"x" * 10
+    # Only the cached entry remains.
+    assert os.listdir(deb_tree_cache.trees_dir) == ["1"]
+
+
+def test_add_existing(deb_tree_cache):
+    cached_tree = _add_tree(deb_tree_cache, "1", 10)
+
+    assert _add_tree(deb_tree_cache, "1", 20) == cached_tree
+    assert Path(cached_tree, "usr", "file").read_bytes() == b"x" * 10
+    assert os.listdir(deb_tree_cache.trees_dir) == ["1"]
+
+
+def test_discard(deb_tree_cache):
+    tree_dir = deb_tree_cache.make_tree_dir()
+
+    deb_tree_cache.discard(tree_dir=tree_dir)
+
+    assert os.listdir(deb_tree_cache.trees_dir) == []
+
+
+def test_prune_least_recently_used(deb_tree_cache):
+    deb_tree_cache.max_size = 25
+    for index, key in enumerate(["1", "2", "3"]):
+        _add_tree(deb_tree_cache, key, 10)
+        os.utime(os.path.join(deb_tree_cache.trees_dir, key), ns=(index, index))
+
+    # Using an entry makes it the most recent one.
+    assert deb_tree_cache.get(key="1") is not None
+    deb_tree_cache.prune()
+
+    assert sorted(os.listdir(deb_tree_cache.trees_dir)) == ["1", "3"]
+
+
+def test_prune_under_max_size(deb_tree_cache):
+    for key in ["1", "2", "3"]:
+        _add_tree(deb_tree_cache, key, 10)
+
+    deb_tree_cache.prune()
+
+    assert sorted(os.listdir(deb_tree_cache.trees_dir)) == ["1", "2", "3"]
+
+
+def test_prune_abandoned_trees(deb_tree_cache):
+    _add_tree(deb_tree_cache, "1", 10)
+    abandoned_tree = deb_tree_cache.make_tree_dir()
+    Path(abandoned_tree, "file").write_bytes(b"x")
+    abandoned_time = time.time() - 2 * 60 * 60
+    for path in (abandoned_tree, os.path.dirname(abandoned_tree)):
+        os.utime(path, (abandoned_time, abandoned_time))
+    populated_tree = deb_tree_cache.make_tree_dir()
+
+    deb_tree_cache.prune()
+
+    assert sorted(os.listdir(deb_tree_cache.trees_dir)) == sorted(
+        ["1", os.path.basename(os.path.dirname(populated_tree))]
+    )
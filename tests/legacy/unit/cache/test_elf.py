@@ -0,0 +1,96 @@
+# -*- Mode:Python; indent-tabs-mode:nil; tab-width:4 -*-
+#
+# Copyright (C) 2022 Canonical Ltd
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License version 3 as
+# published by the Free Software Foundation.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import os
+
+from snapcraft_legacy.internal import cache, elf
+
+
+def test_get_nothing_cached(elf_cache, random_data_file):
+    assert elf_cache.get(random_data_file) is None
+
+
+def test_get_missing_file(elf_cache, tmp_path):
+    assert elf_cache.get((tmp_path / "missing").as_posix()) is None
+
+
+def test_cache_non_elf_file(elf_cache, random_data_file):
+    elf_cache.set_attributes(random_data_file, attributes=None)
+
+    assert elf_cache.get(random_data_file) == cache._elf.ElfCacheEntry(
+        attributes=None, ld_library_paths=None, libraries=None
+    )
+
+
+def test_cache_attributes_and_libraries(elf_cache, random_data_file):
+    elf_cache.set_attributes(random_data_file, attributes={"soname": "foo.so.1"})
+    elf_cache.set_libraries(
+        random_data_file, ld_library_paths=["/lib"], libraries={"bar.so.2": "bar.so.2"}
+    )
+
+    entry = elf_cache.get(random_data_file)
+    assert entry.attributes == {"soname": "foo.so.1"}
+    assert elf_cache.get_libraries(random_data_file, ld_library_paths=["/lib"]) == {
+        "bar.so.2": "bar.so.2"
+    }
+    assert (
+        elf_cache.get_libraries(random_data_file, ld_library_paths=["/usr/lib"]) is None
+    )
+
+
+def test_libraries_with_missing_paths_are_ignored(
+    elf_cache, random_data_file, tmp_path
+):
+    elf_cache.set_attributes(random_data_file, attributes={})
+    elf_cache.set_libraries(
+        random_data_file,
+        ld_library_paths=[],
+        libraries={"bar.so.2": (tmp_path / "bar.so.2").as_posix()},
+    )
+
+    assert elf_cache.get_libraries(random_data_file, ld_library_paths=[]) is None
+
+
+def test_changed_file_invalidates_entry(elf_cache, random_data_file):
+    elf_cache.set_attributes(random_data_file, attributes={})
+
+    with open(random_data_file, "a") as f:
+        f.write("more data")
+
+    assert elf_cache.get(random_data_file) is None
+
+
+def test_entries_persist(tmp_path, random_data_file):
+    cache_path = (tmp_path / "elf-cache").as_posix()
+    with cache.ElfCache(path=cache_path) as elf_cache:
+        elf_cache.set_attributes(random_data_file, attributes={"interp": "ld.so"})
+
+    with cache.ElfCache(path=cache_path) as elf_cache:
+        assert elf_cache.get(random_data_file).attributes == {"interp": "ld.so"}
+
+
+def test_elf_file_round_trip(elf_cache):
+    elf_file = elf.ElfFile(path="/bin/ls")
+    elf_cache.set_attributes(elf_file.path, attributes=elf_file.marshal())
+
+    cached_elf_file = elf.ElfFile.unmarshal(elf_cache.get("/bin/ls").attributes)
+
+    assert cached_elf_file.marshal() == elf_file.marshal()
+    assert cached_elf_file.arch == elf_file.arch
+    assert {n: l.versions for n, l in cached_elf_file.needed.items()} == {
+        n: l.versions for n, l in elf_file.needed.items()
+    }
+    assert os.path.samefile(cached_elf_file.path, elf_file.path)
@@ -0,0 +1,52 @@
+# -*- Mode:Python; indent-tabs-mode:nil; tab-width:4 -*-
+#
+# Copyright (C) 2022 Canonical Ltd
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License version 3 as
+# published by the Free Software Foundation.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import fcntl
+import os
+
+import pytest
+
+
+def _try_lock(mirror_dir, operation):
+    with open(f"{mirror_dir}.lock") as lock_file:
+        try:
+            fcntl.flock(lock_file, operation | fcntl.LOCK_NB)
+        except BlockingIOError:
+            return False
+        return True
+
+
+def test_get_mirror_dir(git_mirror_cache):
+    mirror_dir = git_mirror_cache.get_mirror_dir("https://example.com/repo.git")
+
+    assert os.path.dirname(mirror_dir) == git_mirror_cache.git_cache_root
+    assert mirror_dir.endswith(".git")
+    assert mirror_dir != git_mirror_cache.get_mirror_dir("https://example.com/other")
+
+
+@pytest.mark.parametrize(
+    "exclusive,shared_allowed",
+    [(True, False), (False, True)],
+)
+def test_lock(git_mirror_cache, exclusive, shared_allowed):
+    url = "https://example.com/repo.git"
+
+    with git_mirror_cache.lock(url, exclusive=exclusive) as mirror_dir:
+        assert mirror_dir == git_mirror_cache.get_mirror_dir(url)
+        assert _try_lock(mirror_dir, fcntl.LOCK_SH) is shared_allowed
+        assert _try_lock(mirror_dir, fcntl.LOCK_EX) is False
+
+    assert _try_lock(mirror_dir, fcntl.LOCK_EX) is True
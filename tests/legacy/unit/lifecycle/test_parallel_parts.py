@@ -0,0 +1,236 @@
+# -*- Mode:Python; indent-tabs-mode:nil; tab-width:4 -*-
+#
+# Copyright (C) 2022 Canonical Ltd
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License version 3 as
+# published by the Free Software Foundation.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import sys
+import time
+from typing import Dict, List
+from unittest.mock import Mock, patch
+
+import pytest
+
+from snapcraft_legacy.internal import errors, sources, steps
+from snapcraft_legacy.internal.lifecycle._runner import _Executor as Executor
+
+
+class FakePart:
+    def __init__(self, name: str) -> None:
+        self.name = name
+        self.source_handler = None
+
+
+class FakeConfig:
+    def __init__(self, dependencies: Dict[str, List[str]]) -> None:
+        self.all_parts = [FakePart(name) for name in dependencies]
+        parts = {p.name: p for p in self.all_parts}
+
+        class Parts:
+            def get_dependencies(self, part_name: str):
+                return {parts[d] for d in dependencies[part_name]}
+
+        self.parts = Parts()
+        self.project = None
+
+
+class UnpicklableError(errors.SnapcraftException):
+    def __init__(self, *, reason: str) -> None:
+        self.reason = reason
+        self.callback = lambda: None
+
+    def get_brief(self) -> str:
+        return self.reason
+
+    def get_resolution(self) -> str:
+        return "Don't."
+
+
+@pytest.fixture
+def log_dir(tmp_path):
+    return tmp_path
+
+
+@pytest.fixture(autouse=True)
+def fake_executor(log_dir):
+    def fake_handle_step(
+        self, requested_part_names, part, requested_step, current_step, cli_config
+    ):
+        (log_dir / f"{part.name}.start").write_text(str(time.monotonic()))
+        print(f"Building {part.name}")
+        print(f"Warning from {part.name}", file=sys.stderr)
+        if part.name == "fail":
+            raise errors.InvalidWorkerCountError(value="0")
+        if part.name == "unpicklable":
+            raise UnpicklableError(reason="unpicklable failure")
+        if part.name.startswith("wait"):
+            # Only finishes if all the waiting parts run at the same time.
+            for _ in range(100):
+                if len(list(log_dir.glob("wait*.start"))) == 2:
+                    break
+                time.sleep(0.05)
+            else:
+                raise RuntimeError(f"{part.name} ran alone")
+        time.sleep(0.1)
+        (log_dir / f"{part.name}.end").write_text(str(time.monotonic()))
+        self.steps_were_run = True
+
+    with patch.object(Executor, "_handle_step", fake_handle_step), patch.object(
+        Executor, "_step_needs_action", return_value=True
+    ), patch.object(Executor, "_handle_part_dependencies"):
+        yield
+
+
+def _handle_build(executor, config):
+    executor._handle_step_concurrently(
+        [], config.all_parts, steps.BUILD, steps.BUILD, None
+    )
+
+
+def test_independent_parts_run_concurrently(log_dir):
+    config = FakeConfig({"wait1": [], "wait2": []})
+    executor = Executor(config, jobs=2)
+
+    _handle_build(executor, config)
+
+    assert executor.steps_were_run
+    assert (log_dir / "wait1.end").exists()
+    assert (log_dir / "wait2.end").exists()
+
+
+def test_dependencies_finish_first(log_dir):
+    config = FakeConfig({"p1": [], "p2": ["p1"], "p3": []})
+    executor = Executor(config, jobs=3)
+
+    _handle_build(executor, config)
+
+    p1_end = float((log_dir / "p1.end").read_text())
+    p2_start = float((log_dir / "p2.start").read_text())
+    assert p1_end <= p2_start
+    assert (log_dir / "p3.end").exists()
+
+
+def test_output_is_replayed_per_part(capfd):
+    config = FakeConfig({"p1": [], "p2": []})
+    executor = Executor(config, jobs=2)
+
+    _handle_build(executor, config)
+
+    output = capfd.readouterr().out
+    assert sorted(output.splitlines()) == ["Building p1", "Building p2"]
+
+
+def test_job_limit(log_dir):
+    config = FakeConfig({"p1": [], "p2": [], "p3": []})
+    executor = Executor(config, jobs=1)
+
+    _handle_build(executor, config)
+
+    # With a single job the parts run one after the other.
+    times = sorted(
+        (
+            float((log_dir / f"{p}.start").read_text()),
+            float((log_dir / f"{p}.end").read_text()),
+        )
+        for p in ("p1", "p2", "p3")
+    )
+    for (_, end), (next_start, _) in zip(times, times[1:]):
+        assert end <= next_start
+
+
+def test_output_is_replayed(capfd):
+    config = FakeConfig({"p1": []})
+    executor = Executor(config, jobs=2)
+
+    _handle_build(executor, config)
+
+    out, err = capfd.readouterr()
+    assert out == "Building p1\n"
+    assert err == "Warning from p1\n"
+
+
+def test_error(log_dir):
+    config = FakeConfig({"fail": [], "p1": [], "p2": ["fail"]})
+    executor = Executor(config, jobs=2)
+
+    with pytest.raises(errors.InvalidWorkerCountError) as raised:
+        _handle_build(executor, config)
+
+    assert str(raised.value) == "Invalid value '0' for SNAPCRAFT_MAX_WORKERS."
+
+    # Running parts finish, but no new parts are started.
+    assert (log_dir / "p1.end").exists()
+    assert not (log_dir / "p2.start").exists()
+
+
+def test_unpicklable_error():
+    config = FakeConfig({"unpicklable": []})
+    executor = Executor(config, jobs=2)
+
+    with pytest.raises(errors.PartStepFailedError) as raised:
+        _handle_build(executor, config)
+
+    assert raised.value.get_details() == "unpicklable failure"
+
+
+def _file_source_handler(source_checksum="sha256/1", **kwargs):
+    return Mock(
+        spec=sources.FileBase,
+        source="http://example.com/file",
+        source_checksum=source_checksum,
+        **kwargs,
+    )
+
+
+def test_prefetch_sources():
+    config = FakeConfig({"p1": [], "p2": [], "p3": [], "p4": []})
+    config.all_parts[0].source_handler = _file_source_handler("sha256/1")
+    config.all_parts[1].source_handler = _file_source_handler(
+        "sha256/2",
+        prefetch=Mock(side_effect=sources.errors.SnapcraftRequestError(message="x")),
+    )
+    config.all_parts[2].source_handler = _file_source_handler("sha256/3")
+    config.all_parts[3].source_handler = Mock(spec=sources.Git)
+    executor = Executor(config, jobs=1)
+
+    # Failures are left for pull to report.
+    executor._prefetch_sources([], config.all_parts, steps.PULL)
+
+    for part in config.all_parts[:3]:
+        part.source_handler.prefetch.assert_called_once_with()
+
+
+def test_prefetch_sources_once_per_checksum():
+    config = FakeConfig({"p1": [], "p2": [], "p3": [], "p4": []})
+    config.all_parts[0].source_handler = _file_source_handler("sha256/1")
+    config.all_parts[1].source_handler = _file_source_handler("sha256/1")
+    config.all_parts[2].source_handler = _file_source_handler("sha256/2")
+    config.all_parts[3].source_handler = _file_source_handler(None)
+    executor = Executor(config, jobs=1)
+
+    executor._prefetch_sources([], config.all_parts, steps.PULL)
+
+    config.all_parts[0].source_handler.prefetch.assert_called_once_with()
+    config.all_parts[1].source_handler.prefetch.assert_not_called()
+    config.all_parts[2].source_handler.prefetch.assert_called_once_with()
+    config.all_parts[3].source_handler.prefetch.assert_not_called()
+
+
+def test_prefetch_sources_single_source():
+    config = FakeConfig({"p1": [], "p2": []})
+    config.all_parts[0].source_handler = _file_source_handler()
+    executor = Executor(config, jobs=1)
+
+    executor._prefetch_sources([], config.all_parts, steps.PULL)
+
+    config.all_parts[0].source_handler.prefetch.assert_not_called()
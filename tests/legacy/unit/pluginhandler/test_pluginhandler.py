@@ -183,6 +183,71 @@ class PluginTestCase(unit.TestCase):
                 "Expected staging to allow overwriting of already-staged files",
             )
 
+    def test_migrate_files_only_changed(self):
+        os.makedirs("install/dir")
+        os.makedirs("stage")
+        for name in ("unchanged", "changed", "dir/new"):
+            with open(os.path.join("install", name), "w") as f:
+                f.write(name)
+        with open("stage/unchanged", "w") as f:
+            f.write("unchanged")
+        os.link("install/changed", "stage/changed")
+        os.utime("stage/unchanged", ns=(0, 0))
+        os.utime("install/unchanged", ns=(0, 0))
+        os.remove("install/changed")
+        with open("install/changed", "w") as f:
+            f.write("rebuilt")
+        unchanged_inode = os.stat("stage/unchanged").st_ino
+
+        files, dirs = pluginhandler._migratable_filesets(["*"], "install")
+        pluginhandler._migrate_files(files, dirs, "install", "stage", only_changed=True)
+
+        self.assertThat(os.stat("stage/unchanged").st_ino, Equals(unchanged_inode))
+        self.assertTrue(os.path.samefile("install/changed", "stage/changed"))
+        self.assertTrue(os.path.samefile("install/dir/new", "stage/dir/new"))
+
+    def test_update_stage_only_migrates_changes(self):
+        handler = self.load_part("test-part")
+        other_handler = self.load_part("other-part")
+        handler.makedirs()
+        install_dir = handler.part_install_dir
+        os.makedirs(os.path.join(install_dir, "dir"))
+        for name in ("unchanged", "changed", "removed", "shared", "dir/removed"):
+            with open(os.path.join(install_dir, name), "w") as f:
+                f.write(name)
+        handler._do_stage()
+        unchanged_inode = os.stat(os.path.join(self.stage_dir, "unchanged")).st_ino
+
+        os.remove(os.path.join(install_dir, "changed"))
+        with open(os.path.join(install_dir, "changed"), "w") as f:
+            f.write("rebuilt")
+        for name in ("removed", "shared", "dir/removed"):
+            os.remove(os.path.join(install_dir, name))
+        os.rmdir(os.path.join(install_dir, "dir"))
+        handler._update_project_state = {
+            handler.name: handler.get_state(steps.STAGE),
+            other_handler.name: states.StageState({"shared"}, set()),
+        }
+        handler._do_stage()
+
+        self.assertThat(
+            sorted(os.listdir(self.stage_dir)),
+            Equals(["changed", "shared", "unchanged"]),
+        )
+        self.assertThat(
+            os.stat(os.path.join(self.stage_dir, "unchanged")).st_ino,
+            Equals(unchanged_inode),
+        )
+        self.assertTrue(
+            os.path.samefile(
+                os.path.join(install_dir, "changed"),
+                os.path.join(self.stage_dir, "changed"),
+            )
+        )
+        self.assertThat(
+            handler.get_state(steps.STAGE).files, Equals({"changed", "unchanged"})
+        )
+
     def test_migrate_files_supports_no_follow_symlinks(self):
         os.makedirs("install")
         os.makedirs("stage")
@@ -1413,6 +1478,39 @@ class CollisionTestCase(unit.TestCase):
         self.assertThat(raised.part_name, Equals("part4"))
         self.assertThat(raised.file_paths, Equals("    file.pc"))
 
+    def test_no_collisions_hard_linked_files(self):
+        part7 = self.load_part("part7")
+        part7.part_install_dir = os.path.join(self.path, "install7")
+        os.makedirs(part7.part_install_dir)
+        os.link(
+            os.path.join(self.part2.part_install_dir, "1"),
+            os.path.join(part7.part_install_dir, "1"),
+        )
+
+        pluginhandler.check_for_collisions([self.part2, part7])
+
+    def test_collisions_same_size_files(self):
+        part7 = self.load_part("part7")
+        part7.part_install_dir = os.path.join(self.path, "install7")
+        os.makedirs(part7.part_install_dir)
+        with open(os.path.join(part7.part_install_dir, "1"), mode="w") as f:
+            f.write("1")
+        part8 = self.load_part("part8")
+        part8.part_install_dir = os.path.join(self.path, "install8")
+        os.makedirs(part8.part_install_dir)
+        with open(os.path.join(part8.part_install_dir, "1"), mode="w") as f:
+            f.write("8")
+
+        raised = self.assertRaises(
+            errors.SnapcraftPartConflictError,
+            pluginhandler.check_for_collisions,
+            [self.part2, part7, part8],
+        )
+
+        self.assertThat(raised.other_part_name, Equals("part2"))
+        self.assertThat(raised.part_name, Equals("part8"))
+        self.assertThat(raised.file_paths, Equals("    1"))
+
     def test_collision_with_part_not_built(self):
         part_built = self.load_part(
             "part_built", part_properties={"stage": ["collision"]}
@@ -16,7 +16,7 @@
 
 import os
 from collections import OrderedDict
-from unittest.mock import call, patch
+from unittest.mock import ANY, call, patch
 
 import fixtures
 from testtools.matchers import Contains, Equals
@@ -44,6 +44,8 @@ class StateBaseTestCase(unit.TestCase):
             )
         ).mock
 
+        self.useFixture(fixtures.EnvironmentVariable("SNAPCRAFT_MAX_WORKERS", "1"))
+
         self.handler = self.load_part("test_part")
         self.handler.makedirs()
 
@@ -661,7 +663,10 @@ class StateTestCase(StateBaseTestCase):
         self.assertThat(self.handler.latest_step(), Equals(steps.PRIME))
         self.assertRaises(errors.NoNextStepError, self.handler.next_step)
         self.get_elf_files_mock.assert_called_once_with(
-            self.handler._project.prime_dir, {"bin/1", "bin/2"}
+            self.handler._project.prime_dir,
+            {"bin/1", "bin/2"},
+            workers=1,
+            elf_cache=ANY,
         )
         self.assertFalse(mock_copy.called)
 
@@ -741,7 +746,7 @@ class StateTestCase(StateBaseTestCase):
         # bin/2 shouldn't be in this list as it was already primed by another
         # part.
         self.get_elf_files_mock.assert_called_once_with(
-            self.handler._project.prime_dir, {"bin/1"}
+            self.handler._project.prime_dir, {"bin/1"}, workers=1, elf_cache=ANY
         )
         self.assertFalse(mock_copy.called)
 
@@ -803,7 +808,10 @@ class StateTestCase(StateBaseTestCase):
         self.assertThat(self.handler.latest_step(), Equals(steps.PRIME))
         self.assertRaises(errors.NoNextStepError, self.handler.next_step)
         self.get_elf_files_mock.assert_called_once_with(
-            self.handler._project.prime_dir, {"bin/1", "bin/2"}
+            self.handler._project.prime_dir,
+            {"bin/1", "bin/2"},
+            workers=1,
+            elf_cache=ANY,
         )
         mock_migrate_files.assert_has_calls(
             [
@@ -812,6 +820,7 @@ class StateTestCase(StateBaseTestCase):
                     {"bin"},
                     self.handler._project.stage_dir,
                     self.handler._project.prime_dir,
+                    only_changed=False,
                 )
             ]
         )
@@ -874,7 +883,7 @@ class StateTestCase(StateBaseTestCase):
         self.assertThat(self.handler.latest_step(), Equals(steps.PRIME))
         self.assertRaises(errors.NoNextStepError, self.handler.next_step)
         self.get_elf_files_mock.assert_called_once_with(
-            self.handler._project.prime_dir, {"bin/file"}
+            self.handler._project.prime_dir, {"bin/file"}, workers=1, elf_cache=ANY
         )
         # Verify that only the part's files were migrated-- not the system
         # dependency.
@@ -883,6 +892,7 @@ class StateTestCase(StateBaseTestCase):
             {"bin"},
             self.handler._project.stage_dir,
             self.handler._project.prime_dir,
+            only_changed=False,
         )
 
         state = self.handler.get_prime_state()
@@ -923,13 +933,17 @@ class StateTestCase(StateBaseTestCase):
         self.assertThat(self.handler.latest_step(), Equals(steps.PRIME))
         self.assertRaises(errors.NoNextStepError, self.handler.next_step)
         self.get_elf_files_mock.assert_called_once_with(
-            self.handler._project.prime_dir, {"bin/1", "foo/bar/baz"}
+            self.handler._project.prime_dir,
+            {"bin/1", "foo/bar/baz"},
+            workers=1,
+            elf_cache=ANY,
         )
         mock_migrate_files.assert_called_once_with(
             {"bin/1", "foo/bar/baz"},
             {"bin", "foo", "foo/bar"},
             self.handler._project.stage_dir,
             self.handler._project.prime_dir,
+            only_changed=False,
         )
 
         state = self.handler.get_prime_state()
@@ -956,7 +970,7 @@ class StateTestCase(StateBaseTestCase):
         self.assertThat(self.handler.latest_step(), Equals(steps.PRIME))
         self.assertRaises(errors.NoNextStepError, self.handler.next_step)
         self.get_elf_files_mock.assert_called_once_with(
-            self.handler._project.prime_dir, {"bin/1"}
+            self.handler._project.prime_dir, {"bin/1"}, workers=1, elf_cache=ANY
         )
         self.assertFalse(mock_copy.called)
 
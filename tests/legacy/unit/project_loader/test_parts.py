@@ -15,11 +15,16 @@
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
 import pathlib
+import random
 from textwrap import dedent
+from unittest import mock
+
+import pytest
 
 from testtools.matchers import Equals
 
 from snapcraft_legacy.internal import project_loader
+from snapcraft_legacy.internal.project_loader import _parts_config
 from snapcraft_legacy.project import Project
 from tests.legacy import fixture_setup
 
@@ -174,6 +179,118 @@ class TestPartOrder:
             assert part.name == expected_name
 
 
+class FakePart:
+    def __init__(self, name, env_calls):
+        self.name = name
+        self.deps = []
+        self.part_install_dir = f"/parts/{name}/install"
+        self.build_environment = []
+        self._env_calls = env_calls
+
+    def env(self, root):
+        self._env_calls.append(self.name)
+        return [f'{self.name.upper()}="{root}"']
+
+
+def make_parts_config(dependencies):
+    """Return PartsConfig for a synthetic graph of fake parts."""
+    env_calls = []
+    parts_config = _parts_config.PartsConfig.__new__(_parts_config.PartsConfig)
+    parts_config._project = mock.Mock(stage_dir="/stage", arch_triplet="x86_64")
+    parts_config.after_requests = dependencies
+    parts_config.all_parts = [FakePart(name, env_calls) for name in dependencies]
+    parts_config._compute_dependencies()
+    parts_config.all_parts = parts_config._sort_parts()
+    return parts_config, env_calls
+
+
+def make_lattice(width, depth):
+    """Return dependencies where each part is after all parts in the row above."""
+    dependencies = {}
+    for row in range(depth):
+        for column in range(width):
+            dependencies[f"part-{row}-{column}"] = [
+                f"part-{row - 1}-{c}" for c in range(width) if row
+            ]
+    return dependencies
+
+
+def legacy_sort(parts):
+    """The original quadratic sorting, as the reference ordering."""
+    parts = sorted(parts, key=lambda part: part.name, reverse=True)
+    sorted_parts = []
+    while parts:
+        top_part = next(
+            part for part in parts if not any(part in other.deps for other in parts)
+        )
+        sorted_parts = [top_part] + sorted_parts
+        parts.remove(top_part)
+    return sorted_parts
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_sort_parts_matches_legacy_order(seed):
+    generator = random.Random(seed)
+    names = [f"part{i}" for i in range(30)]
+    generator.shuffle(names)
+    dependencies = {
+        name: generator.sample(names[:index], min(index, generator.randrange(4)))
+        for index, name in enumerate(names)
+    }
+
+    parts_config, _ = make_parts_config(dependencies)
+
+    assert [p.name for p in parts_config.all_parts] == [
+        p.name for p in legacy_sort(parts_config.all_parts)
+    ]
+
+
+def test_sort_parts_circular_dependency():
+    with pytest.raises(project_loader.errors.SnapcraftLogicError):
+        make_parts_config({"p1": ["p3"], "p2": ["p1"], "p3": ["p2"], "p4": []})
+
+
+def test_sort_parts_large_graph():
+    parts_config, _ = make_parts_config(make_lattice(width=15, depth=10))
+
+    positions = {p.name: i for i, p in enumerate(parts_config.all_parts)}
+    assert len(positions) == 150
+    for part in parts_config.all_parts:
+        for dep in part.deps:
+            assert positions[dep.name] < positions[part.name]
+
+
+def test_build_env_for_part_large_graph():
+    dependencies = make_lattice(width=3, depth=50)
+    parts_config, env_calls = make_parts_config(dependencies)
+    part = parts_config.get_part("part-49-0")
+
+    with mock.patch.object(
+        _parts_config, "runtime_env", wraps=_parts_config.runtime_env
+    ) as runtime_env_mock, mock.patch.object(
+        _parts_config, "get_snapcraft_global_environment", return_value={}
+    ), mock.patch.object(
+        _parts_config, "get_snapcraft_part_directory_environment", return_value={}
+    ):
+        env = parts_config.build_env_for_part(part)
+
+    # Each dependency is only visited once, rather than once per path
+    # through the graph (3 ** 49 paths here).
+    assert len(env_calls) == 1 + 3 * 49
+    assert runtime_env_mock.call_count == 2
+    for dep in parts_config.get_dependencies("part-49-0", recursive=True):
+        assert f'{dep.name.upper()}="/stage"' in env
+    assert len(env) == len(set(env))
+
+
+def test_get_dependencies_recursive_large_graph():
+    parts_config, _ = make_parts_config(make_lattice(width=3, depth=50))
+
+    dependencies = parts_config.get_dependencies("part-49-0", recursive=True)
+
+    assert len(dependencies) == 3 * 49
+
+
 class PluginLoadTest(LoadPartBaseTest):
     def test_plugin_loading(self):
         self.make_snapcraft_project(
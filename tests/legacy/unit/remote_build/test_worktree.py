@@ -18,8 +18,9 @@ import os
 import tarfile
 from collections import OrderedDict
 from pathlib import Path
+from unittest import mock
 
-from testtools.matchers import Equals
+from testtools.matchers import Equals, HasLength
 
 from snapcraft_legacy import yaml_utils
 from snapcraft_legacy.internal.remote_build import WorkTree
@@ -133,6 +134,54 @@ class WorkTreeTestCase(unit.TestCase):
         self.assertFalse(self._dest.exists("cache", "my-part", "dir"))
         self.assertFalse(self.tarball_file_contains("my-part", None, "dir"))
 
+    def test_worktree_reuses_unchanged_archive(self):
+        self._wt.prepare_repository()
+        archive_inode = os.stat(self.archive_path("my-part")).st_ino
+
+        with mock.patch("subprocess.check_call") as mock_check_call:
+            self._wt.prepare_repository()
+
+        mock_check_call.assert_not_called()
+        self.assertThat(
+            os.stat(self.archive_path("my-part")).st_ino, Equals(archive_inode)
+        )
+        self.assertThat(
+            os.listdir(os.path.join(self._dest.path, "archives")), HasLength(1)
+        )
+
+    def test_worktree_prunes_replaced_archives(self):
+        self._wt.prepare_repository()
+        self._source.create_file("new_file")
+
+        self._wt.prepare_repository()
+
+        self.assertThat(
+            os.listdir(os.path.join(self._dest.path, "archives")), HasLength(1)
+        )
+        self.assertTrue(self.tarball_file_contains("my-part", None, "new_file"))
+
+    def test_worktree_archives_with_pigz(self):
+        def fake_tar(command):
+            open(command[4], "wb").close()
+
+        with mock.patch("shutil.which", return_value="/usr/bin/pigz"), mock.patch(
+            "subprocess.check_call", side_effect=fake_tar
+        ) as mock_check_call:
+            self._wt.prepare_repository()
+
+        mock_check_call.assert_called_once_with(
+            [
+                "tar",
+                "-I",
+                "pigz",
+                "-cf",
+                self.archive_path("my-part"),
+                "-C",
+                os.path.join(self._dest.path, "cache", "my-part"),
+                ".",
+            ]
+        )
+
     def test_assets_yaml(self):
         self._source.create_dir("snap", "gui")
         self._source.create_file("snap", "gui", "test.desktop")
@@ -61,6 +61,18 @@ class FixXmlToolsTestCase(RepoBaseTestCase):
             ]
         )
 
+    def test_fix_xml2_config_hard_linked(self):
+        path = os.path.join("root", "usr", "bin", "xml2-config")
+        os.makedirs(os.path.dirname(path))
+        with open(path, "w") as f:
+            f.write("prefix=/usr/foo")
+        os.link(path, "cached-xml2-config")
+
+        BaseRepo.normalize("root")
+
+        self.assertThat(path, FileContains("prefix=root/usr/foo"))
+        self.assertThat("cached-xml2-config", FileContains("prefix=/usr/foo"))
+
     def test_fix_xslt_config(self):
         self.assert_fix(
             [
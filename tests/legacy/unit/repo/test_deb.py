@@ -14,7 +14,9 @@
 # You should have received a copy of the GNU General Public License
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
-import contextlib
+import io
+import os
+import tarfile
 import textwrap
 from pathlib import Path
 from subprocess import CalledProcessError
@@ -24,7 +26,7 @@ from unittest.mock import call
 import fixtures
 import pytest
 import testtools
-from testtools.matchers import Equals
+from testtools.matchers import Equals, Not
 
 from snapcraft_legacy.internal import repo
 from snapcraft_legacy.internal.repo import errors
@@ -38,6 +40,42 @@ def mock_env_copy():
         yield m
 
 
+def _make_deb(
+    deb_path: Path, *, name: str = "fake-package", version: str = "1.0-1ubuntu1"
+) -> Path:
+    """Write a deb with only a control file and no data to deb_path."""
+    control = textwrap.dedent(
+        f"""\
+        Package: {name}
+        Version: {version}
+        Architecture: all
+        Description: fake package
+         with a multiline: description
+        """
+    ).encode()
+    control_tar = io.BytesIO()
+    with tarfile.open(fileobj=control_tar, mode="w:gz") as tar:
+        info = tarfile.TarInfo("./control")
+        info.size = len(control)
+        tar.addfile(info, io.BytesIO(control))
+
+    with deb_path.open("wb") as deb_file:
+        deb_file.write(b"!<arch>\n")
+        for member_name, data in (
+            ("debian-binary", b"2.0\n"),
+            ("control.tar.gz", control_tar.getvalue()),
+        ):
+            header = (
+                f"{member_name:<16}{0:<12}{0:<6}{0:<6}{100644:<8}{len(data):<10}`\n"
+            )
+            deb_file.write(header.encode("ascii"))
+            deb_file.write(data)
+            if len(data) % 2:
+                deb_file.write(b"\n")
+
+    return deb_path
+
+
 class TestPackages(unit.TestCase):
     def setUp(self):
         super().setUp()
@@ -57,19 +95,6 @@ class TestPackages(unit.TestCase):
         repo._deb._DEB_CACHE_DIR = self.debs_path
         repo._deb._STAGE_CACHE_DIR = self.stage_cache_path
 
-        @contextlib.contextmanager
-        def fake_tempdir(*, suffix: str, **kwargs):
-            temp_dir = Path(self.path, suffix)
-            temp_dir.mkdir(exist_ok=True, parents=True)
-            yield str(temp_dir)
-
-        self.fake_tmp_mock = self.useFixture(
-            fixtures.MockPatch(
-                "snapcraft_legacy.internal.repo._deb.tempfile.TemporaryDirectory",
-                new=fake_tempdir,
-            )
-        ).mock
-
         self.stage_packages_path = Path(self.path)
 
     @mock.patch(
@@ -208,6 +233,135 @@ class TestPackages(unit.TestCase):
 
         mock_normalize.assert_not_called()
 
+    def test_extract_deb_name_version(self):
+        deb_path = _make_deb(Path(self.path, "fake-package_1.0_all.deb"))
+
+        self.assertThat(
+            repo.Ubuntu._extract_deb_name_version(deb_path),
+            Equals("fake-package=1.0-1ubuntu1"),
+        )
+
+    @mock.patch("subprocess.check_output", return_value=b"fake-package=1.0\n")
+    def test_extract_deb_name_version_fallback(self, mock_check_output):
+        deb_path = Path(self.path, "fake-package_1.0_all.deb")
+        deb_path.write_bytes(b"not an ar archive")
+
+        self.assertThat(
+            repo.Ubuntu._extract_deb_name_version(deb_path),
+            Equals("fake-package=1.0"),
+        )
+        mock_check_output.assert_called_once_with(
+            ["dpkg-deb", "--show", "--showformat=${Package}=${Version}", deb_path]
+        )
+
+    @mock.patch.object(repo._deb.Ubuntu, "normalize")
+    def test_unpack_stage_packages(self, mock_normalize):
+        packages_path = Path(self.path, "pkg")
+        install_path = Path(self.path, "install")
+        packages_path.mkdir()
+        for name in ("a-package", "b-package", "c-package"):
+            _make_deb(packages_path / f"{name}_1.0_all.deb", name=name)
+
+        def fake_extract_deb(deb_path, extract_dir):
+            name = deb_path.name.split("_")[0]
+            Path(extract_dir, "usr").mkdir(parents=True)
+            Path(extract_dir, "usr", name).write_text(name)
+            Path(extract_dir, "usr", "shared").write_text(name)
+
+        with mock.patch.object(
+            repo._deb.Ubuntu, "_extract_deb", side_effect=fake_extract_deb
+        ):
+            repo.Ubuntu.unpack_stage_packages(
+                stage_packages_path=packages_path, install_path=install_path
+            )
+
+        for name in ("a-package", "b-package", "c-package"):
+            self.assertThat(Path(install_path, "usr", name).read_text(), Equals(name))
+        # Packages are staged in order regardless of when they are extracted.
+        self.assertThat(
+            Path(install_path, "usr", "shared").read_text(), Equals("c-package")
+        )
+        mock_normalize.assert_called_once_with(str(install_path))
+
+    @mock.patch.object(repo._deb.Ubuntu, "normalize")
+    def test_unpack_stage_packages_error(self, mock_normalize):
+        packages_path = Path(self.path, "pkg")
+        packages_path.mkdir()
+        _make_deb(packages_path / "fake-package_1.0_all.deb")
+        self.fake_run.side_effect = CalledProcessError(1, "dpkg-deb")
+
+        self.assertRaises(
+            errors.UnpackError,
+            repo.Ubuntu.unpack_stage_packages,
+            stage_packages_path=packages_path,
+            install_path=Path(self.path, "install"),
+        )
+        mock_normalize.assert_not_called()
+
+    @mock.patch.object(repo._deb.Ubuntu, "normalize")
+    def test_unpack_stage_packages_cached(self, mock_normalize):
+        packages_path = Path(self.path, "pkg")
+        packages_path.mkdir()
+        _make_deb(packages_path / "fake-package_1.0_all.deb")
+
+        def fake_extract_deb(deb_path, extract_dir):
+            Path(extract_dir, "file").write_text("#!/usr/bin/python3\n")
+            Path(extract_dir, "link").symlink_to("file")
+
+        with mock.patch.object(
+            repo._deb.Ubuntu, "_extract_deb", side_effect=fake_extract_deb
+        ) as mock_extract_deb:
+            for install_dir in ("install1", "install2"):
+                repo.Ubuntu.unpack_stage_packages(
+                    stage_packages_path=packages_path,
+                    install_path=Path(self.path, install_dir),
+                )
+
+        # The second unpack reuses the tree extracted by the first one, which
+        # is normalized before being cached.
+        mock_extract_deb.assert_called_once()
+        for install_dir in ("install1", "install2"):
+            self.assertThat(
+                Path(self.path, install_dir, "file").read_text(),
+                Equals("#!/usr/bin/env python3\n"),
+            )
+            self.assertThat(
+                os.readlink(Path(self.path, install_dir, "link")), Equals("file")
+            )
+        self.assertThat(
+            Path(self.path, "install1", "file").stat().st_ino,
+            Not(Equals(Path(self.path, "install2", "file").stat().st_ino)),
+        )
+
+    @mock.patch.object(repo._deb.Ubuntu, "normalize")
+    def test_unpack_stage_packages_cached_edited_in_place(self, mock_normalize):
+        packages_path = Path(self.path, "pkg")
+        packages_path.mkdir()
+        _make_deb(packages_path / "fake-package_1.0_all.deb")
+
+        def fake_extract_deb(deb_path, extract_dir):
+            Path(extract_dir, "setup.sh").write_text("original\n")
+
+        with mock.patch.object(
+            repo._deb.Ubuntu, "_extract_deb", side_effect=fake_extract_deb
+        ):
+            repo.Ubuntu.unpack_stage_packages(
+                stage_packages_path=packages_path,
+                install_path=Path(self.path, "install1"),
+            )
+            # Plugins rewrite staged files in place.
+            with open(Path(self.path, "install1", "setup.sh"), "r+") as f:
+                f.write("modified")
+            repo.Ubuntu.unpack_stage_packages(
+                stage_packages_path=packages_path,
+                install_path=Path(self.path, "install2"),
+            )
+
+        self.assertThat(
+            Path(self.path, "install2", "setup.sh").read_text(),
+            Equals("original\n"),
+        )
+
 
 class BuildPackagesTestCase(unit.TestCase):
     def setUp(self):
@@ -516,13 +670,15 @@ class PackageForFileTest(unit.TestCase):
                 ).encode()
             elif "symlink" in args[0][2].as_posix():
                 raise CalledProcessError(
-                    1, f"dpkg-query: no path found matching pattern {args[0][2]}",
+                    1,
+                    f"dpkg-query: no path found matching pattern {args[0][2]}",
                 )
             elif "target" in args[0][2].as_posix():
                 return "coreutils: /usr/bin/dirname\n".encode()
             else:
                 raise CalledProcessError(
-                    1, f"dpkg-query: no path found matching pattern {args[0][2]}",
+                    1,
+                    f"dpkg-query: no path found matching pattern {args[0][2]}",
                 )
 
         self.useFixture(
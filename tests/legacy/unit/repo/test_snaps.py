@@ -14,6 +14,7 @@
 # You should have received a copy of the GNU General Public License
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
+import os
 from unittest import mock
 
 import fixtures
@@ -373,6 +374,75 @@ class SnapPackageLifecycleTest(unit.TestCase):
         self.assertThat("fake-snap.assert", FileContains(""))
         fake_get_assertion.mock.assert_not_called()
 
+    def test_download_from_host_copies_installed_file(self):
+        self.useFixture(
+            fixtures.MockPatch(
+                "snapcraft_legacy.internal.repo.snaps.get_assertion",
+                return_value=b"foo-assert",
+            )
+        )
+        self.useFixture(
+            fixtures.MockPatch(
+                "snapcraft_legacy.internal.repo.snaps._SNAPD_SNAPS_DIR", "snaps"
+            )
+        )
+        fake_download = fixtures.MockPatch(
+            "snapcraft_legacy.internal.repo.snaps._download_local_snap_file"
+        )
+        self.useFixture(fake_download)
+        os.mkdir("snaps")
+        with open(os.path.join("snaps", "fake-snap_10.snap"), "wb") as snap_file:
+            snap_file.write(b"fake-snap-data")
+        self.fake_snapd.snaps_result = [
+            {
+                "id": "fake-snap-id",
+                "name": "fake-snap",
+                "channel": "stable",
+                "revision": "10",
+                "installed-size": 14,
+            }
+        ]
+
+        snap_pkg = snaps.SnapPackage("fake-snap/strict/stable")
+        snap_pkg.local_download(
+            snap_path="fake-snap.snap", assertion_path="fake-snap.assert"
+        )
+
+        self.assertThat("fake-snap.snap", FileContains("fake-snap-data"))
+        fake_download.mock.assert_not_called()
+
+    def test_download_from_host_streams_mismatched_file(self):
+        self.useFixture(
+            fixtures.MockPatch(
+                "snapcraft_legacy.internal.repo.snaps.get_assertion",
+                return_value=b"foo-assert",
+            )
+        )
+        self.useFixture(
+            fixtures.MockPatch(
+                "snapcraft_legacy.internal.repo.snaps._SNAPD_SNAPS_DIR", "snaps"
+            )
+        )
+        os.mkdir("snaps")
+        with open(os.path.join("snaps", "fake-snap_10.snap"), "wb") as snap_file:
+            snap_file.write(b"partial")
+        self.fake_snapd.snaps_result = [
+            {
+                "id": "fake-snap-id",
+                "name": "fake-snap",
+                "channel": "stable",
+                "revision": "10",
+                "installed-size": 14,
+            }
+        ]
+
+        snap_pkg = snaps.SnapPackage("fake-snap/strict/stable")
+        snap_pkg.local_download(
+            snap_path="fake-snap.snap", assertion_path="fake-snap.assert"
+        )
+
+        self.assertThat("fake-snap.snap", FileContains("/v2/snaps/fake-snap/file"))
+
     def test_install_logged_in(self):
         self.fake_snapd.find_result = [
             {"fake-snap": {"channels": {"strict/stable": {"confinement": "strict"}}}}
@@ -489,7 +559,7 @@ class SnapPackageLifecycleTest(unit.TestCase):
             directory="fakedir",
         )
         self.assertThat(
-            self.fake_snap_command.calls,
+            sorted(self.fake_snap_command.calls),
             Equals(
                 [
                     ["snap", "download", "fake-snap"],
@@ -517,7 +587,7 @@ class SnapPackageLifecycleTest(unit.TestCase):
             directory="fakedir",
         )
         self.assertThat(
-            self.fake_snap_command.calls,
+            sorted(self.fake_snap_command.calls),
             Equals(
                 [
                     ["snap", "download", "fake-snap"],
@@ -640,6 +710,131 @@ class SnapPackageLifecycleTest(unit.TestCase):
             installed_snaps, Equals(["fake-base-snap=test-fake-base-snap-revision"])
         )
 
+    def test_install_snaps_queries_installed_snaps_once(self):
+        self.fake_snapd.find_result = [
+            {
+                "fake-snap": {
+                    "channel": "stable",
+                    "type": "app",
+                    "channels": {"latest/stable": {"confinement": "strict"}},
+                }
+            },
+            {
+                "other-fake-snap": {
+                    "channel": "stable",
+                    "type": "app",
+                    "channels": {"latest/stable": {"confinement": "strict"}},
+                }
+            },
+        ]
+        self.fake_snapd.snaps_result = [
+            {
+                "name": "fake-snap",
+                "channel": "latest/stable",
+                "revision": "test-fake-snap-revision",
+            },
+            {
+                "name": "other-fake-snap",
+                "channel": "latest/stable",
+                "revision": "test-other-fake-snap-revision",
+            },
+        ]
+
+        with mock.patch(
+            "snapcraft_legacy.internal.repo.snaps._get_local_snap_info"
+        ) as mock_get_local_snap_info:
+            installed_snaps = snaps.install_snaps(["fake-snap", "other-fake-snap"])
+
+        mock_get_local_snap_info.assert_not_called()
+        self.assertThat(
+            installed_snaps,
+            Equals(
+                [
+                    "fake-snap=test-fake-snap-revision",
+                    "other-fake-snap=test-other-fake-snap-revision",
+                ]
+            ),
+        )
+        # Both snaps were installed on the requested channel already.
+        self.assertThat(self.fake_snap_command.calls, Equals([]))
+
+    def test_install_snaps_unavailable(self):
+        self.fake_snapd.find_result = [
+            {
+                "fake-snap": {
+                    "channel": "stable",
+                    "type": "app",
+                    "channels": {"latest/stable": {"confinement": "strict"}},
+                }
+            }
+        ]
+
+        self.assertRaises(
+            errors.SnapUnavailableError,
+            snaps.install_snaps,
+            ["fake-snap", "missing-snap"],
+        )
+        self.assertThat(self.fake_snap_command.calls, Equals([]))
+
+
+class LocalSnapsTestCase(unit.TestCase):
+    def test_get_local_snaps(self):
+        self.fake_snapd.snaps_result = [
+            {"name": "test-snap-1", "revision": "test-snap-1-revision"},
+            {"name": "test-snap-2", "revision": "test-snap-2-revision"},
+        ]
+
+        local_snaps = snaps.get_local_snaps()
+
+        self.assertThat(
+            local_snaps,
+            Equals(
+                {
+                    "test-snap-1": {
+                        "name": "test-snap-1",
+                        "revision": "test-snap-1-revision",
+                    },
+                    "test-snap-2": {
+                        "name": "test-snap-2",
+                        "revision": "test-snap-2-revision",
+                    },
+                }
+            ),
+        )
+
+    def test_snap_package_from_local_snaps(self):
+        local_snaps = {
+            "fake-snap": {
+                "name": "fake-snap",
+                "channel": "latest/stable",
+                "revision": "1",
+            }
+        }
+
+        with mock.patch(
+            "snapcraft_legacy.internal.repo.snaps._get_local_snap_info"
+        ) as mock_get_local_snap_info:
+            installed = snaps.SnapPackage("fake-snap", local_snaps=local_snaps)
+            not_installed = snaps.SnapPackage(
+                "other-fake-snap", local_snaps=local_snaps
+            )
+
+            self.assertThat(installed.installed, Equals(True))
+            self.assertThat(installed.get_current_channel(), Equals("latest/stable"))
+            self.assertThat(not_installed.installed, Equals(False))
+
+        mock_get_local_snap_info.assert_not_called()
+
+    def test_snapd_session_is_reused(self):
+        with mock.patch.object(snaps, "_snapd_session", None):
+            session = snaps._get_snapd_session()
+            with mock.patch.object(session, "get", wraps=session.get) as mock_get:
+                snaps.get_installed_snaps()
+                snaps.get_local_snaps()
+
+            self.assertThat(snaps._get_snapd_session(), Is(session))
+        self.assertThat(mock_get.call_count, Equals(2))
+
 
 class InstalledSnapsTestCase(unit.TestCase):
     def test_get_installed_snaps(self):
@@ -669,3 +864,6 @@ class SnapdNotInstalledTestCase(unit.TestCase):
     def test_get_installed_snaps(self):
         installed_snaps = snaps.get_installed_snaps()
         self.assertThat(installed_snaps, Equals([]))
+
+    def test_get_local_snaps(self):
+        self.assertThat(snaps.get_local_snaps(), Equals(None))
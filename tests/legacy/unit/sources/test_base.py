@@ -14,12 +14,16 @@
 # You should have received a copy of the GNU General Public License
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
+import hashlib
 import os
 from unittest import mock
 
+import fixtures
 import requests
-from testtools.matchers import Contains, Equals
+from testtools.matchers import Contains, Equals, Not
 
+from snapcraft_legacy import file_utils
+from snapcraft_legacy.internal.cache import FileCache
 from snapcraft_legacy.internal.sources import _base, errors
 from tests.legacy import unit
 
@@ -52,6 +56,47 @@ class TestFileBase(unit.TestCase):
             file_src.source_dir, src=expected, clean_target=False
         )
 
+    def make_cached_file(self, content):
+        with open("cached", "wb") as cached_file:
+            cached_file.write(content)
+        checksum = "sha256/" + file_utils.calculate_hash("cached", algorithm="sha256")
+        cache_file = FileCache().cache(
+            filename="cached", algorithm="sha256", hash=checksum.split("/")[1]
+        )
+        return checksum, cache_file
+
+    @mock.patch("snapcraft_legacy.internal.sources._base._download")
+    def test_pull_cached_links(self, mock_download):
+        checksum, cache_file = self.make_cached_file(b"content")
+        os.mkdir("dir")
+        file_src = self.get_mock_file_base("http://snapcraft.io/file.tar", "dir")
+        file_src.source_checksum = checksum
+
+        file_src.pull()
+
+        expected = os.path.join("dir", "file.tar")
+        mock_download.download.assert_not_called()
+        file_src.provision.assert_called_once_with(
+            file_src.source_dir, src=expected, clean_target=False
+        )
+        self.assertTrue(os.path.samefile(expected, cache_file))
+
+    @mock.patch("snapcraft_legacy.internal.sources._base._download")
+    def test_download_cached_copies(self, mock_download):
+        checksum, cache_file = self.make_cached_file(b"content")
+        os.mkdir("dir")
+        file_src = self.get_mock_file_base("http://snapcraft.io/file.sh", "dir")
+        file_src.source_checksum = checksum
+
+        downloaded = file_src.download()
+
+        mock_download.download.assert_not_called()
+        self.assertFalse(os.path.samefile(downloaded, cache_file))
+        with open(downloaded, "wb") as downloaded_file:
+            downloaded_file.write(b"changed")
+        with open(cache_file, "rb") as cached_file:
+            self.assertThat(cached_file.read(), Equals(b"content"))
+
     @mock.patch("shutil.copy2", side_effect=FileNotFoundError())
     def test_pull_copy_source_does_not_exist(self, mock_shutil_copy2):
         file_src = self.get_mock_file_base("does-not-exist.tar.gz", ".")
@@ -62,10 +107,9 @@ class TestFileBase(unit.TestCase):
             str(raised), Contains("Failed to pull source: 'does-not-exist.tar.gz'")
         )
 
-    @mock.patch("snapcraft_legacy.internal.sources._base.requests")
-    @mock.patch("snapcraft_legacy.internal.sources._base.download_requests_stream")
+    @mock.patch("snapcraft_legacy.internal.sources._base._download")
     @mock.patch("snapcraft_legacy.internal.sources._base.download_urllib_source")
-    def test_download_file_destination(self, dus, drs, req):
+    def test_download_file_destination(self, dus, dl):
         file_src = self.get_mock_file_base("http://snapcraft.io/snapcraft.yaml", "dir")
         self.assertFalse(hasattr(file_src, "file"))
 
@@ -78,9 +122,10 @@ class TestFileBase(unit.TestCase):
             ),
         )
 
+    @mock.patch("snapcraft_legacy.internal.sources._download.sleep")
     @mock.patch("snapcraft_legacy.internal.common.get_url_scheme", return_value=False)
     @mock.patch("requests.get", side_effect=requests.exceptions.ConnectionError("foo"))
-    def test_download_error(self, mock_get, mock_gus):
+    def test_download_error(self, mock_get, mock_gus, mock_sleep):
         base = self.get_mock_file_base("", "")
         base.source_checksum = False
 
@@ -88,21 +133,97 @@ class TestFileBase(unit.TestCase):
 
         self.assertThat(str(raised), Contains("Network request error"))
 
-    @mock.patch("snapcraft_legacy.internal.sources._base.download_requests_stream")
-    @mock.patch("snapcraft_legacy.internal.sources._base.requests")
-    def test_download_http(self, mock_requests, mock_download):
+    @mock.patch("snapcraft_legacy.internal.sources._base._download")
+    def test_download_http(self, mock_download):
         file_src = self.get_mock_file_base("http://snapcraft.io/snapcraft.yaml", "dir")
 
-        mock_request = mock.Mock()
-        mock_requests.get.return_value = mock_request
+        file_src.pull()
+
+        mock_download.download.assert_called_once_with(
+            file_src.source, file_src.file, source_checksum=None, connections=1
+        )
+
+    @mock.patch("snapcraft_legacy.internal.sources._base._download")
+    def test_download_http_connections(self, mock_download):
+        self.useFixture(
+            fixtures.EnvironmentVariable("SNAPCRAFT_DOWNLOAD_CONNECTIONS", "4")
+        )
+        file_src = self.get_mock_file_base("http://snapcraft.io/snapcraft.yaml", "dir")
 
         file_src.pull()
 
-        mock_requests.get.assert_called_once_with(
-            file_src.source, stream=True, allow_redirects=True
+        mock_download.download.assert_called_once_with(
+            file_src.source, file_src.file, source_checksum=None, connections=4
+        )
+
+    def test_download_http_caches_verified_file(self):
+        content = b"content"
+        checksum = "sha256/" + hashlib.sha256(content).hexdigest()
+        os.mkdir("dir")
+        file_src = self.get_mock_file_base("http://snapcraft.io/file.tar", "dir")
+        file_src.source_checksum = checksum
+
+        def fake_download(url, destination, **kwargs):
+            with open(destination, "wb") as destination_file:
+                destination_file.write(content)
+
+        with mock.patch(
+            "snapcraft_legacy.internal.sources._base._download.download",
+            side_effect=fake_download,
+        ) as mock_download, mock.patch(
+            "snapcraft_legacy.internal.cache._file.calculate_hash"
+        ) as mock_calculate_hash:
+            file_src.pull()
+
+        mock_download.assert_called_once_with(
+            file_src.source, file_src.file, source_checksum=checksum, connections=1
+        )
+        # The download was verified as it was received, it is not read again.
+        mock_calculate_hash.assert_not_called()
+        self.assertThat(
+            FileCache().get(algorithm="sha256", hash=checksum.split("/")[1]),
+            Not(Equals(None)),
         )
-        mock_request.raise_for_status.assert_called_once_with()
-        mock_download.assert_called_once_with(mock_request, file_src.file)
+
+    @mock.patch("snapcraft_legacy.internal.sources._base._download")
+    def test_prefetch(self, mock_download):
+        content = b"content"
+        checksum = "sha256/" + hashlib.sha256(content).hexdigest()
+
+        def fake_download(url, destination, **kwargs):
+            with open(destination, "wb") as destination_file:
+                destination_file.write(content)
+
+        mock_download.download.side_effect = fake_download
+        file_src = self.get_mock_file_base("http://snapcraft.io/file.tar", "dir")
+        file_src.source_checksum = checksum
+
+        file_src.prefetch()
+        file_src.prefetch()
+
+        # Downloads go straight to the cache, so that they can be resumed.
+        cache_file = FileCache().get_file_path(
+            algorithm="sha256", hash=checksum.split("/")[1]
+        )
+        mock_download.download.assert_called_once_with(
+            file_src.source,
+            cache_file,
+            source_checksum=checksum,
+            connections=1,
+            show_progress=False,
+        )
+        self.assertThat(
+            FileCache().get(algorithm="sha256", hash=checksum.split("/")[1]),
+            Equals(cache_file),
+        )
+
+    @mock.patch("snapcraft_legacy.internal.sources._base._download")
+    def test_prefetch_without_checksum(self, mock_download):
+        file_src = self.get_mock_file_base("http://snapcraft.io/file.tar", "dir")
+
+        file_src.prefetch()
+
+        mock_download.download.assert_not_called()
 
     @mock.patch("snapcraft_legacy.internal.sources._base.download_urllib_source")
     def test_download_ftp(self, mock_download):
@@ -17,6 +17,7 @@
 import hashlib
 import os
 import zipfile
+from unittest import mock
 
 from testtools.matchers import Equals
 
@@ -78,3 +79,21 @@ class TestChecksum(unit.TestCase):
 
         self.assertThat(raised.expected, Equals(incorrect_checksum))
         self.assertThat(raised.calculated, Equals(calculated_checksum))
+
+    @mock.patch("snapcraft_legacy.internal.sources._checksum.calculate_hash")
+    def test_calculated_digest(self, mock_calculate_hash):
+        self.assertThat(
+            verify_checksum("md5/abcde", "missing", calculated_digest="abcde"),
+            Equals(("md5", "abcde")),
+        )
+        mock_calculate_hash.assert_not_called()
+
+        raised = self.assertRaises(
+            errors.DigestDoesNotMatchError,
+            verify_checksum,
+            "md5/abcde",
+            "missing",
+            calculated_digest="fghij",
+        )
+
+        self.assertThat(raised.calculated, Equals("fghij"))
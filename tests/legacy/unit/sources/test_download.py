@@ -0,0 +1,247 @@
+# -*- Mode:Python; indent-tabs-mode:nil; tab-width:4 -*-
+#
+# Copyright (C) 2022 Canonical Ltd
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License version 3 as
+# published by the Free Software Foundation.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+
+import hashlib
+import http.server
+import os
+import re
+import threading
+from unittest import mock
+
+import fixtures
+from testtools.matchers import Equals, FileExists, Not
+
+from snapcraft_legacy.internal.sources import _download, errors
+from tests.legacy import unit
+
+_DATA = bytes(range(256)) * 64
+
+
+class _RangeRequestHandler(http.server.BaseHTTPRequestHandler):
+    """Serve _DATA, honouring range requests unless told otherwise."""
+
+    def log_message(self, *args):
+        pass
+
+    def do_HEAD(self):
+        self._send_headers(200, len(_DATA))
+
+    def do_GET(self):
+        self.server.ranges.append(self.headers.get("Range"))
+        match = re.match(r"bytes=(\d+)-(\d*)", self.headers.get("Range", ""))
+        if_range = self.headers.get("If-Range", self.server.etag)
+        if match and self.server.accept_ranges and if_range == self.server.etag:
+            start = int(match.group(1))
+            end = int(match.group(2)) + 1 if match.group(2) else len(_DATA)
+            self._send_headers(206, end - start)
+            data = _DATA[start:end]
+        else:
+            self._send_headers(200, len(_DATA))
+            data = _DATA
+
+        if self.server.interruptions:
+            self.server.interruptions -= 1
+            data = data[: len(data) // 2]
+        self.wfile.write(data)
+
+    def _send_headers(self, status, length):
+        self.send_response(status)
+        self.send_header("Content-Length", str(length))
+        self.send_header("ETag", self.server.etag)
+        if self.server.accept_ranges:
+            self.send_header("Accept-Ranges", "bytes")
+        self.end_headers()
+
+
+class TestDownload(unit.TestCase):
+    def setUp(self):
+        super().setUp()
+
+        self.useFixture(fixtures.EnvironmentVariable("no_proxy", "localhost,127.0.0.1"))
+        self.useFixture(
+            fixtures.MockPatch("snapcraft_legacy.internal.sources._download.sleep")
+        )
+        self.server = http.server.ThreadingHTTPServer(
+            ("127.0.0.1", 0), _RangeRequestHandler
+        )
+        self.server.ranges = []
+        self.server.accept_ranges = True
+        self.server.interruptions = 0
+        self.server.etag = '"1"'
+        server_thread = threading.Thread(target=self.server.serve_forever)
+        self.addCleanup(server_thread.join)
+        self.addCleanup(self.server.server_close)
+        self.addCleanup(self.server.shutdown)
+        server_thread.start()
+
+        self.url = "http://127.0.0.1:{}/file".format(self.server.server_port)
+        self.checksum = "sha256/" + hashlib.sha256(_DATA).hexdigest()
+
+    def download(self, **kwargs):
+        _download.download(
+            self.url,
+            "file",
+            source_checksum=self.checksum,
+            show_progress=False,
+            **kwargs
+        )
+
+    def assert_downloaded(self):
+        with open("file", "rb") as downloaded_file:
+            self.assertTrue(downloaded_file.read() == _DATA)
+        self.assertThat("file.partial", Not(FileExists()))
+        self.assertThat("file.partial.validator", Not(FileExists()))
+
+    def write_partial(self, data, validator=None):
+        with open("file.partial", "wb") as partial_file:
+            partial_file.write(data)
+        if validator is not None:
+            with open("file.partial.validator", "w") as validator_file:
+                validator_file.write(validator)
+
+    def test_download(self):
+        self.download()
+
+        self.assert_downloaded()
+        self.assertThat(self.server.ranges, Equals([None]))
+
+    def test_download_resumes_partial(self):
+        self.write_partial(_DATA[:1000], validator='"1"')
+
+        self.download()
+
+        self.assert_downloaded()
+        self.assertThat(self.server.ranges, Equals(["bytes=1000-"]))
+
+    def test_download_restarts_partial_without_validator(self):
+        self.write_partial(b"stale data")
+
+        self.download()
+
+        self.assert_downloaded()
+        self.assertThat(self.server.ranges, Equals([None]))
+
+    def test_download_restarts_partial_if_file_changed(self):
+        self.write_partial(b"stale data", validator='"0"')
+
+        self.download()
+
+        self.assert_downloaded()
+        self.assertThat(self.server.ranges, Equals(["bytes=10-"]))
+
+    def test_download_restarts_partial_if_ranges_are_not_supported(self):
+        self.server.accept_ranges = False
+        self.write_partial(b"stale data", validator='"1"')
+
+        self.download()
+
+        self.assert_downloaded()
+
+    def test_download_interrupted_keeps_validator(self):
+        self.server.interruptions = _download._RETRIES
+
+        self.assertRaises(errors.SnapcraftRequestError, self.download)
+
+        with open("file.partial.validator") as validator_file:
+            self.assertThat(validator_file.read(), Equals('"1"'))
+
+    def test_download_resumes_interrupted_transfer(self):
+        self.server.interruptions = 2
+
+        self.download()
+
+        self.assert_downloaded()
+        self.assertThat(
+            self.server.ranges,
+            Equals([None, "bytes=8192-", "bytes=12288-"]),
+        )
+
+    def test_download_gives_up_after_retries(self):
+        self.server.interruptions = _download._RETRIES
+
+        self.assertRaises(errors.SnapcraftRequestError, self.download)
+
+    def test_download_segments(self):
+        self.useFixture(
+            fixtures.MockPatch(
+                "snapcraft_legacy.internal.sources._download._MIN_SEGMENT_SIZE",
+                len(_DATA) // 4,
+            )
+        )
+
+        self.download(connections=4)
+
+        self.assert_downloaded()
+        self.assertThat(
+            sorted(self.server.ranges),
+            Equals(
+                [
+                    "bytes=0-4095",
+                    "bytes=12288-16383",
+                    "bytes=4096-8191",
+                    "bytes=8192-12287",
+                ]
+            ),
+        )
+
+    def test_download_segments_resume_interrupted_segment(self):
+        self.useFixture(
+            fixtures.MockPatch(
+                "snapcraft_legacy.internal.sources._download._MIN_SEGMENT_SIZE",
+                len(_DATA) // 2,
+            )
+        )
+        self.server.interruptions = 1
+
+        self.download(connections=2)
+
+        self.assert_downloaded()
+        self.assertThat(len(self.server.ranges), Equals(3))
+
+    def test_download_small_file_uses_single_connection(self):
+        self.download(connections=4)
+
+        self.assert_downloaded()
+        self.assertThat(self.server.ranges, Equals([None]))
+
+    def test_download_segments_not_supported(self):
+        self.server.accept_ranges = False
+        self.useFixture(
+            fixtures.MockPatch(
+                "snapcraft_legacy.internal.sources._download._MIN_SEGMENT_SIZE", 1
+            )
+        )
+
+        self.download(connections=4)
+
+        self.assert_downloaded()
+        self.assertThat(self.server.ranges, Equals([None]))
+
+    def test_download_digest_does_not_match(self):
+        self.checksum = "sha256/" + hashlib.sha256(b"other").hexdigest()
+
+        self.assertRaises(errors.DigestDoesNotMatchError, self.download)
+
+        self.assertThat("file", Not(FileExists()))
+        self.assertThat("file.partial", Not(FileExists()))
+
+    @mock.patch("snapcraft_legacy.internal.sources._download.init_progress_bar")
+    def test_download_shows_progress(self, mock_init_progress_bar):
+        _download.download(self.url, "file")
+
+        mock_init_progress_bar.assert_called_once_with(len(_DATA), "file")
+        mock_init_progress_bar.return_value.finish.assert_called_once_with()
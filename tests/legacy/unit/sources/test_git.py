@@ -22,7 +22,7 @@ from unittest import mock
 import fixtures
 from testtools.matchers import Equals
 
-from snapcraft_legacy.internal import sources
+from snapcraft_legacy.internal import cache, sources
 from snapcraft_legacy.internal.sources import errors
 from tests.legacy import unit
 from tests.subprocess_utils import call, call_with_output
@@ -186,6 +186,92 @@ class TestGit(unit.sources.SourceTestCase):  # type: ignore
             ),
         )
 
+    def test_pull_with_mirror(self):
+        self.useFixture(fixtures.EnvironmentVariable("SNAPCRAFT_GIT_MIRROR", "1"))
+        self.useFixture(fixtures.MockPatch("os.rename"))
+        mirror_dir = cache.GitMirrorCache().get_mirror_dir("git://my-source")
+        git = sources.Git("git://my-source", "source_dir")
+
+        git.pull()
+
+        self.assertThat(
+            self.mock_run.mock_calls,
+            Equals(
+                [
+                    mock.call(
+                        [
+                            "git",
+                            "clone",
+                            "--mirror",
+                            "git://my-source",
+                            mirror_dir + ".partial",
+                        ]
+                    ),
+                    mock.call(
+                        [
+                            "git",
+                            "clone",
+                            "--recursive",
+                            "--reference",
+                            mirror_dir,
+                            "--dissociate",
+                            "git://my-source",
+                            "source_dir",
+                        ]
+                    ),
+                ]
+            ),
+        )
+
+    def test_pull_with_existing_mirror(self):
+        self.useFixture(fixtures.EnvironmentVariable("SNAPCRAFT_GIT_MIRROR", "1"))
+        mirror_dir = cache.GitMirrorCache().get_mirror_dir("git://my-source")
+        os.mkdir(mirror_dir)
+        git = sources.Git("git://my-source", "source_dir", source_tag="tag")
+
+        git.pull()
+
+        self.assertThat(
+            self.mock_run.mock_calls,
+            Equals(
+                [
+                    mock.call(["git", "-C", mirror_dir, "fetch", "--prune", "origin"]),
+                    mock.call(
+                        [
+                            "git",
+                            "clone",
+                            "--recursive",
+                            "--branch",
+                            "tag",
+                            "--reference",
+                            mirror_dir,
+                            "--dissociate",
+                            "git://my-source",
+                            "source_dir",
+                        ]
+                    ),
+                ]
+            ),
+        )
+
+    def test_pull_with_depth_skips_mirror(self):
+        self.useFixture(fixtures.EnvironmentVariable("SNAPCRAFT_GIT_MIRROR", "1"))
+        git = sources.Git("git://my-source", "source_dir", source_depth=2)
+
+        git.pull()
+
+        self.mock_run.assert_called_once_with(
+            [
+                "git",
+                "clone",
+                "--recursive",
+                "--depth",
+                "2",
+                "git://my-source",
+                "source_dir",
+            ]
+        )
+
     def test_pull_with_depth(self):
         git = sources.Git("git://my-source", "source_dir", source_depth=2)
 
@@ -764,6 +850,38 @@ class TestGitConflicts(GitBaseTestCase):
         )
 
 
+class TestGitMirror(GitBaseTestCase):
+    def test_clones_share_mirror(self):
+        self.useFixture(fixtures.EnvironmentVariable("SNAPCRAFT_GIT_MIRROR", "1"))
+        repo = os.path.join(self.path, "repo.git")
+        working_tree = os.path.join(self.path, "working-tree")
+        self.clean_dir(repo)
+        os.chdir(repo)
+        call(["git", "init", "--bare"])
+        self.clone_repo(repo, working_tree)
+        self.add_file("fake", "fake 1", "fake 1")
+        call(["git", "push", repo, "HEAD:refs/heads/master"])
+
+        url = "file://" + repo
+        for source_dir in ("source-1", "source-2"):
+            source_dir = os.path.join(self.path, source_dir)
+            sources.Git(url, source_dir, silent=True).pull()
+
+            self.check_file_contents(os.path.join(source_dir, "fake"), "fake 1")
+            # The clone does not depend on the mirror.
+            self.assertFalse(
+                os.path.exists(
+                    os.path.join(source_dir, ".git", "objects", "info", "alternates")
+                )
+            )
+
+        mirror_dir = cache.GitMirrorCache().get_mirror_dir(url)
+        self.assertThat(
+            call_with_output(["git", "-C", mirror_dir, "log", "--format=%s"]),
+            Equals("fake 1"),
+        )
+
+
 class GitDetailsTestCase(GitBaseTestCase):
     def setUp(self):
         def _add_and_commit_file(filename, content=None, message=None):
@@ -341,6 +341,98 @@ class TestLocalUpdate(unit.TestCase):
         self.assertThat(os.path.join(destination, "dir", "file2"), FileExists())
 
 
+class TestLocalIndex(unit.TestCase):
+    """Verify that changes are found using the index of the pulled source."""
+
+    def setUp(self):
+        super().setUp()
+
+        os.makedirs(os.path.join("source", "dir", "subdir"))
+        for path in ("file", "dir/file", "dir/subdir/file"):
+            with open(os.path.join("source", path), "w") as f:
+                f.write("1")
+
+        # The reference is newer than everything in source.
+        open("reference", "w").close()
+        reference_time = os.stat("reference").st_mtime + 10
+        os.utime("reference", (reference_time, reference_time))
+
+        self.local = sources.Local("source", "destination")
+        self.local.pull()
+
+    def test_index_is_recorded_next_to_target(self):
+        self.assertFalse(self.local.check("reference"))
+
+        self.assertThat(
+            sources.Local.get_index_path("reference"),
+            Equals("local-source-index.json"),
+        )
+        self.assertThat("local-source-index.json", FileExists())
+
+    def test_unmodified_directories_are_not_listed(self):
+        self.assertFalse(self.local.check("reference"))
+
+        with mock.patch("os.scandir", side_effect=os.scandir) as mock_scandir:
+            self.assertFalse(self.local.check("reference"))
+
+        mock_scandir.assert_not_called()
+
+    def test_file_modified_with_old_mtime(self):
+        self.assertFalse(self.local.check("reference"))
+        path = os.path.join("source", "dir", "subdir", "file")
+        file_stat = os.stat(path)
+        with open(path, "w") as f:
+            f.write("22")
+        os.utime(path, ns=(file_stat.st_atime_ns, file_stat.st_mtime_ns))
+
+        self.assertTrue(self.local.check("reference"))
+        self.local.update()
+
+        self.assertThat(
+            os.path.join("destination", "dir", "subdir", "file"), FileContains("22")
+        )
+        self.assertFalse(self.local.check("reference"))
+
+    def test_directory_added_with_old_mtime(self):
+        self.assertFalse(self.local.check("reference"))
+        os.makedirs(os.path.join("source", "dir", "new", "nested"))
+        with open(os.path.join("source", "dir", "new", "nested", "file"), "w") as f:
+            f.write("1")
+
+        self.assertTrue(self.local.check("reference"))
+        self.local.update()
+
+        self.assertThat(
+            os.path.join("destination", "dir", "new", "nested", "file"),
+            FileContains("1"),
+        )
+        self.assertFalse(self.local.check("reference"))
+
+    @mock.patch("snapcraft_legacy.file_utils.link_or_copy_tree")
+    def test_pull_after_check_only_copies_changes(self, mock_link_or_copy_tree):
+        self.assertFalse(self.local.check("reference"))
+        path = os.path.join("source", "file")
+        with open(path, "w") as f:
+            f.write("22")
+
+        self.assertTrue(self.local.check("reference"))
+        self.local.pull()
+        self.local.update()
+
+        mock_link_or_copy_tree.assert_not_called()
+        self.assertThat(os.path.join("destination", "file"), FileContains("22"))
+
+    def test_changes_are_found_until_updated(self):
+        with open(os.path.join("source", "file"), "w") as f:
+            f.write("22")
+        reference_time = os.stat("reference").st_mtime
+        os.utime(os.path.join("source", "file"), (reference_time, reference_time))
+
+        self.assertTrue(self.local.check("reference"))
+        self.assertTrue(self.local.check("reference"))
+        self.assertThat("local-source-index.json", Not(FileExists()))
+
+
 class TestLocalUpdateSnapcraftYaml:
 
     scenarios = [
@@ -15,6 +15,7 @@
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
 import os
+import subprocess
 import tarfile
 from unittest import mock
 
@@ -22,6 +23,7 @@ import requests
 from testtools.matchers import Equals
 
 from snapcraft_legacy.internal import sources
+from snapcraft_legacy.internal.sources import _tar, errors
 from tests.legacy import unit
 
 
@@ -148,3 +150,73 @@ class TestTar(unit.FakeFileHTTPServerBasedTestCase):
 
     def test_has_source_handler_entry(self):
         self.assertTrue(sources._source_handler["tar"] is sources.Tar)
+
+
+class TestTarExtract(unit.TestCase):
+    def make_tarball(self, name, mode="w"):
+        os.makedirs(os.path.join("src", "prefix", "dir"))
+        with open(os.path.join("src", "prefix", "dir", "file"), "w") as f:
+            f.write("new")
+        with tarfile.open(name, mode) as tar:
+            tar.add(os.path.join("src", "prefix"))
+
+    def test_extract_on_top(self):
+        self.make_tarball("test.tar.gz", "w:gz")
+        os.makedirs(os.path.join("dst", "dir"))
+        with open(os.path.join("dst", "dir", "file"), "w") as f:
+            f.write("old")
+        with open(os.path.join("dst", "dir", "other"), "w") as f:
+            f.write("other")
+
+        sources.Tar("test.tar.gz", "dst").provision(
+            "dst", clean_target=False, keep_tarball=True, src="test.tar.gz"
+        )
+
+        self.assertThat(sorted(os.listdir("dst")), Equals(["dir"]))
+        with open(os.path.join("dst", "dir", "file")) as f:
+            self.assertThat(f.read(), Equals("new"))
+        self.assertTrue(os.path.exists(os.path.join("dst", "dir", "other")))
+
+    def test_extract_with_decompressor(self):
+        self.make_tarball("test.tar.xz", "w:xz")
+
+        with mock.patch("shutil.which", return_value="/usr/bin/xz"), mock.patch(
+            "subprocess.Popen", wraps=subprocess.Popen
+        ) as popen_mock:
+            sources.Tar("test.tar.xz", "dst").provision(
+                "dst", clean_target=False, keep_tarball=True, src="test.tar.xz"
+            )
+
+        self.assertThat(
+            popen_mock.call_args[0][0],
+            Equals(["xz", "--decompress", "--stdout", "--threads=0", "test.tar.xz"]),
+        )
+        with open(os.path.join("dst", "dir", "file")) as f:
+            self.assertThat(f.read(), Equals("new"))
+
+    def test_extract_decompressor_error(self):
+        self.make_tarball("test.tar")
+        command = ["sh", "-c", 'cat "$0"; exit 3']
+
+        with mock.patch.object(_tar, "_get_decompress_command", return_value=command):
+            raised = self.assertRaises(
+                errors.SnapcraftPullError,
+                sources.Tar("test.tar", "dst").provision,
+                "dst",
+                clean_target=False,
+                keep_tarball=True,
+                src="test.tar",
+            )
+
+        self.assertThat(raised.exit_code, Equals(3))
+
+    def test_no_decompressor_for_plain_tar(self):
+        self.make_tarball("test.tar")
+
+        self.assertThat(_tar._get_decompress_command("test.tar"), Equals(None))
+
+    def test_no_decompressor_installed(self):
+        self.make_tarball("test.tar.gz", "w:gz")
+
+        with mock.patch("shutil.which", return_value=None):
+            self.assertThat(_tar._get_decompress_command("test.tar.gz"), Equals(None))
@@ -66,6 +66,19 @@ class PrimeStateTestCase(PrimeStateBaseTestCase):
         # Verify that init was not called
         init_spy.assert_not_called()
 
+    def test_yaml_conversion_from_plain_sets(self):
+        state_string = "!PrimeState\n" + yaml_utils.dump(self.state.__dict__)
+
+        self.assertThat(yaml_utils.load(state_string), Equals(self.state))
+
+    def test_yaml_conversion_empty_paths(self):
+        state = snapcraft_legacy.internal.states.PrimeState(set(), set())
+
+        state_from_yaml = yaml_utils.load(yaml_utils.dump(state))
+
+        self.assertThat(state_from_yaml.files, Equals(set()))
+        self.assertThat(state_from_yaml.dependency_paths, Equals(set()))
+
     def test_comparison(self):
         other = snapcraft_legacy.internal.states.PrimeState(
             self.files,
@@ -16,7 +16,7 @@
 
 from unittest import mock
 
-from testtools.matchers import Equals
+from testtools.matchers import Contains, Equals, Not
 
 import snapcraft_legacy.internal
 from snapcraft_legacy import yaml_utils
@@ -62,6 +62,27 @@ class StateStageTestCase(StageStateBaseTestCase):
         # Verify that init was not called
         init_spy.assert_not_called()
 
+    def test_yaml_conversion_compacts_paths(self):
+        state_string = yaml_utils.dump(self.state)
+
+        self.assertThat(state_string, Contains("files: !CompactPaths"))
+        self.assertThat(state_string, Contains("directories: !CompactPaths"))
+
+    def test_yaml_conversion_loads_paths_lazily(self):
+        state_from_yaml = yaml_utils.load(yaml_utils.dump(self.state))
+
+        self.assertThat(state_from_yaml.__dict__, Not(Contains("files")))
+        self.assertThat(state_from_yaml.files, Equals(self.files))
+        self.assertThat(state_from_yaml.__dict__, Contains("files"))
+        self.assertThat(state_from_yaml.directories, Equals(self.directories))
+        self.assertThat(state_from_yaml.__dict__, Not(Contains("_encoded_paths")))
+
+    def test_yaml_conversion_from_plain_sets(self):
+        state_string = "!StageState\n" + yaml_utils.dump(self.state.__dict__)
+
+        self.assertThat(state_string, Contains("files: !!set"))
+        self.assertThat(yaml_utils.load(state_string), Equals(self.state))
+
     def test_comparison(self):
         other = snapcraft_legacy.internal.states.StageState(
             self.files, self.directories, self.part_properties, self.project
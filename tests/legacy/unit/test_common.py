@@ -15,6 +15,8 @@
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
 import os
+import threading
+import time
 
 import pytest
 from testtools.matchers import Equals
@@ -38,6 +40,90 @@ def test_isurl():
     assert common.isurl("/foo:o") is False
 
 
+def test_get_max_workers_default(monkeypatch):
+    monkeypatch.delenv("SNAPCRAFT_MAX_WORKERS", raising=False)
+
+    assert common.get_max_workers(4) == 4
+    assert common.get_max_workers(0) == 1
+
+
+def test_get_max_workers_from_environment(monkeypatch):
+    monkeypatch.setenv("SNAPCRAFT_MAX_WORKERS", "2")
+
+    assert common.get_max_workers(4) == 2
+
+
+@pytest.mark.parametrize("value", ["0", "-1", "many"])
+def test_get_max_workers_invalid(monkeypatch, value):
+    monkeypatch.setenv("SNAPCRAFT_MAX_WORKERS", value)
+
+    with pytest.raises(errors.InvalidWorkerCountError):
+        common.get_max_workers(4)
+
+
+def test_get_parallel_parts_count_default(monkeypatch):
+    monkeypatch.delenv("SNAPCRAFT_PARALLEL_PARTS", raising=False)
+
+    assert common.get_parallel_parts_count() == 1
+
+
+def test_get_parallel_parts_count_from_environment(monkeypatch):
+    monkeypatch.setenv("SNAPCRAFT_PARALLEL_PARTS", "8")
+
+    assert common.get_parallel_parts_count() == 8
+
+
+def test_get_parallel_parts_count_invalid(monkeypatch):
+    monkeypatch.setenv("SNAPCRAFT_PARALLEL_PARTS", "0")
+
+    with pytest.raises(errors.InvalidWorkerCountError) as raised:
+        common.get_parallel_parts_count()
+
+    assert str(raised.value) == "Invalid value '0' for SNAPCRAFT_PARALLEL_PARTS."
+
+
+def test_get_download_connections_default(monkeypatch):
+    monkeypatch.delenv("SNAPCRAFT_DOWNLOAD_CONNECTIONS", raising=False)
+
+    assert common.get_download_connections() == 1
+
+
+def test_get_download_connections_from_environment(monkeypatch):
+    monkeypatch.setenv("SNAPCRAFT_DOWNLOAD_CONNECTIONS", "4")
+
+    assert common.get_download_connections() == 4
+
+
+def test_run_concurrently_ordered():
+    def square(value):
+        # Finish the first calls last.
+        time.sleep((5 - value) / 100)
+        return value * value
+
+    results = common.run_concurrently(square, range(5), max_workers=5)
+
+    assert list(results) == [0, 1, 4, 9, 16]
+
+
+def test_run_concurrently_error():
+    called = []
+    first_call = threading.Event()
+
+    def fail(value):
+        called.append(value)
+        if value == 0:
+            first_call.set()
+            raise ValueError(value)
+        first_call.wait()
+        return value
+
+    with pytest.raises(ValueError):
+        list(common.run_concurrently(fail, range(10), max_workers=1))
+
+    # The calls queued behind the failed one are cancelled.
+    assert called == [0]
+
+
 class CommonMigratedTestCase(unit.TestCase):
     def test_parallel_build_count_migration_message(self):
         raised = self.assertRaises(
@@ -16,6 +16,7 @@
 
 import logging
 import os
+import shutil
 import sys
 import tempfile
 from unittest import mock
@@ -64,6 +65,22 @@ class TestLdLibraryPathParser(unit.TestCase):
             ),
         )
 
+    def test_extract_ld_library_paths_include(self):
+        conf_dir = self.useFixture(fixtures.TempDir()).path
+        os.mkdir(os.path.join(conf_dir, "ld.so.conf.d"))
+        with open(os.path.join(conf_dir, "ld.so.conf.d", "b.conf"), "w") as f:
+            f.write("/b\n")
+        with open(os.path.join(conf_dir, "ld.so.conf.d", "a.conf"), "w") as f:
+            f.write("/a # comment\n")
+        file_path = os.path.join(conf_dir, "ld.so.conf")
+        with open(file_path, "w") as f:
+            f.write("/first\ninclude ld.so.conf.d/*.conf\n/last\n")
+
+        self.assertThat(
+            elf._extract_ld_library_paths(file_path),
+            Equals(["/first", "/a", "/b", "/last"]),
+        )
+
 
 class TestElfFileSmoketest(unit.TestCase):
     def test_bin_echo(self):
@@ -275,6 +292,192 @@ class TestGetLibraries(TestElfBase):
         self.assertThat(libs, Equals({self.fake_elf.root_libraries["moo.so.2"]}))
 
 
+class TestLoadDependencies(TestElfBase):
+    def setUp(self):
+        super().setUp()
+
+        self.elf_files = [
+            self.fake_elf[name]
+            for name in (
+                "fake_elf-2.23",
+                "fake_elf-with-core-libs",
+                "fake_elf-with-missing-libs",
+            )
+        ]
+
+    def _load_dependencies(self, workers):
+        return elf.load_dependencies(
+            self.elf_files,
+            root_path=self.fake_elf.root_path,
+            core_base_path=self.fake_elf.core_base_path,
+            arch_triplet=self.arch_triplet,
+            content_dirs=self.content_dirs,
+            soname_cache=elf.SonameCache(),
+            workers=workers,
+        )
+
+    def test_load_dependencies(self):
+        self.assertThat(
+            self._load_dependencies(workers=1),
+            Equals(
+                {
+                    self.fake_elf.root_libraries["foo.so.1"],
+                    "bar.so.2",
+                    "missing.so.2",
+                }
+            ),
+        )
+
+    def test_load_dependencies_falls_back_to_ldd(self):
+        self.elf_files = [
+            elf.ElfFile.unmarshal(dict(e.marshal(), needed={"libmissing.so.9": []}))
+            for e in self.elf_files
+        ]
+
+        self.assertThat(
+            elf.load_dependencies(
+                self.elf_files,
+                root_path=self.fake_elf.root_path,
+                core_base_path=self.fake_elf.core_base_path,
+                arch_triplet=self.arch_triplet,
+                content_dirs=self.content_dirs,
+                soname_cache=elf.SonameCache(),
+                library_index=elf.LibraryIndex(),
+            ),
+            Equals(self._load_dependencies(workers=1)),
+        )
+
+    def test_load_dependencies_concurrently_matches_serial(self):
+        serial_dependencies = self._load_dependencies(workers=1)
+        serial_paths = {
+            e.path: sorted(d.path for d in e.dependencies) for e in self.elf_files
+        }
+        for elf_file in self.elf_files:
+            elf_file.dependencies = set()
+
+        self.assertThat(self._load_dependencies(workers=3), Equals(serial_dependencies))
+        self.assertThat(
+            {e.path: sorted(d.path for d in e.dependencies) for e in self.elf_files},
+            Equals(serial_paths),
+        )
+
+
+class TestLibraryResolver(unit.TestCase):
+    def setUp(self):
+        super().setUp()
+
+        self.arch_triplet = ProjectOptions().arch_triplet
+        self.elf_file = elf.ElfFile(path="/bin/ls")
+
+    def _get_resolver(self, ld_library_paths):
+        return elf.LibraryResolver(
+            ld_library_paths=ld_library_paths,
+            arch_triplet=self.arch_triplet,
+            library_index=elf.LibraryIndex(),
+        )
+
+    def test_resolve_matches_ldd(self):
+        libraries = self._get_resolver([]).resolve(self.elf_file)
+
+        self.assertThat(
+            libraries,
+            Equals(elf._determine_libraries(path="/bin/ls", ld_library_paths=[])),
+        )
+
+    def test_resolve_prefers_ld_library_paths(self):
+        libc_path = self._get_resolver([]).resolve(self.elf_file)["libc.so.6"]
+        lib_dir = os.path.join(self.path, "lib")
+        os.makedirs(lib_dir)
+        shutil.copy(libc_path, lib_dir)
+
+        libraries = self._get_resolver([lib_dir]).resolve(self.elf_file)
+
+        self.assertThat(
+            libraries["libc.so.6"], Equals(os.path.join(lib_dir, "libc.so.6"))
+        )
+        self.assertThat(
+            libraries,
+            Equals(
+                elf._determine_libraries(path="/bin/ls", ld_library_paths=[lib_dir])
+            ),
+        )
+
+    def test_resolve_expands_origin(self):
+        libc_path = self._get_resolver([]).resolve(self.elf_file)["libc.so.6"]
+        lib_dir = os.path.join(self.path, "lib")
+        os.makedirs(lib_dir)
+        shutil.copy(libc_path, lib_dir)
+        os.makedirs(os.path.join(self.path, "bin"))
+        elf_file = elf.ElfFile.unmarshal(
+            dict(
+                self.elf_file.marshal(),
+                path=os.path.join(self.path, "bin", "ls"),
+                rpath="$ORIGIN/../lib",
+                runpath="",
+            )
+        )
+
+        libraries = self._get_resolver([]).resolve(elf_file)
+
+        self.assertThat(
+            libraries["libc.so.6"], Equals(os.path.join(lib_dir, "libc.so.6"))
+        )
+
+    def test_resolve_ignores_rpath_with_runpath(self):
+        lib_dir = os.path.join(self.path, "lib")
+        os.makedirs(lib_dir)
+        open(os.path.join(lib_dir, "libc.so.6"), "w").close()
+        elf_file = elf.ElfFile.unmarshal(
+            dict(self.elf_file.marshal(), rpath=lib_dir, runpath="/nonexistent")
+        )
+
+        self.assertThat(
+            self._get_resolver([]).resolve(elf_file),
+            Equals(elf._determine_libraries(path="/bin/ls", ld_library_paths=[])),
+        )
+
+    def test_resolve_unsupported_token(self):
+        elf_file = elf.ElfFile.unmarshal(
+            dict(self.elf_file.marshal(), runpath="/opt/$LIB")
+        )
+
+        self.assertThat(self._get_resolver([]).resolve(elf_file), Equals(None))
+
+    def test_resolve_missing_library(self):
+        elf_file = elf.ElfFile.unmarshal(
+            dict(self.elf_file.marshal(), needed={"libmissing.so.9": []})
+        )
+
+        self.assertThat(self._get_resolver([]).resolve(elf_file), Equals(None))
+
+    def test_resolve_unparsable_library(self):
+        lib_dir = os.path.join(self.path, "lib")
+        os.makedirs(lib_dir)
+        with open(os.path.join(lib_dir, "libc.so.6"), "wb") as f:
+            f.write(b"\x7fELF")
+
+        self.assertThat(
+            self._get_resolver([lib_dir]).resolve(self.elf_file), Equals(None)
+        )
+
+    def test_read_dynamic_info(self):
+        dynamic_info = elf._read_dynamic_info("/bin/ls")
+
+        self.assertThat(dynamic_info.arch, Equals(self.elf_file.arch))
+        self.assertThat(
+            sorted(dynamic_info.needed), Equals(sorted(self.elf_file.needed))
+        )
+        self.assertThat(dynamic_info.rpath, Equals(self.elf_file.rpath))
+        self.assertThat(dynamic_info.runpath, Equals(self.elf_file.runpath))
+
+    def test_read_dynamic_info_invalid(self):
+        invalid_elf = os.path.join(self.path, "invalid-elf")
+        with open(invalid_elf, "wb") as f:
+            f.write(b"\x7fELF\x00")
+
+        self.assertThat(elf._read_dynamic_info(invalid_elf), Equals(None))
+
+
 class TestLibrary(TestElfBase):
     def test_is_valid_elf_ignores_corrupt_files(self):
         soname = "libssl.so.1.0.0"
@@ -310,6 +513,17 @@ class TestGetElfFiles(TestElfBase):
         elf_file = set(elf_files).pop()
         self.assertThat(elf_file.interp, Equals("/lib64/ld-linux-x86-64.so.2"))
 
+    def test_get_elf_files_concurrently(self):
+        file_list = {"fake_elf-2.23", "fake_elf-1.1", "fake_elf-static", "non-elf"}
+        open(os.path.join(self.fake_elf.root_path, "non-elf"), "w").close()
+
+        elf_files = elf.get_elf_files(self.fake_elf.root_path, file_list, workers=2)
+
+        self.assertThat(
+            sorted(os.path.basename(e.path) for e in elf_files),
+            Equals(["fake_elf-1.1", "fake_elf-2.23"]),
+        )
+
     def test_skip_object_files(self):
         open(os.path.join(self.fake_elf.root_path, "object_file.o"), "w").close()
 
@@ -431,6 +645,65 @@ class TestPatcher(TestElfBase):
         elf_patcher = elf.Patcher(dynamic_linker="/lib/fake-ld", root_path="/fake")
         elf_patcher.patch(elf_file=elf_file)
 
+    def test_patch_sets_interpreter_and_rpath(self):
+        elf_file = self.fake_elf["fake_elf-2.23"]
+        elf_file.runpath = "/usr/lib"
+        elf_file.dependencies = {
+            elf.Library(
+                soname="foo.so.1",
+                soname_path=self.fake_elf.root_libraries["foo.so.1"],
+                search_paths=[self.path],
+                core_base_path=None,
+                arch=elf_file.arch,
+                soname_cache=elf.SonameCache(),
+            )
+        }
+        elf_patcher = elf.Patcher(dynamic_linker="/lib/fake-ld", root_path=self.path)
+
+        with mock.patch("subprocess.check_call") as check_call_mock:
+            elf_patcher.patch(elf_file=elf_file)
+
+        self.assertThat(check_call_mock.call_count, Equals(2))
+        self.assertThat(
+            check_call_mock.call_args_list[1][0][0][1:-1],
+            Equals(
+                [
+                    "--set-interpreter",
+                    "/lib/fake-ld",
+                    "--force-rpath",
+                    "--set-rpath",
+                    "$ORIGIN",
+                ]
+            ),
+        )
+        self.assertThat(elf_file.interp, Equals("/lib/fake-ld"))
+        self.assertThat(elf_file.rpath, Equals("$ORIGIN"))
+        self.assertThat(elf_file.runpath, Equals(""))
+
+    def test_patch_skips_already_patched(self):
+        elf_file = self.fake_elf["fake_elf-2.23"]
+        elf_patcher = elf.Patcher(
+            dynamic_linker="/lib64/ld-linux-x86-64.so.2", root_path="/fake"
+        )
+
+        with mock.patch("subprocess.check_call") as check_call_mock:
+            elf_patcher.patch(elf_file=elf_file)
+
+        check_call_mock.assert_not_called()
+
+    def test_patch_breaks_hard_link(self):
+        elf_file = self.fake_elf["fake_elf-2.23"]
+        linked_path = os.path.join(self.path, "linked")
+        os.link(elf_file.path, linked_path)
+        elf_patcher = elf.Patcher(dynamic_linker="/lib/fake-ld", root_path="/fake")
+
+        elf_patcher.patch(elf_file=elf_file)
+
+        self.assertFalse(os.path.samefile(elf_file.path, linked_path))
+        self.assertThat(
+            [f for f in os.listdir(self.path) if f.startswith(".")], Equals([])
+        )
+
 
 class TestPatcherErrors(TestElfBase):
     def test_patch_fails_raises_patcherror_exception(self):
@@ -14,6 +14,7 @@
 # You should have received a copy of the GNU General Public License
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
+import hashlib
 import os
 import pathlib
 import re
@@ -162,6 +163,86 @@ class TestLinkOrCopy(unit.TestCase):
         self.assertTrue(os.path.isfile("foo2/bar/baz/4"))
 
 
+def test_reflink_or_copy(tmp_path):
+    source = tmp_path / "source"
+    source.write_text("data")
+    source.chmod(0o751)
+    destination = tmp_path / "destination"
+
+    file_utils.reflink_or_copy(str(source), str(destination))
+
+    assert destination.read_text() == "data"
+    assert destination.stat().st_mode & 0o777 == 0o751
+    assert destination.stat().st_ino != source.stat().st_ino
+    assert destination.stat().st_mtime == source.stat().st_mtime
+
+
+def test_reflink_or_copy_unsupported(tmp_path):
+    source = tmp_path / "source"
+    source.write_text("data")
+    destination = tmp_path / "destination"
+    destination.write_text("previous data")
+
+    with mock.patch("fcntl.ioctl", side_effect=OSError) as ioctl_mock:
+        file_utils.reflink_or_copy(str(source), str(destination))
+
+    ioctl_mock.assert_called_once_with(mock.ANY, file_utils._FICLONE, mock.ANY)
+    assert destination.read_text() == "data"
+
+
+def test_reflink_or_copy_no_follow_symlinks(tmp_path):
+    source = tmp_path / "source"
+    source.write_text("data")
+    source_link = tmp_path / "source-link"
+    source_link.symlink_to("source")
+    destination = tmp_path / "destination"
+    destination_link = tmp_path / "destination-link"
+    other = tmp_path / "other"
+    other.write_text("other data")
+    destination.symlink_to("other")
+
+    file_utils.reflink_or_copy(str(source), str(destination), follow_symlinks=False)
+    file_utils.reflink_or_copy(
+        str(source_link), str(destination_link), follow_symlinks=False
+    )
+
+    assert not destination.is_symlink()
+    assert destination.read_text() == "data"
+    assert other.read_text() == "other data"
+    assert os.readlink(destination_link) == "source"
+
+
+def test_reflink_or_copy_source_does_not_exist(tmp_path):
+    with pytest.raises(FileNotFoundError):
+        file_utils.reflink_or_copy(
+            str(tmp_path / "source"), str(tmp_path / "destination")
+        )
+
+
+@pytest.mark.parametrize("size", [0, 1, 2**10, 2**10 + 7])
+def test_calculate_hash(tmp_path, monkeypatch, size):
+    # Span several blocks without writing large files.
+    monkeypatch.setattr(file_utils, "_HASH_BLOCK_SIZE", 2**8)
+    data = os.urandom(size)
+    path = tmp_path / "file"
+    path.write_bytes(data)
+
+    assert (
+        file_utils.calculate_hash(str(path), algorithm="sha256")
+        == hashlib.sha256(data).hexdigest()
+    )
+
+
+def test_calculate_hash_unmappable(tmp_path):
+    path = tmp_path / "file"
+    path.write_bytes(b"data")
+
+    with mock.patch("mmap.mmap", side_effect=OSError):
+        digest = file_utils.calculate_hash(str(path), algorithm="sha3_384")
+
+    assert digest == hashlib.sha3_384(b"data").hexdigest()
+
+
 class RequiresCommandSuccessTestCase(unit.TestCase):
     @mock.patch("subprocess.check_call")
     def test_requires_command_works(self, mock_check_call):
@@ -55,7 +55,7 @@ class TestProgressBarInitialization:
     def test_init_progress_bar_with_length(self, monkeypatch, is_dumb):
         monkeypatch.setattr(indicators, "is_dumb_terminal", lambda: is_dumb)
 
-        pb = indicators._init_progress_bar(10, "destination", "message")
+        pb = indicators.init_progress_bar(10, "destination", "message")
 
         assert pb.maxval == 10
         assert "message" in pb.widgets
@@ -68,7 +68,7 @@ class TestProgressBarInitialization:
     def test_init_progress_bar_with_unknown_length(self, monkeypatch, is_dumb):
         monkeypatch.setattr(indicators, "is_dumb_terminal", lambda: is_dumb)
 
-        pb = indicators._init_progress_bar(0, "destination", "message")
+        pb = indicators.init_progress_bar(0, "destination", "message")
 
         assert pb.maxval == progressbar.UnknownLength
         assert "message" in pb.widgets
@@ -17,7 +17,7 @@
 import os
 import textwrap
 
-from testtools.matchers import FileContains, FileExists, Not
+from testtools.matchers import Equals, FileContains, FileExists, Not
 
 from snapcraft_legacy.internal import mangling
 from tests.legacy import fixture_setup, unit
@@ -153,6 +153,47 @@ class ManglingPythonShebangTestCase(unit.TestCase):
             ),
         )
 
+    def test_single_file(self):
+        file_path1 = _create_file("file1", "#!/usr/bin/python3")
+        file_path2 = _create_file("file2", "#!/usr/bin/python3 -E")
+        mangling.rewrite_python_shebang(file_path1)
+        mangling.rewrite_python_shebang(file_path2)
+        self.assertThat(file_path1, FileContains("#!/usr/bin/env python3"))
+        self.assertThat(
+            file_path2,
+            FileContains(
+                textwrap.dedent(
+                    """\
+                #!/bin/sh
+                ''''exec python3 -E -- "$0" "$@" # '''"""
+                )
+            ),
+        )
+
+    def test_single_file_without_shebang(self):
+        file_path = _create_file("file", "# /usr/bin/python3")
+        os.utime(file_path, ns=(0, 0))
+
+        mangling.rewrite_python_shebang(file_path)
+
+        # Files without a shebang are not written to.
+        self.assertThat(os.stat(file_path).st_mtime_ns, Equals(0))
+        self.assertThat(file_path, FileContains("# /usr/bin/python3"))
+
+    def test_only_first_line_rewritten(self):
+        file_path = os.path.join("test-dir", "file")
+        os.makedirs("test-dir")
+        with open(file_path, "wb") as f:
+            f.write(b"#!/usr/bin/python3\n\xff\xfe#!/usr/bin/python3\n")
+
+        mangling.rewrite_python_shebangs("test-dir")
+
+        with open(file_path, "rb") as f:
+            self.assertThat(
+                f.read(),
+                Equals(b"#!/usr/bin/env python3\n\xff\xfe#!/usr/bin/python3\n"),
+            )
+
 
 class TestClearExecstack(unit.TestCase):
     def setUp(self):
@@ -0,0 +1,120 @@
+# -*- Mode:Python; indent-tabs-mode:nil; tab-width:4 -*-
+#
+# Copyright 2022 Canonical Ltd.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License version 3 as
+# published by the Free Software Foundation.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import os
+import re
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+from snapcraft import cli, commands
+
+# Modules that must not be imported just to start the CLI, they are only
+# needed by the commands using them.
+_DEFERRED_MODULES = [
+    "craft_parts",
+    "craft_providers",
+    "craft_store",
+    "pkg_resources",
+    "snapcraft.commands.legacy",
+    "snapcraft.commands.lifecycle",
+    "snapcraft.parts",
+    "snapcraft_legacy",
+]
+
+_LAZY_COMMANDS = [command for group in cli.COMMAND_GROUPS for command in group.commands]
+
+_ROOT_DIR = Path(__file__).parents[3]
+
+
+def _run_python(*args, **kwargs):
+    """Run python on the snapcraft tree under test, wherever pytest runs."""
+    python_path = [str(_ROOT_DIR)]
+    if os.environ.get("PYTHONPATH"):
+        python_path.append(os.environ["PYTHONPATH"])
+    return subprocess.run(
+        [sys.executable, *args],
+        cwd=_ROOT_DIR,
+        env={**os.environ, "PYTHONPATH": os.pathsep.join(python_path)},
+        universal_newlines=True,
+        **kwargs,
+    )
+
+
+def _get_imported_modules(code):
+    """Return the modules imported by code, as reported by -X importtime."""
+    proc = _run_python(
+        "-X", "importtime", "-c", code, check=True, stderr=subprocess.PIPE
+    )
+    modules = []
+    for line in proc.stderr.splitlines():
+        # import time: self [us] | cumulative | imported package
+        match = re.match(r"import time:\s+\d+ \|\s+\d+ \|\s*(\S+)$", line)
+        if match:
+            modules.append(match.group(1))
+    return modules
+
+
+def test_import_cli_defers_command_modules():
+    modules = _get_imported_modules("import snapcraft.cli")
+
+    assert "snapcraft.cli" in modules
+    imported = [
+        module
+        for module in modules
+        if any(
+            module == deferred or module.startswith(f"{deferred}.")
+            for deferred in _DEFERRED_MODULES
+        )
+    ]
+    assert imported == []
+
+
+@pytest.mark.parametrize(
+    "lazy_command", _LAZY_COMMANDS, ids=[c.name for c in _LAZY_COMMANDS]
+)
+def test_lazy_command_metadata(lazy_command):
+    command_class = getattr(commands, lazy_command.__name__)
+
+    assert lazy_command.name == command_class.name
+    assert lazy_command.help_msg == command_class.help_msg
+    assert lazy_command.hidden == command_class.hidden
+    assert lazy_command.common == command_class.common
+
+
+def test_command_metadata_up_to_date():
+    proc = _run_python(
+        "tools/generate_command_metadata.py", "--check", stderr=subprocess.PIPE
+    )
+
+    assert proc.returncode == 0, proc.stderr
+
+
+def test_lazy_commands_cover_all_commands():
+    assert sorted(c.__name__ for c in _LAZY_COMMANDS) == sorted(commands.__all__)
+
+
+def test_lazy_command_delegates(mocker):
+    run_mock = mocker.patch("snapcraft.commands.version.VersionCommand.run")
+    lazy_command = cli._LAZY_COMMANDS["VersionCommand"](None)
+
+    lazy_command.run("args")
+
+    assert isinstance(lazy_command._command, commands.VersionCommand)
+    assert lazy_command.overview == commands.VersionCommand.overview
+    assert run_mock.mock_calls == [mocker.call("args")]
@@ -979,3 +979,54 @@ def test_lifecycle_run_permission_denied(new_dir):
         "Make sure the file is part of the current project "
         "and its permissions and ownership are correct."
     )
+
+
+def test_lifecycle_run_uses_project_cache(
+    snapcraft_yaml, project_vars, new_dir, mocker
+):
+    snapcraft_yaml(base="core22")
+    run_mock = mocker.patch("snapcraft.parts.PartsLifecycle.run")
+    process_yaml_spy = mocker.spy(parts_lifecycle, "process_yaml")
+    parsed_args = argparse.Namespace(
+        parts=[],
+        destructive_mode=True,
+        use_lxd=False,
+        provider=None,
+        debug=False,
+    )
+
+    parts_lifecycle.run("pull", parsed_args)
+    callbacks.unregister_all()
+    parts_lifecycle.run("pull", parsed_args)
+
+    assert process_yaml_spy.call_count == 1
+    assert run_mock.mock_calls == [
+        call("pull", debug=False, shell=False, shell_after=False),
+        call("pull", debug=False, shell=False, shell_after=False),
+    ]
+
+    # A change in the project file invalidates the cache.
+    project_file = Path("snap/snapcraft.yaml")
+    project_file.write_text(project_file.read_text() + "\nlicense: MIT\n")
+    callbacks.unregister_all()
+    parts_lifecycle.run("pull", parsed_args)
+
+    assert process_yaml_spy.call_count == 2
+
+
+def test_lifecycle_run_provider_no_project_cache(snapcraft_yaml, new_dir, mocker):
+    snapcraft_yaml(base="core22")
+    mocker.patch("snapcraft.parts.lifecycle._run_in_provider")
+
+    parts_lifecycle.run(
+        "pull",
+        argparse.Namespace(
+            parts=[],
+            destructive_mode=False,
+            use_lxd=False,
+            provider=None,
+            debug=False,
+        ),
+    )
+
+    assert not Path("parts").exists()
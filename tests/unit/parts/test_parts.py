@@ -14,6 +14,7 @@
 # You should have received a copy of the GNU General Public License
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
+import contextlib
 from pathlib import Path
 from unittest.mock import ANY, call
 
@@ -208,3 +209,78 @@ def test_parts_lifecycle_initialize_with_package_repositories(
             project_vars={"version": "1", "grade": "stable"},
         )
     ]
+
+
+@pytest.fixture
+def parallel_parts_data():
+    yield {
+        "p1": {"plugin": "nil", "override-pull": "echo pulling p1"},
+        "p2": {"plugin": "nil", "override-pull": "echo pulling p2", "after": ["p1"]},
+        "p3": {"plugin": "nil", "override-pull": "echo pulling p3"},
+    }
+
+
+def _parallel_lifecycle(parts_data, new_dir, parallel_parts_count):
+    return PartsLifecycle(
+        parts_data,
+        work_dir=new_dir,
+        assets_dir=new_dir,
+        base="core22",
+        parallel_build_count=8,
+        parallel_parts_count=parallel_parts_count,
+        part_names=[],
+        package_repositories=[],
+        adopt_info=None,
+        project_name="test-project",
+        parse_info={},
+        project_vars={"version": "1", "grade": "stable"},
+    )
+
+
+def test_parts_lifecycle_action_waves(parallel_parts_data, new_dir):
+    lifecycle = _parallel_lifecycle(parallel_parts_data, new_dir, 3)
+    actions = lifecycle._lcm.plan(craft_parts.Step.BUILD)
+
+    waves = [
+        [(action.part_name, action.step.name.lower()) for action in wave]
+        for wave in lifecycle._get_action_waves(actions)
+    ]
+    assert waves == [
+        [("p1", "pull"), ("p2", "pull"), ("p3", "pull")],
+        [("p1", "overlay")],
+        [("p2", "overlay")],
+        [("p3", "overlay")],
+        [("p1", "build")],
+        [("p1", "pull")],
+        [("p1", "overlay")],
+        [("p1", "build")],
+        [("p1", "stage")],
+        [("p2", "build"), ("p3", "build")],
+    ]
+
+
+def test_parts_lifecycle_action_waves_serial(parallel_parts_data, new_dir):
+    lifecycle = _parallel_lifecycle(parallel_parts_data, new_dir, 1)
+    actions = lifecycle._lcm.plan(craft_parts.Step.BUILD)
+
+    assert lifecycle._get_action_waves(actions) == [[action] for action in actions]
+
+
+def test_parts_lifecycle_run_parallel(parallel_parts_data, new_dir, mocker, emitter):
+    mocker.patch("craft_parts.executor.executor.Executor._install_build_snaps")
+    output_path = Path(new_dir, "output")
+
+    @contextlib.contextmanager
+    def fake_open_stream(text):
+        with output_path.open("ab") as output:
+            yield output.fileno()
+
+    mocker.patch("craft_cli.emit.open_stream", side_effect=fake_open_stream)
+
+    lifecycle = _parallel_lifecycle(parallel_parts_data, new_dir, 3)
+    lifecycle.run("pull")
+
+    assert "p1: pulling p1" in output_path.read_text().splitlines()
+    emitter.assert_progress("Executing parts lifecycle: pull p1, pull p2, pull p3")
+    emitter.assert_message("Executed: pull p3", intermediate=True)
+    assert Path(new_dir, "parts/p2/state/pull").is_file()
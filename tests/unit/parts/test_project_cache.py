@@ -0,0 +1,175 @@
+# -*- Mode:Python; indent-tabs-mode:nil; tab-width:4 -*-
+#
+# Copyright 2022 Canonical Ltd.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License version 3 as
+# published by the Free Software Foundation.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import datetime
+import json
+from pathlib import Path
+
+import pytest
+
+from snapcraft.extensions import register, unregister
+from snapcraft.parts import project_cache
+from snapcraft.projects import Project
+
+
+@pytest.fixture
+def project():
+    yield Project.unmarshal(
+        {
+            "name": "mytest",
+            "version": "0.1",
+            "base": "core22",
+            "summary": "Just some test data",
+            "description": "This is just some test data.",
+            "grade": "stable",
+            "confinement": "strict",
+            "parts": {"part1": {"plugin": "nil"}},
+        }
+    )
+
+
+def _get_key(project_yaml=b"name: mytest", **kwargs):
+    args = {"arch": "amd64", "parallel_build_count": 8, "work_dir": Path("/work")}
+    args.update(kwargs)
+    return project_cache.get_cache_key(project_yaml, **args)
+
+
+def test_get_cache_file():
+    assert project_cache.get_cache_file(Path("/work")) == Path(
+        "/work/parts/.snapcraft-project-cache"
+    )
+
+
+def test_get_cache_key():
+    assert _get_key() == _get_key()
+
+
+@pytest.mark.parametrize(
+    "kwargs",
+    [
+        {"project_yaml": b"name: other"},
+        {"arch": "arm64"},
+        {"parallel_build_count": 2},
+        {"work_dir": Path("/other")},
+    ],
+)
+def test_get_cache_key_changes(kwargs):
+    assert _get_key(**kwargs) != _get_key()
+
+
+def test_get_cache_key_snapcraft_version(mocker):
+    key = _get_key()
+    mocker.patch("snapcraft.__version__", "0.0.0")
+
+    assert _get_key() != key
+
+
+@pytest.mark.parametrize("value", ["", "1"])
+def test_get_cache_key_environment(monkeypatch, value):
+    monkeypatch.delenv("SNAPCRAFT_ENABLE_EXPERIMENTAL_EXTENSIONS", raising=False)
+    key = _get_key()
+    monkeypatch.setenv("SNAPCRAFT_ENABLE_EXPERIMENTAL_EXTENSIONS", value)
+
+    assert _get_key() != key
+
+
+def test_get_cache_key_extensions(fake_extension):
+    key = _get_key()
+    unregister("fake-extension")
+
+    try:
+        assert _get_key() != key
+    finally:
+        register("fake-extension", fake_extension)
+
+
+def test_save_load(project, new_dir):
+    cache_file = new_dir / "parts/cache"
+
+    project_cache.save(
+        cache_file, key="key", project=project, parse_info={"part1": ["file"]}
+    )
+
+    assert project_cache.load(cache_file, key="key") == (
+        project,
+        {"part1": ["file"]},
+    )
+    assert list(cache_file.parent.iterdir()) == [cache_file]
+    assert json.loads(cache_file.read_text()) == {
+        "key": "key",
+        "project": project.marshal(),
+        "parse_info": {"part1": ["file"]},
+    }
+
+
+def test_save_not_serializable(new_dir):
+    project = Project.unmarshal(
+        {
+            "name": "mytest",
+            "version": "0.1",
+            "base": "core22",
+            "summary": "Just some test data",
+            "description": "This is just some test data.",
+            "grade": "stable",
+            "confinement": "strict",
+            "passthrough": {"released": datetime.date(2022, 1, 1)},
+            "parts": {"part1": {"plugin": "nil"}},
+        }
+    )
+    cache_file = new_dir / "parts/cache"
+    cache_file.parent.mkdir()
+
+    project_cache.save(cache_file, key="key", project=project, parse_info={})
+
+    assert list(cache_file.parent.iterdir()) == []
+
+
+def test_save_interrupted(project, new_dir, mocker):
+    cache_file = new_dir / "parts/cache"
+    cache_file.parent.mkdir()
+    mocker.patch.object(Path, "replace", side_effect=KeyboardInterrupt)
+
+    with pytest.raises(KeyboardInterrupt):
+        project_cache.save(cache_file, key="key", project=project, parse_info={})
+
+    assert list(cache_file.parent.iterdir()) == []
+
+
+def test_load_other_key(project, new_dir):
+    cache_file = new_dir / "cache"
+    project_cache.save(cache_file, key="key", project=project, parse_info={})
+
+    assert project_cache.load(cache_file, key="other-key") is None
+
+
+def test_load_missing(new_dir):
+    assert project_cache.load(new_dir / "cache", key="key") is None
+
+
+def test_load_corrupt(new_dir):
+    cache_file = new_dir / "cache"
+    cache_file.write_bytes(b"not json")
+
+    assert project_cache.load(cache_file, key="key") is None
+
+
+def test_load_invalid_project(new_dir):
+    cache_file = new_dir / "cache"
+    cache_file.write_text(
+        json.dumps({"key": "key", "project": {"name": "x"}, "parse_info": {}})
+    )
+
+    assert project_cache.load(cache_file, key="key") is None
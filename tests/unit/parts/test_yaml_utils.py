@@ -19,6 +19,7 @@ import io
 from textwrap import dedent
 
 import pytest
+import yaml
 
 from snapcraft import errors
 from snapcraft.parts import yaml_utils
@@ -122,3 +123,60 @@ def test_yaml_load_no_base():
         )
 
     assert str(raised.value) == "no base defined"
+
+
+def test_yaml_load_duplicates_not_core22_base():
+    with pytest.raises(errors.LegacyFallback) as raised:
+        yaml_utils.load(
+            io.StringIO(
+                dedent(
+                    """\
+            base: core20
+            entry: value1
+            entry: value2
+    """
+                )
+            )
+        )
+
+    assert str(raised.value) == "base is not core22"
+
+
+def test_yaml_load_merge_tags():
+    assert (
+        yaml_utils.load(
+            io.StringIO(
+                dedent(
+                    """\
+        base: core22
+        common: &common
+          plugin: nil
+        parts:
+          part1:
+            <<: *common
+            source: .
+    """
+                )
+            )
+        )
+        == {
+            "base": "core22",
+            "common": {"plugin": "nil"},
+            "parts": {"part1": {"plugin": "nil", "source": "."}},
+        }
+    )
+
+
+def test_yaml_load_single_pass(mocker):
+    get_single_data_spy = mocker.spy(yaml_utils._SafeLoader, "get_single_data")
+
+    yaml_utils.load(io.StringIO("base: core22\n"))
+
+    assert get_single_data_spy.call_count == 1
+
+
+def test_yaml_load_uses_libyaml():
+    if not yaml.__with_libyaml__:
+        pytest.skip("PyYAML built without libyaml")
+
+    assert issubclass(yaml_utils._SafeLoader, yaml.CSafeLoader)
@@ -135,6 +135,33 @@ class TestProjectDefaults:
         assert app.command_chain == []
 
 
+class TestProjectMarshal:
+    """Marshal projects into dictionaries."""
+
+    def test_marshal(self, project_yaml_data):
+        data = project_yaml_data(
+            apps={"app1": {"command": "/bin/true", "daemon": "simple"}},
+            architectures=[{"build-on": ["amd64"], "build-to": ["arm64"]}],
+            environment={"FOO": "bar"},
+            plugs={
+                "content": {
+                    "interface": "content",
+                    "target": "$SNAP/content",
+                    "default-provider": "provider",
+                }
+            },
+            parts={"part1": {"plugin": "nil", "after": []}},
+        )
+        project = Project.unmarshal(data)
+
+        assert Project.unmarshal(project.marshal()) == project
+
+    def test_marshal_unset_fields(self, project_yaml_data):
+        project = Project.unmarshal(project_yaml_data())
+
+        assert "build-base" not in project.marshal()
+
+
 class TestProjectValidation:
     """Validate top-level project items."""
 
@@ -19,7 +19,7 @@ from textwrap import dedent
 
 import pytest
 
-from snapcraft import utils
+from snapcraft import errors, utils
 
 
 @pytest.mark.parametrize(
@@ -253,6 +253,33 @@ def test_get_parallel_build_count_limited(mocker, max_count, count):
     assert utils.get_parallel_build_count() == count
 
 
+@pytest.mark.parametrize(
+    "parts_count,count",
+    [(None, 1), ("1", 1), ("4", 4)],
+)
+def test_get_parallel_parts_count(mocker, parts_count, count):
+    mocker.patch.dict(os.environ, clear=False)
+    os.environ.pop("SNAPCRAFT_PARALLEL_PARTS", None)
+    if parts_count is not None:
+        os.environ["SNAPCRAFT_PARALLEL_PARTS"] = parts_count
+    assert utils.get_parallel_parts_count() == count
+
+
+@pytest.mark.parametrize("parts_count", ["", "xx", "0", "-1"])
+def test_get_parallel_parts_count_invalid(mocker, parts_count):
+    mocker.patch.dict(os.environ, {"SNAPCRAFT_PARALLEL_PARTS": parts_count})
+
+    with pytest.raises(errors.SnapcraftError) as raised:
+        utils.get_parallel_parts_count()
+
+    assert str(raised.value) == (
+        f"Invalid value {parts_count!r} for SNAPCRAFT_PARALLEL_PARTS."
+    )
+    assert raised.value.resolution == (
+        "Set SNAPCRAFT_PARALLEL_PARTS to a positive integer or unset it."
+    )
+
+
 #################
 # Humanize List #
 #################
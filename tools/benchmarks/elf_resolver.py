@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+# -*- Mode:Python; indent-tabs-mode:nil; tab-width:4 -*-
+#
+# Copyright (C) 2022 Canonical Ltd
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License version 3 as
+# published by the Free Software Foundation.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""Compare ldd based and in-process library resolution.
+
+A synthetic prime directory is populated with copies of host executables
+and libraries, dependencies are then loaded for all of them once by
+querying the dynamic linker for each file and once with the in-process
+LibraryResolver.
+"""
+
+import argparse
+import glob
+import os
+import shutil
+import tempfile
+import time
+
+from snapcraft_legacy import ProjectOptions
+from snapcraft_legacy.internal import elf
+
+
+def _populate(prime_dir: str, arch_triplet: str, count: int) -> None:
+    bin_dir = os.path.join(prime_dir, "usr", "bin")
+    lib_dir = os.path.join(prime_dir, "usr", "lib", arch_triplet)
+    os.makedirs(bin_dir)
+    os.makedirs(lib_dir)
+
+    executables = [
+        p
+        for p in sorted(glob.glob("/usr/bin/*"))
+        if not os.path.islink(p) and elf.ElfFile.is_elf(p)
+    ]
+    libraries = [
+        p
+        for p in sorted(glob.glob(f"/usr/lib/{arch_triplet}/lib*.so.*"))
+        if not os.path.islink(p) and elf.ElfFile.is_elf(p)
+    ]
+
+    for index in range(count):
+        source = executables[index % len(executables)]
+        shutil.copy2(
+            source, os.path.join(bin_dir, f"{os.path.basename(source)}-{index}")
+        )
+    # Stage some of the libraries so they are found in the prime directory.
+    for source in libraries[: count // 4]:
+        shutil.copy2(source, os.path.join(lib_dir, os.path.basename(source)))
+
+
+def _load(prime_dir: str, arch_triplet: str, in_process: bool):
+    file_list = [
+        os.path.relpath(os.path.join(root, name), prime_dir)
+        for root, _, files in os.walk(prime_dir)
+        for name in files
+    ]
+    elf_files = elf.get_elf_files(prime_dir, file_list)
+
+    start = time.perf_counter()
+    dependencies = elf.load_dependencies(
+        elf_files,
+        root_path=prime_dir,
+        core_base_path=None,
+        content_dirs=set(),
+        arch_triplet=arch_triplet,
+        soname_cache=elf.SonameCache(),
+        library_index=elf.LibraryIndex() if in_process else None,
+    )
+    return time.perf_counter() - start, len(elf_files), dependencies
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        "--count", type=int, default=500, help="number of executables to create"
+    )
+    args = parser.parse_args()
+
+    arch_triplet = ProjectOptions().arch_triplet
+    with tempfile.TemporaryDirectory() as prime_dir:
+        _populate(prime_dir, arch_triplet, args.count)
+
+        ldd_time, file_count, ldd_dependencies = _load(
+            prime_dir, arch_triplet, in_process=False
+        )
+        resolver_time, _, resolver_dependencies = _load(
+            prime_dir, arch_triplet, in_process=True
+        )
+
+    print(f"ELF files:              {file_count}")
+    print(f"ldd:                    {ldd_time:.2f}s")
+    print(f"in-process resolver:    {resolver_time:.2f}s")
+    print(f"speedup:                {ldd_time / resolver_time:.1f}x")
+    print(f"identical dependencies: {ldd_dependencies == resolver_dependencies}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+# -*- Mode:Python; indent-tabs-mode:nil; tab-width:4 -*-
+#
+# Copyright (C) 2022 Canonical Ltd
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License version 3 as
+# published by the Free Software Foundation.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""Compare buffered and mapped hashing of large files.
+
+A file of random data is written and read once to warm the page cache, it
+is then hashed with each algorithm once by reading it in 1MB chunks, as
+older versions did, and once with file_utils.calculate_hash.
+"""
+
+import argparse
+import hashlib
+import os
+import tempfile
+import time
+
+from snapcraft_legacy import file_utils
+
+
+def _write(path: str, size: int) -> None:
+    block = os.urandom(2**20)
+    with open(path, "wb") as f:
+        for _ in range(size):
+            f.write(block)
+
+
+def _buffered_hash(path: str, algorithm: str) -> str:
+    hasher = getattr(hashlib, algorithm)()
+    for block in file_utils._file_reader_iter(path):
+        hasher.update(block)
+    return hasher.hexdigest()
+
+
+def _time(function, *args, **kwargs):
+    start = time.perf_counter()
+    result = function(*args, **kwargs)
+    return time.perf_counter() - start, result
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        "--size", type=int, default=1024, help="size of the file in MiB"
+    )
+    parser.add_argument(
+        "--algorithm",
+        action="append",
+        dest="algorithms",
+        help="algorithm to hash with, can be repeated (sha256 and sha3_384 by default)",
+    )
+    args = parser.parse_args()
+    algorithms = args.algorithms or ["sha256", "sha3_384"]
+
+    with tempfile.TemporaryDirectory() as work_dir:
+        path = os.path.join(work_dir, "file")
+        _write(path, args.size)
+        _buffered_hash(path, "md5")
+
+        print(f"file size:                   {args.size} MiB")
+        for algorithm in algorithms:
+            buffered_time, buffered_digest = _time(_buffered_hash, path, algorithm)
+            mapped_time, mapped_digest = _time(
+                file_utils.calculate_hash, path, algorithm=algorithm
+            )
+            print(f"{algorithm + ' buffered:':29}{buffered_time:.2f}s")
+            print(f"{algorithm + ' mapped:':29}{mapped_time:.2f}s")
+            print(f"{algorithm + ' identical:':29}{buffered_digest == mapped_digest}")
+
+
+if __name__ == "__main__":
+    main()
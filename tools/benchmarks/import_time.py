@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+# -*- Mode:Python; indent-tabs-mode:nil; tab-width:4 -*-
+#
+# Copyright (C) 2022 Canonical Ltd
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License version 3 as
+# published by the Free Software Foundation.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""Measure the time taken to import the command line entry point.
+
+The module is imported in fresh interpreters with -X importtime, and the
+cumulative import time of the module and of the slowest modules it
+imports is reported, as the best of several runs.
+"""
+
+import argparse
+import os
+import pathlib
+import re
+import subprocess
+import sys
+from typing import Dict, List, Tuple
+
+_ROOT_DIR = pathlib.Path(__file__).resolve().parents[2]
+
+
+def _get_import_times(module: str) -> Dict[str, int]:
+    """Return the cumulative import times of module and its imports, in us."""
+    python_path = [str(_ROOT_DIR)]
+    if os.environ.get("PYTHONPATH"):
+        python_path.append(os.environ["PYTHONPATH"])
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=_ROOT_DIR,
+        env={**os.environ, "PYTHONPATH": os.pathsep.join(python_path)},
+        check=True,
+        stderr=subprocess.PIPE,
+        universal_newlines=True,
+    )
+    imports: List[Tuple[int, str, int]] = []
+    for line in proc.stderr.splitlines():
+        # import time: self [us] | cumulative | imported package
+        match = re.match(r"import time:\s+\d+ \|\s+(\d+) \|( *)(\S+)$", line)
+        if match:
+            imports.append((len(match.group(2)), match.group(3), int(match.group(1))))
+
+    # Modules are reported once imported, nested under the module importing
+    # them, so those imported by module are listed right before it.
+    end = next(i for i, (_, name, _) in enumerate(imports) if name == module)
+    depth = imports[end][0]
+    start = end
+    while start and imports[start - 1][0] > depth:
+        start -= 1
+    return {name: cumulative for _, name, cumulative in imports[start : end + 1]}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--module", default="snapcraft.cli", help="module to import")
+    parser.add_argument("--runs", type=int, default=5, help="number of imports")
+    parser.add_argument(
+        "--top", type=int, default=10, help="number of slowest modules to list"
+    )
+    args = parser.parse_args()
+
+    best: Dict[str, int] = dict()
+    for _ in range(args.runs):
+        for module, cumulative in _get_import_times(args.module).items():
+            best[module] = min(best.get(module, cumulative), cumulative)
+
+    print(f"{args.module + ':':40}{best[args.module] / 1000:.1f}ms")
+    print()
+    print("slowest imports:")
+    slowest = sorted(
+        ((t, m) for m, t in best.items() if m != args.module), reverse=True
+    )
+    for cumulative, module in slowest[: args.top]:
+        print(f"  {module + ':':38}{cumulative / 1000:.1f}ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+# -*- Mode:Python; indent-tabs-mode:nil; tab-width:4 -*-
+#
+# Copyright (C) 2022 Canonical Ltd
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License version 3 as
+# published by the Free Software Foundation.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""Compare the previous and current ordering and walking of parts.
+
+Synthetic part graphs are built as lattices, where each part is after all
+the parts in the row above. Parts are sorted on a large lattice, and the
+recursive dependencies of the last part are collected on a narrow but deep
+one, once with the previous quadratic sort and per path recursion and once
+with PartsConfig.
+"""
+
+import argparse
+import time
+from typing import Dict, List
+
+from snapcraft_legacy.internal.project_loader import _parts_config
+
+
+class _Part:
+    def __init__(self, name: str) -> None:
+        self.name = name
+        self.deps: List["_Part"] = []
+
+
+def _make_parts_config(width: int, depth: int) -> _parts_config.PartsConfig:
+    dependencies: Dict[str, List[str]] = dict()
+    for row in range(depth):
+        for column in range(width):
+            dependencies[f"part-{row}-{column}"] = [
+                f"part-{row - 1}-{c}" for c in range(width) if row
+            ]
+
+    # Only the graph is needed, skip loading plugins for each part.
+    parts_config = _parts_config.PartsConfig.__new__(_parts_config.PartsConfig)
+    parts_config.after_requests = dependencies
+    parts_config.all_parts = [_Part(name) for name in dependencies]
+    parts_config._compute_dependencies()
+    return parts_config
+
+
+def _previous_sort(parts: List[_Part]) -> List[_Part]:
+    parts = sorted(parts, key=lambda part: part.name, reverse=True)
+    sorted_parts: List[_Part] = []
+    while parts:
+        top_part = next(
+            part for part in parts if not any(part in other.deps for other in parts)
+        )
+        sorted_parts = [top_part] + sorted_parts
+        parts.remove(top_part)
+    return sorted_parts
+
+
+def _previous_get_dependencies(parts_config, part_name: str):
+    dependency_names = set(parts_config.after_requests.get(part_name, []))
+    dependencies = {p for p in parts_config.all_parts if p.name in dependency_names}
+    for dependency_name in dependency_names:
+        dependencies |= _previous_get_dependencies(parts_config, dependency_name)
+    return dependencies
+
+
+def _time(function, *args):
+    start = time.perf_counter()
+    result = function(*args)
+    return time.perf_counter() - start, result
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        "--width", type=int, default=20, help="parts per row of the sorted graph"
+    )
+    parser.add_argument(
+        "--depth", type=int, default=25, help="rows of the sorted graph"
+    )
+    parser.add_argument(
+        "--dependency-depth",
+        type=int,
+        default=12,
+        help="rows of the three parts wide graph walked for dependencies",
+    )
+    args = parser.parse_args()
+
+    parts_config = _make_parts_config(args.width, args.depth)
+    previous_sort_time, previous_order = _time(_previous_sort, parts_config.all_parts)
+    sort_time, order = _time(parts_config._sort_parts)
+
+    parts_config = _make_parts_config(3, args.dependency_depth)
+    part_name = parts_config.all_parts[-1].name
+    previous_dependencies_time, previous_dependencies = _time(
+        _previous_get_dependencies, parts_config, part_name
+    )
+    dependencies_time, dependencies = _time(
+        lambda: parts_config.get_dependencies(part_name, recursive=True)
+    )
+
+    print(f"sorted parts:                {args.width * args.depth}")
+    print(f"previous sort:               {previous_sort_time:.3f}s")
+    print(f"sort:                        {sort_time:.3f}s")
+    print(f"identical order:             {previous_order == order}")
+    print(f"dependencies:                {len(dependencies)}")
+    print(f"previous dependencies:       {previous_dependencies_time:.3f}s")
+    print(f"recursive dependencies:      {dependencies_time:.3f}s")
+    print(f"identical dependencies:      {previous_dependencies == dependencies}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+# -*- Mode:Python; indent-tabs-mode:nil; tab-width:4 -*-
+#
+# Copyright (C) 2022 Canonical Ltd
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License version 3 as
+# published by the Free Software Foundation.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""Compare loading plain YAML and compact stage state files.
+
+A StageState for a synthetic part with many files is written once with
+the file lists as plain YAML sets, as older versions did, and once with
+the compact encoding. Both are then loaded, with and without accessing
+the file lists.
+"""
+
+import argparse
+import os
+import tempfile
+import time
+
+from snapcraft_legacy import yaml_utils
+from snapcraft_legacy.internal import states, steps
+
+
+def _make_state(count: int) -> states.StageState:
+    directories = {f"usr/lib/module-{i // 100}" for i in range(count)}
+    files = {f"usr/lib/module-{i // 100}/file-{i}.so" for i in range(count)}
+    return states.StageState(files, directories, {"stage": ["*"]})
+
+
+def _time_load(state_dir: str, access_files: bool) -> float:
+    start = time.perf_counter()
+    state = states.get_state(state_dir, steps.STAGE)
+    if access_files:
+        len(state.files)
+    return time.perf_counter() - start
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        "--count", type=int, default=200000, help="number of files in the part"
+    )
+    args = parser.parse_args()
+
+    state = _make_state(args.count)
+    with tempfile.TemporaryDirectory() as yaml_dir, tempfile.TemporaryDirectory() as compact_dir:
+        with open(states.get_step_state_file(yaml_dir, steps.STAGE), "w") as f:
+            f.write("!StageState\n" + yaml_utils.dump(state.__dict__))
+        with open(states.get_step_state_file(compact_dir, steps.STAGE), "w") as f:
+            f.write(yaml_utils.dump(state))
+
+        sizes = [
+            os.path.getsize(states.get_step_state_file(d, steps.STAGE))
+            for d in (yaml_dir, compact_dir)
+        ]
+        yaml_times = [_time_load(yaml_dir, access) for access in (False, True)]
+        compact_times = [_time_load(compact_dir, access) for access in (False, True)]
+
+        assert states.get_state(yaml_dir, steps.STAGE) == states.get_state(
+            compact_dir, steps.STAGE
+        )
+
+    print(f"files:                       {args.count}")
+    print(f"YAML size:                   {sizes[0] / 2**20:.1f} MiB")
+    print(f"compact size:                {sizes[1] / 2**20:.1f} MiB")
+    print(f"YAML load:                   {yaml_times[0]:.3f}s")
+    print(f"compact load:                {compact_times[0]:.3f}s")
+    print(f"YAML load with files:        {yaml_times[1]:.3f}s")
+    print(f"compact load with files:     {compact_times[1]:.3f}s")
+
+
+if __name__ == "__main__":
+    main()
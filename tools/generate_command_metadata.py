@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+# -*- Mode:Python; indent-tabs-mode:nil; tab-width:4 -*-
+#
+# Copyright (C) 2022 Canonical Ltd
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License version 3 as
+# published by the Free Software Foundation.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""Generate snapcraft/commands/_metadata.py from the command classes.
+
+The command line is built from this metadata so that command modules are
+only imported when a command is used. Run this script after adding a
+command or changing its name, help message, or visibility.
+"""
+
+import argparse
+import importlib
+import inspect
+import json
+import pathlib
+import pkgutil
+import sys
+
+import craft_cli
+
+import snapcraft.commands
+
+_METADATA_PATH = pathlib.Path(snapcraft.commands.__file__).parent / "_metadata.py"
+
+_HEADER = '''\
+# -*- Mode:Python; indent-tabs-mode:nil; tab-width:4 -*-
+#
+# Copyright 2022 Canonical Ltd.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License version 3 as
+# published by the Free Software Foundation.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+# Generated by tools/generate_command_metadata.py, do not edit.
+
+"""Metadata of the snapcraft commands, known without importing them."""
+
+from typing import Any, Dict
+
+# The module and the command attributes of each command class.
+COMMAND_METADATA: Dict[str, Dict[str, Any]] = {
+'''
+
+
+def _get_command_classes():
+    for module_info in pkgutil.iter_modules(snapcraft.commands.__path__):
+        if module_info.name.startswith("_"):
+            continue
+        module = importlib.import_module(f"snapcraft.commands.{module_info.name}")
+        for command_class in vars(module).values():
+            if (
+                inspect.isclass(command_class)
+                and issubclass(command_class, craft_cli.BaseCommand)
+                and command_class.__module__ == module.__name__
+                and command_class.name is not None
+            ):
+                yield module_info.name, command_class
+
+
+def generate() -> str:
+    """Return the contents of the metadata module."""
+    lines = [_HEADER]
+    for module_name, command_class in sorted(
+        _get_command_classes(), key=lambda c: c[1].__name__
+    ):
+        lines.append(f"    {json.dumps(command_class.__name__)}: {{\n")
+        lines.append(f'        "module": {json.dumps(module_name)},\n')
+        lines.append(f'        "name": {json.dumps(command_class.name)},\n')
+        lines.append(f'        "help_msg": {json.dumps(command_class.help_msg)},\n')
+        lines.append(f'        "hidden": {command_class.hidden!r},\n')
+        lines.append(f'        "common": {command_class.common!r},\n')
+        lines.append("    },\n")
+    lines.append("}\n")
+    return "".join(lines)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        "--check",
+        action="store_true",
+        help="exit with an error if the metadata is not up to date",
+    )
+    args = parser.parse_args()
+
+    metadata = generate()
+    if args.check:
+        if _METADATA_PATH.read_text() != metadata:
+            sys.exit(f"{_METADATA_PATH} is out of date, run {sys.argv[0]}")
+    else:
+        _METADATA_PATH.write_text(metadata)
+
+
+if __name__ == "__main__":
+    main()